@@ -0,0 +1,46 @@
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from rqg.collect import collect_artifacts
+from benchmarks.synthetic import generate_junit_files
+
+
+def bench_collect(workspace: Path, jobs: int) -> float:
+    cwd = os.getcwd()
+    os.chdir(workspace)
+    try:
+        start = time.perf_counter()
+        collect_artifacts(
+            config_path="missing-rqg.yml",
+            output_path=str(workspace / f"bundle-{jobs}.jsonl"),
+            repo="bench/repo",
+            branch="main",
+            commit="abc123",
+            jobs=jobs,
+        )
+        return time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark artifact collection over many JUnit files")
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--tests-per-file", type=int, default=50)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp)
+        generate_junit_files(workspace / "reports", files=args.files, tests_per_file=args.tests_per_file)
+        
+        print(f"Collecting {args.files} JUnit files x {args.tests_per_file} tests\n")
+        for jobs in sorted(set(args.jobs)):
+            elapsed = bench_collect(workspace, jobs)
+            print(f"jobs={jobs:<4} {elapsed:8.3f}s  {args.files / elapsed:10,.0f} files/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import random
+import re
+import time
+from rqg.fingerprint import compute_fingerprint, detect_infra_hints, sanitize_failure_text
+from rqg.fingerprint.sanitizer import (
+    TIMESTAMP_PATTERNS,
+    UUID_PATTERN,
+    HASH_PATTERN,
+    PORT_PATTERN,
+    DURATION_PATTERN,
+)
+
+
+def legacy_sanitize_failure_text(text):
+    if not text:
+        return ""
+    
+    normalized = text
+    for pattern in TIMESTAMP_PATTERNS:
+        normalized = re.sub(pattern, "<TIMESTAMP>", normalized, flags=re.IGNORECASE)
+    
+    normalized = re.sub(UUID_PATTERN, "<UUID>", normalized, flags=re.IGNORECASE)
+    normalized = re.sub(HASH_PATTERN, "<HASH>", normalized, flags=re.IGNORECASE)
+    normalized = re.sub(PORT_PATTERN, ":<PORT>", normalized)
+    normalized = re.sub(DURATION_PATTERN, "<DURATION>", normalized, flags=re.IGNORECASE)
+    normalized = re.sub(r"\s+", " ", normalized)
+    return normalized.strip()
+
+
+def legacy_detect_infra_hints(failure_text, log_text=None):
+    combined_lower = ((failure_text or "") + "\n" + (log_text or "")).lower()
+    categories = [
+        ("network", [r"econnreset", r"timeout", r"dns", r"connection refused", r"connection reset", r"socket hang up"]),
+        ("runner", [r"disk full", r"oomkilled", r"no space left", r"agent disconnected", r"out of memory"]),
+        ("session", [r"session not created", r"webdriver disconnect", r"browser.*crash"]),
+    ]
+    
+    hints = []
+    for category, patterns in categories:
+        for pattern in patterns:
+            if re.search(pattern, combined_lower):
+                hints.append(category)
+                break
+    return hints
+
+
+def synthetic_failure_texts(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    texts = []
+    for i in range(count):
+        request_id = "%08x-%04x-%04x-%04x-%012x" % tuple(rng.getrandbits(b) for b in (32, 16, 16, 16, 48))
+        frames = "\n".join(
+            f"    at com.example.module{rng.randint(1, 40)}.Service{j}.call(Service{j}.java:{rng.randint(10, 900)})"
+            for j in range(rng.randint(5, 25))
+        )
+        texts.append(
+            f"java.lang.AssertionError: request {request_id} failed after {rng.randint(1, 5000)}ms\n"
+            f"2024-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T10:{rng.randint(10, 59)}:{rng.randint(10, 59)} "
+            f"GET http://localhost:{rng.randint(1024, 65535)}/api/items/{rng.randint(1, 10 ** 6)}\n"
+            f"commit {rng.getrandbits(160):040x}\n"
+            f"{frames}\n"
+            f"Caused by: java.net.SocketTimeoutException: Read timed out after {rng.randint(1, 60)}.{rng.randint(0, 9)}s"
+        )
+    return texts
+
+
+def _time(func, texts, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark failure text sanitizing and fingerprinting")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    texts = synthetic_failure_texts(args.texts)
+    
+    for text in texts:
+        if legacy_sanitize_failure_text(text) != sanitize_failure_text(text):
+            raise SystemExit(f"Sanitizer output differs from the legacy implementation:\n{text}")
+        if legacy_detect_infra_hints(text) != detect_infra_hints(text):
+            raise SystemExit(f"Infra hints differ from the legacy implementation:\n{text}")
+    
+    variants = [
+        ("sanitize (legacy)", legacy_sanitize_failure_text),
+        ("sanitize", sanitize_failure_text),
+        ("infra hints (legacy)", legacy_detect_infra_hints),
+        ("infra hints", detect_infra_hints),
+        ("compute_fingerprint", compute_fingerprint),
+    ]
+    
+    calls = args.texts * args.repeat
+    print(f"Processing {args.texts} failure texts x {args.repeat}\n")
+    for name, func in variants:
+        elapsed = _time(func, texts, args.repeat)
+        print(f"{name:<30} {elapsed:8.3f}s  {elapsed / calls * 1e6:10.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from rqg.models import RunMetadata, TestCaseResult
+from rqg.storage import SQLiteStore
+from rqg.storage.sqlite_store import result_row_from_dict
+
+
+def synthetic_result_dicts(count: int, fail_rate: float = 0.02, seed: int = 1):
+    rng = random.Random(seed)
+    for i in range(count):
+        failed = rng.random() < fail_rate
+        yield {
+            "test_id": f"com.example.module{i % 97}.Suite{i % 501}::test_case_{i}",
+            "suite": f"suite{i % 31}",
+            "classname": f"com.example.module{i % 97}.Suite{i % 501}",
+            "name": f"test_case_{i}",
+            "duration_ms": rng.uniform(1, 2000),
+            "outcome": "fail" if failed else "pass",
+            "failure_text": f"AssertionError: expected 1 but got {i}\n  at Suite.test_case_{i}" if failed else None,
+            "fingerprint": f"{i % 13:064x}" if failed else None,
+            "retry_count": 0,
+        }
+
+
+def _metadata() -> RunMetadata:
+    return RunMetadata(repo="bench/repo", branch="main", commit_sha="abc123")
+
+
+def bench_per_row_execute(db_path: Path, results) -> float:
+    SQLiteStore(db_path=str(db_path)).close()
+    
+    start = time.perf_counter()
+    test_results = [TestCaseResult.from_dict(dict(d)) for d in results]
+    conn = sqlite3.connect(str(db_path))
+    cursor = conn.cursor()
+    for tr in test_results:
+        cursor.execute("""
+            INSERT INTO test_results (
+                run_id, test_id, suite, classname, name, duration_ms,
+                outcome, failure_text, fingerprint, retry_count
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            "bench-run",
+            tr.test_id,
+            tr.suite,
+            tr.classname,
+            tr.name,
+            tr.duration_ms,
+            tr.outcome,
+            tr.failure_text[:10000] if tr.failure_text else None,
+            tr.fingerprint,
+            tr.retry_count,
+        ))
+    conn.commit()
+    conn.close()
+    return time.perf_counter() - start
+
+
+def bench_bulk(db_path: Path, results, rebuild_indexes: bool) -> float:
+    with SQLiteStore(db_path=str(db_path)) as store:
+        start = time.perf_counter()
+        store.save_run_rows(
+            "bench-run",
+            _metadata(),
+            (result_row_from_dict(d) for d in results),
+            rebuild_indexes=rebuild_indexes,
+        )
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark test result ingestion throughput")
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+    
+    results = list(synthetic_result_dicts(args.rows))
+    
+    variants = [
+        ("per-row execute", lambda path: bench_per_row_execute(path, results)),
+        ("executemany", lambda path: bench_bulk(path, results, rebuild_indexes=False)),
+        ("executemany + index rebuild", lambda path: bench_bulk(path, results, rebuild_indexes=True)),
+    ]
+    
+    print(f"Ingesting {args.rows} test results\n")
+    for name, run in variants:
+        with tempfile.TemporaryDirectory() as tmp:
+            elapsed = run(Path(tmp) / "rqg.db")
+        print(f"{name:<30} {elapsed:8.3f}s  {args.rows / elapsed:12,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from rqg.config import PolicyConfig
+from rqg.models import RunMetadata
+from rqg.scoring import compute_flake_scores_batch
+from rqg.storage import SQLiteStore
+
+
+def populate_history(db_path: Path, runs: int, tests_per_run: int, seed: int = 1):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    
+    with SQLiteStore(db_path=str(db_path)) as store:
+        for i in range(runs):
+            metadata = RunMetadata(
+                repo="bench/repo",
+                branch="main",
+                commit_sha=f"{i // 3:040x}",
+                started_at=now - timedelta(minutes=runs - i),
+                os=rng.choice(["linux", "macos"]),
+            )
+            rows = []
+            for j in range(tests_per_run):
+                failed = rng.random() < 0.03
+                rows.append((
+                    f"com.example.module{j % 97}.Suite{j % 501}::test_case_{j}",
+                    f"suite{j % 31}",
+                    None,
+                    None,
+                    rng.uniform(1, 2000),
+                    "fail" if failed else "pass",
+                    None,
+                    f"{j % 13:064x}" if failed else None,
+                    rng.choice([0, 0, 0, 1]),
+                ))
+            store.save_run_rows(f"run-{i}", metadata, rows)
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(mode: str, db_path: str, runs: int, backend: str):
+    config = PolicyConfig.from_dict({"flake_detection": {"backend": backend}})
+    baseline = _peak_rss_mb()
+    
+    start = time.perf_counter()
+    with SQLiteStore(db_path=db_path) as store:
+        if mode == "runs":
+            history = store.get_recent_runs(repo="bench/repo", lookback_runs=runs, lookback_days=1)
+        else:
+            history = store.get_history(repo="bench/repo", lookback_runs=runs, lookback_days=1)
+    scores = compute_flake_scores_batch(history, config)
+    elapsed = time.perf_counter() - start
+    
+    print(f"{_peak_rss_mb() - baseline:.1f} {elapsed:.3f} {len(scores)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak RSS of list-of-Run history against the compact history table")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--tests-per-run", type=int, default=5000)
+    parser.add_argument("--backend", choices=["python", "numpy"], default="python")
+    parser.add_argument("--measure", choices=["runs", "table"], help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.measure:
+        measure(args.measure, args.db, args.runs, args.backend)
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "rqg.db"
+        populate_history(db_path, args.runs, args.tests_per_run)
+        
+        print(f"Scoring {args.runs} runs x {args.tests_per_run} tests ({args.backend} backend)\n")
+        for mode in ("runs", "table"):
+            output = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.bench_memory",
+                    "--measure", mode,
+                    "--db", str(db_path),
+                    "--runs", str(args.runs),
+                    "--backend", args.backend,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()
+            peak_mb, elapsed, scored = float(output[-3]), float(output[-2]), int(output[-1])
+            print(f"{mode:<6} peak +{peak_mb:8.1f} MB  {elapsed:8.3f}s  {scored:,} scores")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import random
+import time
+from datetime import datetime
+from rqg.config import PolicyConfig
+from rqg.models import Run, RunMetadata, TestCaseResult
+from rqg.policy import apply_policy
+from benchmarks.synthetic import synthetic_test_id
+
+
+def legacy_policy_reasons(current_run, new_clusters, known_flaky, config):
+    hard_block = config.gating.get("hard_block", {})
+    critical_paths = hard_block.get("critical_paths", [])
+    required_suites = hard_block.get("required_suites", [])
+    reasons = []
+    
+    for tr in current_run.test_results:
+        if tr.outcome != "fail":
+            continue
+        suite_lower = tr.suite.lower()
+        test_id_lower = tr.test_id.lower()
+        
+        for critical in critical_paths:
+            if critical.lower() in suite_lower or critical.lower() in test_id_lower:
+                if tr.fingerprint not in [c["fingerprint"] for c in new_clusters]:
+                    continue
+                reasons.append({
+                    "type": "critical_path_failure",
+                    "severity": "high",
+                    "message": f"New failure in critical path: {critical}",
+                    "data": {"test_id": tr.test_id, "suite": tr.suite},
+                })
+        
+        if tr.suite in required_suites:
+            is_known_flaky = any(
+                f["test_id"] == tr.test_id and f.get("flake_score", 0) >= 0.75
+                for f in known_flaky
+            )
+            if not is_known_flaky:
+                reasons.append({
+                    "type": "required_suite_failure",
+                    "severity": "high",
+                    "message": f"Required suite '{tr.suite}' has failure",
+                    "data": {"test_id": tr.test_id, "suite": tr.suite},
+                })
+    return reasons
+
+
+def synthetic_policy_inputs(failures: int, critical_paths: int, seed: int = 1):
+    rng = random.Random(seed)
+    results = []
+    for i in range(failures):
+        test_id = synthetic_test_id(rng.randrange(failures * 10))
+        suite = test_id.split("::", 1)[0]
+        results.append(TestCaseResult(
+            test_id=test_id,
+            suite=suite,
+            name=test_id.split("::", 1)[1],
+            outcome="fail",
+            failure_text="AssertionError",
+            fingerprint=f"fp{rng.randrange(failures // 4 + 1)}",
+        ))
+    
+    run = Run(
+        run_id="bench-policy",
+        metadata=RunMetadata(repo="bench/repo", branch="main", commit_sha="abc", started_at=datetime(2024, 1, 1)),
+        test_results=results,
+    )
+    new_clusters = [
+        {"fingerprint": f"fp{i}", "count": 1}
+        for i in rng.sample(range(failures // 4 + 1), k=min(failures // 8 + 1, failures // 4 + 1))
+    ]
+    known_flaky = [
+        {"test_id": tr.test_id, "flake_score": rng.choice([0.5, 0.75, 0.9])}
+        for tr in rng.sample(results, k=len(results) // 5)
+    ]
+    paths = [f"module{rng.randrange(97)}" for _ in range(critical_paths)]
+    paths += [f"Suite{rng.randrange(failures)}Test", "TEST_CASE_1", "module1"]
+    config = PolicyConfig.from_dict({
+        "gating": {
+            "hard_block": {
+                "max_new_failure_clusters": 10 ** 9,
+                "critical_paths": paths,
+                "required_suites": list({tr.suite for tr in rng.sample(results, k=len(results) // 10)}),
+            },
+        },
+    })
+    return run, new_clusters, known_flaky, config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark policy evaluation against the legacy rule scan")
+    parser.add_argument("--failures", type=int, default=2000)
+    parser.add_argument("--critical-paths", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    run, new_clusters, known_flaky, config = synthetic_policy_inputs(args.failures, args.critical_paths)
+    rule_types = {"critical_path_failure", "required_suite_failure"}
+    
+    decision = apply_policy(run, new_clusters, known_flaky, [], config)
+    reasons = [reason for reason in decision.decision_reasons if reason["type"] in rule_types]
+    if reasons != legacy_policy_reasons(run, new_clusters, known_flaky, config):
+        raise SystemExit("Policy reasons differ from the legacy implementation")
+    
+    print(f"Evaluating {args.failures} failures against {len(config.gating['hard_block']['critical_paths'])} critical paths x {args.repeat}\n")
+    variants = [
+        ("rule scan (legacy)", lambda: legacy_policy_reasons(run, new_clusters, known_flaky, config)),
+        ("apply_policy", lambda: apply_policy(run, new_clusters, known_flaky, [], config)),
+    ]
+    for name, func in variants:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            func()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<30} {elapsed:8.3f}s  {elapsed / args.repeat * 1000:10.1f} ms/run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from rqg.analyze import analyze_run
+from rqg.server import WarmIndex
+from benchmarks.synthetic import generate_history, populate_history_db, write_synthetic_bundle
+
+
+COMPARED_FIELDS = ("decision", "decision_reasons", "known_flaky_failures", "new_failure_clusters")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark warm 'rqg serve' analyses against cold analyze_run")
+    parser.add_argument("--history-runs", type=int, default=50)
+    parser.add_argument("--tests", type=int, default=2000)
+    parser.add_argument("--analyses", type=int, default=10)
+    parser.add_argument("--source", choices=["history", "stats"], default="history")
+    args = parser.parse_args()
+    
+    runs = list(generate_history(args.history_runs + args.analyses, args.tests))
+    
+    with tempfile.TemporaryDirectory(prefix="rqg-bench-serve-") as tmp:
+        root = Path(tmp)
+        bundles = [write_synthetic_bundle(root / "bundles" / f"{i}.jsonl", run) for i, run in enumerate(runs[args.history_runs:])]
+        for name in ("cold", "warm"):
+            (root / name / ".rqg").mkdir(parents=True)
+            (root / name / "rqg.yml").write_text(f"flake_detection:\n  source: {args.source}\n")
+        populate_history_db(root / "cold" / ".rqg" / "rqg.db", iter(runs[:args.history_runs]))
+        shutil.copy(root / "cold" / ".rqg" / "rqg.db", root / "warm" / ".rqg" / "rqg.db")
+        
+        cwd = os.getcwd()
+        try:
+            os.chdir(root / "cold")
+            start = time.perf_counter()
+            cold = [analyze_run(bundle_path=str(path), output_dir="out") for path in bundles]
+            cold_elapsed = time.perf_counter() - start
+            
+            os.chdir(root / "warm")
+            start = time.perf_counter()
+            index = WarmIndex()
+            warm = [index.analyze(str(path), output_dir="out") for path in bundles]
+            warm_elapsed = time.perf_counter() - start
+            index.close()
+        finally:
+            os.chdir(cwd)
+    
+    for cold_decision, warm_decision in zip(cold, warm):
+        if any(cold_decision[field] != warm_decision[field] for field in COMPARED_FIELDS):
+            raise SystemExit("Warm decisions differ from cold analyze_run")
+    
+    print(f"{args.analyses} analyses, {args.tests} tests/run, {args.history_runs} runs of history ({args.source})\n")
+    for name, elapsed in (("cold analyze_run", cold_elapsed), ("warm index (rqg serve)", warm_elapsed)):
+        print(f"{name:<30} {elapsed:8.3f}s  {elapsed / args.analyses * 1000:10.1f} ms/analysis")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+MODULES = ("rqg.cli", "rqg.analyze")
+
+CLI_STARTUP_BUDGET_MS = 200.0
+
+
+def import_times(module: str):
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    
+    times = {}
+    for line in output.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def import_samples_ms(module: str, repeat: int):
+    return [import_times(module)[module] / 1000 for _ in range(repeat)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cumulative import time of the rqg CLI entry points")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=CLI_STARTUP_BUDGET_MS, help="Fail if the median rqg.cli import exceeds this")
+    args = parser.parse_args()
+    
+    medians = {}
+    for module in MODULES:
+        samples = import_samples_ms(module, args.repeat)
+        medians[module] = statistics.median(samples)
+        print(
+            f"{module:<16} median {medians[module]:8.1f} ms  "
+            f"min {min(samples):8.1f} ms  max {max(samples):8.1f} ms"
+        )
+    
+    if medians["rqg.cli"] > args.budget_ms:
+        raise SystemExit(f"rqg.cli import median {medians['rqg.cli']:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
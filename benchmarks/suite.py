@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List
+import rqg
+from rqg import profiling
+from rqg.analyze import analyze_run
+from rqg.collect import collect_artifacts
+from benchmarks.synthetic import (
+    TESTS_PER_SUITE,
+    generate_history,
+    generate_junit_files,
+    populate_history_db,
+    write_synthetic_bundle,
+)
+
+
+SCALES = {
+    "small": {"runs": 20, "tests_per_run": 500, "env_cardinality": 2},
+    "medium": {"runs": 50, "tests_per_run": 2000, "env_cardinality": 4},
+    "large": {"runs": 200, "tests_per_run": 10000, "env_cardinality": 8},
+}
+
+ANALYZE_STAGES = {
+    "analyze_ingest": "analyze.ingest",
+    "history_load": "store.get_history",
+    "cluster_lookup": "store.get_failure_clusters",
+    "flake_scoring": "scoring.compute_flake_scores_batch",
+    "policy": "policy.apply_policy",
+}
+
+
+def _stage(seconds: float, items: int) -> Dict[str, Any]:
+    return {
+        "seconds": round(seconds, 6),
+        "items": items,
+        "per_second": round(items / seconds, 1) if seconds > 0 else None,
+    }
+
+
+def _stage_seconds(timings: Dict[str, Any], name: str) -> float:
+    return timings["stages"].get(name, {}).get("total_ms", 0.0) / 1000
+
+
+def run_scale(
+    name: str,
+    runs: int,
+    tests_per_run: int,
+    env_cardinality: int,
+    fail_rate: float,
+    flaky_rate: float,
+    flake_fail_rate: float,
+    seed: int,
+) -> Dict[str, Any]:
+    params = {
+        "runs": runs,
+        "tests_per_run": tests_per_run,
+        "env_cardinality": env_cardinality,
+        "fail_rate": fail_rate,
+        "flaky_rate": flaky_rate,
+        "flake_fail_rate": flake_fail_rate,
+        "seed": seed,
+    }
+    stages = {}
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp)
+        os.chdir(workspace)
+        try:
+            history = list(generate_history(
+                runs + 1,
+                tests_per_run,
+                fail_rate=fail_rate,
+                flaky_rate=flaky_rate,
+                flake_fail_rate=flake_fail_rate,
+                env_cardinality=env_cardinality,
+                seed=seed,
+            ))
+            current_run = history.pop()
+            
+            with profiling.profiling() as profiler:
+                rows = populate_history_db(workspace / ".rqg" / "rqg.db", history)
+                ingest_timings = profiler.timings()
+            del history
+            stages["ingest"] = _stage(_stage_seconds(ingest_timings, "store.save_run_rows"), rows)
+            stages["fingerprint"] = _stage(
+                _stage_seconds(ingest_timings, "fingerprint.compute_fingerprint"),
+                ingest_timings["stages"].get("fingerprint.compute_fingerprint", {}).get("calls", 0),
+            )
+            
+            files = max(1, tests_per_run // TESTS_PER_SUITE)
+            generate_junit_files(workspace / "reports", files=files, tests_per_file=TESTS_PER_SUITE, fail_rate=fail_rate, seed=seed)
+            start = time.perf_counter()
+            collect_artifacts(config_path="missing-rqg.yml", output_path="collected.jsonl", repo="bench/repo", branch="main")
+            stages["collect"] = _stage(time.perf_counter() - start, files * TESTS_PER_SUITE)
+            
+            bundle_path = write_synthetic_bundle(workspace / "rqg" / "bundle.jsonl", current_run)
+            decision = analyze_run(config_path="missing-rqg.yml", bundle_path=str(bundle_path), output_dir="out")
+            timings = decision["timings"]
+            counters = timings["counters"]
+            
+            items = {
+                "analyze_ingest": counters.get("analyze.test_results", 0),
+                "history_load": counters.get("store.history_rows", 0),
+                "cluster_lookup": counters.get("analyze.failures", 0),
+                "flake_scoring": counters.get("store.history_rows", 0) + counters.get("analyze.test_results", 0),
+                "policy": counters.get("analyze.failures", 0),
+            }
+            for stage_name, timing_name in ANALYZE_STAGES.items():
+                stages[stage_name] = _stage(_stage_seconds(timings, timing_name), items[stage_name])
+            stages["analyze_total"] = _stage(timings["total_ms"] / 1000, counters.get("analyze.test_results", 0))
+        finally:
+            os.chdir(cwd)
+    
+    return {
+        "name": name,
+        "params": params,
+        "stages": stages,
+        "decision": decision["decision"],
+        "counters": counters,
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    regressions = []
+    baseline_scales = {scale["name"]: scale for scale in baseline.get("scales", [])}
+    
+    for scale in current["scales"]:
+        previous = baseline_scales.get(scale["name"])
+        if previous is None or previous["params"] != scale["params"]:
+            print(f"\n{scale['name']}: no comparable baseline")
+            continue
+        
+        print(f"\n{scale['name']}:")
+        for stage_name, stage in scale["stages"].items():
+            before = previous["stages"].get(stage_name, {}).get("seconds")
+            if not before:
+                continue
+            ratio = stage["seconds"] / before
+            marker = "  REGRESSION" if ratio > threshold else ""
+            print(f"  {stage_name:<16} {before:10.4f}s -> {stage['seconds']:10.4f}s  x{ratio:6.2f}{marker}")
+            if marker:
+                regressions.append(f"{scale['name']}.{stage_name}")
+    
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the rqg benchmark suite over synthetic CI histories")
+    parser.add_argument("--scale", choices=sorted(SCALES), nargs="+", default=["small", "medium"])
+    parser.add_argument("--fail-rate", type=float, default=0.005)
+    parser.add_argument("--flaky-rate", type=float, default=0.03)
+    parser.add_argument("--flake-fail-rate", type=float, default=0.3)
+    parser.add_argument("--env-cardinality", type=int, help="Override env_key cardinality for every scale")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", "-o", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+    
+    results = {
+        "rqg_version": rqg.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "created_at": datetime.utcnow().isoformat(),
+        "scales": [],
+    }
+    
+    for name in args.scale:
+        scale = dict(SCALES[name])
+        if args.env_cardinality:
+            scale["env_cardinality"] = args.env_cardinality
+        
+        print(f"{name}: {scale['runs']} runs x {scale['tests_per_run']} tests, {scale['env_cardinality']} environments")
+        result = run_scale(
+            name,
+            fail_rate=args.fail_rate,
+            flaky_rate=args.flaky_rate,
+            flake_fail_rate=args.flake_fail_rate,
+            seed=args.seed,
+            **scale,
+        )
+        results["scales"].append(result)
+        
+        for stage_name, stage in result["stages"].items():
+            rate = f"{stage['per_second']:14,.0f}/s" if stage["per_second"] else ""
+            print(f"  {stage_name:<16} {stage['seconds']:10.4f}s {stage['items']:10,} items {rate}")
+    
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from xml.sax.saxutils import escape
+from rqg.bundle import BundleWriter
+from rqg.fingerprint.cache import FingerprintCache
+from rqg.models import Run, RunMetadata, TestCaseResult
+from rqg.storage import SQLiteStore
+
+
+TESTS_PER_SUITE = 50
+ENV_OS = ["linux", "macos", "windows"]
+ENV_BROWSERS = ["chrome", "firefox", "safari", "edge"]
+
+
+def synthetic_failure_text(rng: random.Random, index: int) -> str:
+    frames = "\n".join(
+        f"    at com.example.module{rng.randint(1, 40)}.Service{j}.call(Service{j}.java:{rng.randint(10, 900)})"
+        for j in range(rng.randint(3, 12))
+    )
+    return (
+        f"java.lang.AssertionError: expected <{index}> but was <{rng.randint(0, 10 ** 6)}> "
+        f"after {rng.randint(1, 5000)}ms on localhost:{rng.randint(1024, 65535)}\n{frames}"
+    )
+
+
+def write_junit_file(
+    path: Path,
+    suite_index: int,
+    tests_per_file: int,
+    fail_rate: float,
+    skip_rate: float,
+    rng: random.Random,
+):
+    classname = f"com.example.module{suite_index % 97}.Suite{suite_index}Test"
+    parts = [f'<?xml version="1.0" encoding="UTF-8"?>\n<testsuite name="{classname}" tests="{tests_per_file}">\n']
+    
+    for i in range(tests_per_file):
+        roll = rng.random()
+        parts.append(f'  <testcase classname="{classname}" name="test_case_{i}" time="{rng.uniform(0.001, 3):.3f}">')
+        if roll < fail_rate:
+            parts.append(f'<failure message="assertion failed">{escape(synthetic_failure_text(rng, i))}</failure>')
+        elif roll < fail_rate + skip_rate:
+            parts.append("<skipped/>")
+        parts.append("</testcase>\n")
+    
+    parts.append("</testsuite>\n")
+    path.write_text("".join(parts), encoding="utf-8")
+
+
+def generate_junit_files(
+    output_dir: Path,
+    files: int,
+    tests_per_file: int = 50,
+    fail_rate: float = 0.02,
+    skip_rate: float = 0.01,
+    seed: int = 1,
+):
+    rng = random.Random(seed)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    paths = []
+    for suite_index in range(files):
+        path = output_dir / f"module{suite_index % 97}" / f"TEST-Suite{suite_index}.xml"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_junit_file(path, suite_index, tests_per_file, fail_rate, skip_rate, rng)
+        paths.append(path)
+    
+    return paths
+
+
+def synthetic_test_id(index: int) -> str:
+    suite_index = index // TESTS_PER_SUITE
+    return f"com.example.module{suite_index % 97}.Suite{suite_index}Test::test_case_{index % TESTS_PER_SUITE}"
+
+
+def synthetic_environments(cardinality: int) -> List[Dict[str, Optional[str]]]:
+    combos = len(ENV_OS) * len(ENV_BROWSERS)
+    return [
+        {
+            "os": ENV_OS[i % len(ENV_OS)],
+            "browser": ENV_BROWSERS[(i // len(ENV_OS)) % len(ENV_BROWSERS)],
+            "runner_pool": f"pool-{i // combos}" if i >= combos else None,
+        }
+        for i in range(max(1, cardinality))
+    ]
+
+
+def _flaky_failure_text(rng: random.Random, test_id: str, index: int) -> str:
+    classname, name = test_id.split("::")
+    if index % 2:
+        return (
+            f"java.net.SocketTimeoutException: Read timed out after {rng.randint(1, 60)}s "
+            f"connecting to localhost:{rng.randint(1024, 65535)}\n    at {classname}.{name}({name}.java:42)"
+        )
+    return (
+        f"java.lang.AssertionError: element not visible after {rng.randint(100, 5000)}ms\n"
+        f"    at {classname}.{name}({name}.java:{index % 300 + 10})"
+    )
+
+
+def generate_history(
+    runs: int,
+    tests_per_run: int,
+    fail_rate: float = 0.005,
+    flaky_rate: float = 0.03,
+    flake_fail_rate: float = 0.3,
+    env_cardinality: int = 4,
+    runs_per_commit: int = 3,
+    repo: str = "bench/repo",
+    branch: str = "main",
+    seed: int = 1,
+) -> Iterator[Run]:
+    rng = random.Random(seed)
+    environments = synthetic_environments(env_cardinality)
+    test_ids = [synthetic_test_id(i) for i in range(tests_per_run)]
+    flaky_tests = set(rng.sample(range(tests_per_run), int(tests_per_run * flaky_rate)))
+    now = datetime.utcnow()
+    
+    for run_index in range(runs):
+        started_at = now - timedelta(minutes=10 * (runs - run_index))
+        env = environments[run_index % len(environments)]
+        metadata = RunMetadata(
+            repo=repo,
+            branch=branch,
+            commit_sha=f"{run_index // max(1, runs_per_commit):040x}",
+            ci_provider="synthetic",
+            workflow="bench",
+            build_number=str(run_index),
+            started_at=started_at,
+            ended_at=started_at + timedelta(minutes=5),
+            **env,
+        )
+        
+        test_results = []
+        for index, test_id in enumerate(test_ids):
+            outcome = "pass"
+            failure_text = None
+            retry_count = 0
+            roll = rng.random()
+            
+            if index in flaky_tests:
+                if roll < flake_fail_rate:
+                    outcome = "fail"
+                    failure_text = _flaky_failure_text(rng, test_id, index)
+                elif roll < flake_fail_rate * 1.5:
+                    retry_count = 1
+            elif roll < fail_rate:
+                outcome = "fail"
+                failure_text = synthetic_failure_text(rng, index)
+            elif roll < fail_rate * 2:
+                outcome = "skip"
+            
+            classname, name = test_id.split("::")
+            test_results.append(TestCaseResult(
+                test_id=test_id,
+                suite=classname,
+                classname=classname,
+                name=name,
+                duration_ms=rng.uniform(1, 3000),
+                outcome=outcome,
+                failure_text=failure_text,
+                retry_count=retry_count,
+            ))
+        
+        yield Run(run_id=f"{repo}-{branch}-{run_index}", metadata=metadata, test_results=test_results)
+
+
+def populate_history_db(db_path: Path, runs: Iterator[Run]) -> int:
+    fingerprint_cache = FingerprintCache()
+    rows = 0
+    with SQLiteStore(db_path=str(db_path)) as store:
+        for run in runs:
+            for tr in run.test_results:
+                if tr.failure_text:
+                    tr.fingerprint = fingerprint_cache.fingerprint(tr.failure_text)
+            store.save_run(run)
+            rows += len(run.test_results)
+    return rows
+
+
+def write_synthetic_bundle(path: Path, run: Run) -> Path:
+    with BundleWriter(Path(path), run.run_id, run.metadata, log_events=run.log_events) as writer:
+        writer.write_all(run.test_results)
+    return writer.path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic JUnit XML reports")
+    parser.add_argument("output_dir")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--tests-per-file", type=int, default=50)
+    parser.add_argument("--fail-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    
+    paths = generate_junit_files(
+        Path(args.output_dir),
+        files=args.files,
+        tests_per_file=args.tests_per_file,
+        fail_rate=args.fail_rate,
+        seed=args.seed,
+    )
+    print(f"Wrote {len(paths)} JUnit files to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
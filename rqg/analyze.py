@@ -1,94 +1,252 @@
-import json
 from pathlib import Path
-from typing import Dict, Any, List
-from rqg.models import Run, DecisionRecord, FailureCluster
-from rqg.config import load_config
-from rqg.storage import SQLiteStore
-from rqg.fingerprint import compute_fingerprint, detect_infra_hints
-from rqg.scoring import compute_flake_scores
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Tuple, Union
+from rqg.models import Run, DecisionRecord, TestCaseResult, FailureCluster, FlakeScore
+from rqg.bundle import BundleReader
+from rqg.config import PolicyConfig, load_config
+from rqg.storage import SQLiteStore, HistoryTable
+from rqg.storage.sqlite_store import result_row
+from rqg.storage.test_stats import RollingTestStats
+from rqg.fingerprint.cache import FingerprintCache
+from rqg.fingerprint.similarity import SimilarityClusterer
+from rqg.scoring import compute_flake_scores_batch, compute_flake_scores_from_stats
 from rqg.policy import apply_policy
+from rqg.logs import INFRA_HINT_CATEGORIES
+from rqg.correlate import LogEventIndex
 from rqg.output import write_decision_record, write_summary
+from rqg import profiling
+
+
+class AnalysisState:
+    def __init__(self, config: PolicyConfig, store: SQLiteStore):
+        self.config = config
+        self.store = store
+        self.use_test_stats = config.get_flake_source() == "stats"
+        self._clusterers: Dict[str, SimilarityClusterer] = {}
+
+    def clusterer(self, repo: Optional[str]) -> Optional[SimilarityClusterer]:
+        if not self.config.get_similarity_enabled():
+            return None
+        
+        clusterer = self._clusterers.get(repo or "")
+        if clusterer is None:
+            clusterer = self._clusterers[repo or ""] = SimilarityClusterer(
+                self.store,
+                repo=repo,
+                threshold=self.config.get_similarity_threshold(),
+                num_perm=self.config.get_similarity_num_perm(),
+                bands=self.config.get_similarity_bands(),
+            )
+        return clusterer
+
+    def test_stats_cache(self, run: Run, env_key: str) -> Optional[Dict[str, Optional[RollingTestStats]]]:
+        return None
+
+    def ingested(self, run: Run):
+        pass
+
+    def history(self, run: Run) -> HistoryTable:
+        return self.store.get_history(
+            repo=run.metadata.repo,
+            branch=run.metadata.branch,
+            lookback_runs=self.config.get_lookback_runs(),
+            lookback_days=self.config.get_lookback_days(),
+        )
+
+    def test_stats(self, run: Run, env_key: str) -> Dict[str, RollingTestStats]:
+        return self.store.get_test_stats(
+            repo=run.metadata.repo,
+            branch=run.metadata.branch,
+            env_key=env_key,
+            test_ids=[tr.test_id for tr in run.test_results],
+        )
+
+    def flake_scores(self, run: Run, env_key: str) -> Dict[Tuple[str, str], FlakeScore]:
+        if self.use_test_stats:
+            return compute_flake_scores_from_stats(
+                self.test_stats(run, env_key),
+                env_key,
+                (tr.test_id for tr in run.test_results),
+            )
+        
+        history = self.history(run)
+        history.extend_run(run)
+        return compute_flake_scores_batch(
+            history,
+            self.config,
+            keys={(tr.test_id, env_key) for tr in run.test_results},
+        )
+
+    def failure_clusters(self, run: Run, failures: List[TestCaseResult]) -> List[FailureCluster]:
+        return self.store.get_failure_clusters(
+            repo=run.metadata.repo,
+            fingerprints=(tr.fingerprint for tr in failures if tr.fingerprint),
+            lookback_days=self.config.get_lookback_days(),
+            exclude_run_id=run.run_id,
+        )
 
 
 def analyze_run(
     config_path: str = "rqg.yml",
     bundle_path: str = "rqg/bundle.jsonl",
     output_dir: str = "rqg",
+) -> Dict[str, Any]:
+    with profiling.profiling() as profiler:
+        return _analyze_run(config_path, bundle_path, output_dir, profiler)
+
+
+def _analyze_run(
+    config_path: str,
+    bundle_path: str,
+    output_dir: str,
+    profiler: profiling.Profiler,
 ) -> Dict[str, Any]:
     config = load_config(config_path)
+    bundle = open_bundle(bundle_path)
     
+    with SQLiteStore(
+        stats_window=config.get_lookback_runs(),
+        stats_days=config.get_lookback_days(),
+    ) as store:
+        fingerprint_cache = FingerprintCache(
+            maxsize=config.get_fingerprint_cache_size(),
+            store=store if config.get_fingerprint_cache_persist() else None,
+        )
+        return analyze_bundle(bundle, Path(output_dir), AnalysisState(config, store), fingerprint_cache, profiler)
+
+
+def open_bundle(bundle_path: Union[str, Path]) -> BundleReader:
     bundle_file = Path(bundle_path)
     if not bundle_file.exists():
         raise FileNotFoundError(f"Bundle not found: {bundle_path}")
+    return BundleReader(bundle_file)
+
+
+def analyze_bundle(
+    bundle: BundleReader,
+    output_path: Path,
+    state: AnalysisState,
+    fingerprint_cache: FingerprintCache,
+    profiler: profiling.Profiler,
+) -> Dict[str, Any]:
+    env_key = bundle.metadata.env_key(state.config.get_env_key_fields())
+    current_run = ingest_run(bundle, env_key, state, fingerprint_cache)
+    decision_record = decide_run(current_run, env_key, state, fingerprint_cache)
+    for name in ("hits", "persisted_hits", "misses"):
+        profiling.count(f"fingerprint_cache.{name}", decision_record.cache_stats[name])
     
-    with open(bundle_file, "r", encoding="utf-8") as f:
-        current_run = Run.from_dict(json.load(f))
-    
-    store = SQLiteStore()
-    
-    for tr in current_run.test_results:
-        if tr.failure_text and not tr.fingerprint:
-            tr.fingerprint = compute_fingerprint(tr.failure_text)
-    
-    store.save_run(current_run)
+    with profiling.stage("analyze.write_output"):
+        decision_record.timings = profiler.timings()
+        write_outputs(decision_record, output_path)
     
-    history_runs = store.get_recent_runs(
-        repo=current_run.metadata.repo,
-        branch=current_run.metadata.branch,
-        lookback_runs=config.get_lookback_runs(),
-        lookback_days=config.get_lookback_days(),
+    return decision_record.to_dict()
+
+
+def ingest_run(
+    bundle: BundleReader,
+    env_key: str,
+    state: AnalysisState,
+    fingerprint_cache: FingerprintCache,
+) -> Run:
+    current_run = Run(
+        run_id=bundle.run_id,
+        metadata=bundle.metadata,
+        log_events=bundle.log_events,
     )
     
-    failure_clusters = store.get_failure_clusters(
-        lookback_days=config.get_lookback_days()
-    )
+    with profiling.stage("analyze.ingest"):
+        rows = list(_ingest_results(
+            bundle.iter_results(),
+            current_run.test_results,
+            fingerprint_cache,
+            state.clusterer(current_run.metadata.repo),
+        ))
+        state.store.save_run_rows(
+            current_run.run_id,
+            current_run.metadata,
+            rows,
+            env_key=env_key if state.use_test_stats else None,
+            test_stats=state.test_stats_cache(current_run, env_key),
+        )
+        if bundle.shards:
+            state.store.save_run_shards(current_run.run_id, bundle.shards)
+    profiling.count("analyze.test_results", len(current_run.test_results))
     
+    state.ingested(current_run)
+    return current_run
+
+
+def decide_run(
+    current_run: Run,
+    env_key: str,
+    state: AnalysisState,
+    fingerprint_cache: FingerprintCache,
+) -> DecisionRecord:
     current_failures = [tr for tr in current_run.test_results if tr.outcome == "fail"]
+    profiling.count("analyze.failures", len(current_failures))
     
-    new_clusters = []
-    known_clusters = {}
+    failure_clusters = state.failure_clusters(current_run, current_failures)
+    failure_hints = _failure_hints(current_run, current_failures, fingerprint_cache, state.config)
+    fingerprint_cache.flush()
     
-    for cluster in failure_clusters:
-        known_clusters[cluster.fingerprint] = cluster
+    known_clusters = {cluster.fingerprint: cluster for cluster in failure_clusters}
+    known_flaky, infra_failures = _classify_failures(
+        current_failures,
+        failure_hints,
+        known_clusters,
+        state.flake_scores(current_run, env_key),
+        env_key,
+    )
     
+    decision_record = apply_policy(
+        current_run=current_run,
+        new_clusters=_new_clusters(current_failures, known_clusters),
+        known_flaky=known_flaky,
+        infra_failures=infra_failures,
+        config=state.config,
+    )
+    decision_record.cache_stats = fingerprint_cache.stats()
+    return decision_record
+
+
+def _failure_hints(
+    current_run: Run,
+    current_failures: List[TestCaseResult],
+    fingerprint_cache: FingerprintCache,
+    config,
+) -> List[Tuple[List[str], List[Dict[str, Any]]]]:
+    log_index = LogEventIndex(current_run.log_events)
+    log_slack = config.get_log_correlation_slack()
+    return [
+        _infra_hints(fingerprint_cache.infra_hints(tr.failure_text), log_index, tr, log_slack)
+        for tr in current_failures
+    ]
+
+
+def _new_clusters(current_failures: List[TestCaseResult], known_clusters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    new_clusters = []
     for tr in current_failures:
-        if tr.fingerprint:
-            if tr.fingerprint not in known_clusters:
-                new_clusters.append({
-                    "fingerprint": tr.fingerprint,
-                    "test_id": tr.test_id,
-                    "failure_text": tr.failure_text[:500] if tr.failure_text else "",
-                })
-            else:
-                cluster = known_clusters[tr.fingerprint]
-                cluster.last_seen_at = current_run.metadata.started_at or current_run.metadata.ended_at
-                cluster.occurrence_count += 1
-                if tr.test_id not in cluster.test_ids:
-                    cluster.test_ids.append(tr.test_id)
-                store.update_failure_cluster(cluster)
-    
-    flake_scores = {}
-    env_key_fields = config.get_env_key_fields()
-    
-    for tr in current_run.test_results:
-        env_key = current_run.metadata.env_key(env_key_fields)
-        key = f"{tr.test_id}::{env_key}"
-        if key not in flake_scores:
-            flake_scores[key] = compute_flake_scores(
-                tr.test_id,
-                env_key,
-                history_runs + [current_run],
-                config,
-            )
-    
+        if tr.fingerprint and tr.fingerprint not in known_clusters:
+            new_clusters.append({
+                "fingerprint": tr.fingerprint,
+                "test_id": tr.test_id,
+                "failure_text": tr.failure_text[:500] if tr.failure_text else "",
+            })
+    return new_clusters
+
+
+def _classify_failures(
+    current_failures: List[TestCaseResult],
+    failure_hints: List[Tuple[List[str], List[Dict[str, Any]]]],
+    known_clusters: Dict[str, Any],
+    flake_scores: Dict[Tuple[str, str], Any],
+    env_key: str,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     known_flaky = []
     infra_failures = []
     
-    for tr in current_failures:
+    for tr, (hints, log_lines) in zip(current_failures, failure_hints):
         if tr.fingerprint and tr.fingerprint in known_clusters:
-            cluster = known_clusters[tr.fingerprint]
-            key = f"{tr.test_id}::{current_run.metadata.env_key(env_key_fields)}"
-            flake_score = flake_scores.get(key)
+            flake_score = flake_scores.get((tr.test_id, env_key))
             
             if flake_score and flake_score.flake_score >= 0.5:
                 known_flaky.append({
@@ -99,27 +257,60 @@ def analyze_run(
                     "evidence": flake_score.evidence,
                 })
         
-        hints = detect_infra_hints(tr.failure_text)
         if hints:
-            infra_failures.append({
+            infra_failure = {
                 "test_id": tr.test_id,
                 "fingerprint": tr.fingerprint,
                 "hints": hints,
-            })
+            }
+            if log_lines:
+                infra_failure["log_events"] = log_lines
+            infra_failures.append(infra_failure)
     
-    decision_record = apply_policy(
-        current_run=current_run,
-        new_clusters=new_clusters,
-        known_flaky=known_flaky,
-        infra_failures=infra_failures,
-        config=config,
-    )
-    
-    output_path = Path(output_dir)
+    return known_flaky, infra_failures
+
+
+def write_outputs(decision_record: DecisionRecord, output_path: Path):
     output_path.mkdir(parents=True, exist_ok=True)
-    
     write_decision_record(decision_record, output_path / "decision.json")
     write_summary(decision_record, output_path / "summary.md")
-    
-    return decision_record.to_dict()
 
+
+def _ingest_results(
+    test_results: Iterable[TestCaseResult],
+    retained: List[TestCaseResult],
+    fingerprint_cache: FingerprintCache,
+    clusterer: Optional[SimilarityClusterer] = None,
+) -> Iterator[tuple]:
+    for tr in test_results:
+        if tr.failure_text and not tr.fingerprint:
+            tr.fingerprint = fingerprint_cache.fingerprint(tr.failure_text)
+        
+        if clusterer is not None and tr.outcome == "fail" and tr.fingerprint:
+            tr.fingerprint = clusterer.assign(tr.fingerprint, tr.failure_text)
+        
+        yield result_row(tr)
+        
+        tr.system_out = None
+        tr.system_err = None
+        if tr.outcome != "fail":
+            tr.failure_text = None
+        retained.append(tr)
+
+
+def _infra_hints(
+    failure_hints: List[str],
+    log_index: LogEventIndex,
+    tr: TestCaseResult,
+    slack: float,
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    if not len(log_index):
+        return failure_hints, []
+    
+    log_hints, log_lines = log_index.hints_for_test(tr, slack)
+    if not log_hints:
+        return failure_hints, []
+    
+    profiling.count("analyze.log_correlated_failures")
+    combined = set(failure_hints) | set(log_hints)
+    return [category for category in INFRA_HINT_CATEGORIES if category in combined], log_lines
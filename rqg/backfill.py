@@ -0,0 +1,207 @@
+import time
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Callable, Iterable, Iterator, Tuple
+from rqg.models import RunMetadata
+from rqg.bundle import BundleReader, resolve_bundle_paths
+from rqg.config import load_config
+from rqg.storage import SQLiteStore
+from rqg.storage.sqlite_store import result_row
+from rqg.fingerprint.cache import FingerprintCache
+from rqg.fingerprint.similarity import SimilarityClusterer
+
+
+DEFAULT_BATCH_SIZE = 100
+PROGRESS_INTERVAL_SECONDS = 2.0
+
+_fingerprint_cache = FingerprintCache()
+
+
+@dataclass
+class BackfillProgress:
+    bundles_total: int
+    bundles_done: int = 0
+    runs: int = 0
+    results: int = 0
+    failures: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def runs_per_second(self) -> float:
+        return self.runs / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def results_per_second(self) -> float:
+        return self.results / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            "bundles_total": self.bundles_total,
+            "bundles_done": self.bundles_done,
+            "runs": self.runs,
+            "results": self.results,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "runs_per_second": round(self.runs_per_second, 2),
+            "results_per_second": round(self.results_per_second, 1),
+        }
+
+
+def order_bundles(paths: Iterable[Path]) -> Tuple[List[Path], List[str]]:
+    headers = []
+    warnings = []
+    for path in paths:
+        try:
+            reader = BundleReader(path)
+        except Exception as e:
+            warnings.append(f"Warning: Failed to read bundle {path}: {e}")
+            continue
+        started_at = reader.metadata.started_at or datetime.min
+        headers.append((started_at, str(path), path))
+    
+    headers.sort(key=lambda header: header[:2])
+    return [path for _, _, path in headers], warnings
+
+
+def _load_bundle(path: Path) -> Tuple[Path, Optional[str], Optional[RunMetadata], List[tuple], List[dict], Optional[str]]:
+    try:
+        reader = BundleReader(path)
+        rows = []
+        for tr in reader.iter_results():
+            if tr.failure_text and not tr.fingerprint:
+                tr.fingerprint = _fingerprint_cache.fingerprint(tr.failure_text)
+            rows.append(result_row(tr))
+    except Exception as e:
+        return path, None, None, [], [], f"Warning: Failed to load bundle {path}: {e}"
+    
+    return path, reader.run_id, reader.metadata, rows, reader.shards, None
+
+
+def _load_bundles(paths: List[Path], jobs: int) -> Iterator[tuple]:
+    if jobs <= 1 or len(paths) <= 1:
+        yield from map(_load_bundle, paths)
+        return
+    
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as executor:
+        pending = deque()
+        for path in paths:
+            pending.append(executor.submit(_load_bundle, path))
+            if len(pending) >= jobs * 4:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _assign_clusters(rows: List[tuple], clusterer: SimilarityClusterer) -> List[tuple]:
+    return [
+        row[:7] + (clusterer.assign(row[7], row[6]),) + row[8:]
+        if row[5] == "fail" and row[7] else row
+        for row in rows
+    ]
+
+
+def backfill_bundles(
+    sources: Iterable[str],
+    config_path: str = "rqg.yml",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    jobs: int = 1,
+    decisions_dir: Optional[str] = None,
+    progress: Optional[Callable[[BackfillProgress], None]] = None,
+) -> BackfillProgress:
+    paths, warnings = order_bundles(resolve_bundle_paths(sources))
+    for warning in warnings:
+        print(warning)
+    
+    stats = BackfillProgress(bundles_total=len(paths), skipped=len(warnings))
+    started = time.perf_counter()
+    last_report = started
+
+    def report(force: bool = False):
+        nonlocal last_report
+        now = time.perf_counter()
+        stats.elapsed = now - started
+        if progress is not None and (force or now - last_report >= PROGRESS_INTERVAL_SECONDS):
+            last_report = now
+            progress(stats)
+    
+    if decisions_dir is not None:
+        from rqg.analyze import analyze_run
+        
+        for path in paths:
+            stats.bundles_done += 1
+            try:
+                decision = analyze_run(
+                    config_path=config_path,
+                    bundle_path=str(path),
+                    output_dir=str(Path(decisions_dir) / BundleReader(path).run_id),
+                )
+            except Exception as e:
+                print(f"Warning: Failed to analyze bundle {path}: {e}")
+                stats.skipped += 1
+                continue
+            
+            stats.runs += 1
+            stats.results += decision["current_run_summary"].get("total_tests", 0)
+            stats.failures += decision["current_run_summary"].get("failed", 0)
+            report()
+        report(force=True)
+        return stats
+    
+    config = load_config(config_path)
+    env_key_fields = config.get_env_key_fields()
+    use_test_stats = config.get_flake_source() == "stats"
+    
+    with SQLiteStore(
+        stats_window=config.get_lookback_runs(),
+        stats_days=config.get_lookback_days(),
+    ) as store, store.bulk_ingest():
+        clusterers = {}
+        loaded = _load_bundles(paths, jobs)
+        
+        while stats.bundles_done < len(paths):
+            batch = []
+            for path, run_id, metadata, rows, shards, warning in islice(loaded, batch_size):
+                stats.bundles_done += 1
+                if warning:
+                    print(warning)
+                    stats.skipped += 1
+                    continue
+                
+                if config.get_similarity_enabled():
+                    repo = metadata.repo or ""
+                    clusterer = clusterers.get(repo)
+                    if clusterer is None:
+                        clusterer = clusterers[repo] = SimilarityClusterer(
+                            store,
+                            repo=repo,
+                            threshold=config.get_similarity_threshold(),
+                            num_perm=config.get_similarity_num_perm(),
+                            bands=config.get_similarity_bands(),
+                        )
+                    rows = _assign_clusters(rows, clusterer)
+                batch.append((run_id, metadata, rows, shards))
+            
+            with store.transaction():
+                for run_id, metadata, rows, shards in batch:
+                    store.save_run_rows(
+                        run_id,
+                        metadata,
+                        rows,
+                        env_key=metadata.env_key(env_key_fields) if use_test_stats else None,
+                    )
+                    if shards:
+                        store.save_run_shards(run_id, shards)
+                    
+                    stats.runs += 1
+                    stats.results += len(rows)
+                    stats.failures += sum(1 for row in rows if row[5] == "fail")
+                    report()
+    
+    report(force=True)
+    return stats
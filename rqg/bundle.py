@@ -0,0 +1,173 @@
+import json
+from glob import glob
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Iterator
+from rqg.models import Run, RunMetadata, TestCaseResult
+
+
+BUNDLE_FORMAT_VERSION = 2
+
+BUNDLE_HEADER_KEY = "rqg_bundle"
+
+BUNDLE_PATTERNS = ("*.jsonl", "bundle*.json")
+
+
+def encode_line(data: Dict[str, Any]) -> str:
+    return json.dumps(data, separators=(",", ":"))
+
+
+class BundleWriter:
+    def __init__(
+        self,
+        path: Path,
+        run_id: str,
+        metadata: RunMetadata,
+        log_events: Optional[List[Dict[str, Any]]] = None,
+        shards: Optional[List[Dict[str, Any]]] = None,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.result_count = 0
+        self._file = open(self.path, "w", encoding="utf-8")
+        header = {
+            BUNDLE_HEADER_KEY: BUNDLE_FORMAT_VERSION,
+            "run_id": run_id,
+            "metadata": metadata.to_dict(),
+            "log_events": log_events or [],
+        }
+        if shards:
+            header["shards"] = shards
+        self._write_line(header)
+
+    def _write_line(self, data: Dict[str, Any]):
+        self._file.write(encode_line(data))
+        self._file.write("\n")
+
+    def write(self, tr: TestCaseResult):
+        self.write_dict(tr.to_dict())
+
+    def write_dict(self, data: Dict[str, Any]):
+        self._write_line(data)
+        self.result_count += 1
+
+    def write_raw(self, line: str):
+        self._file.write(line)
+        self._file.write("\n")
+        self.result_count += 1
+
+    def write_all(self, test_results: Iterable[TestCaseResult]):
+        for tr in test_results:
+            self.write(tr)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "BundleWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class BundleReader:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._legacy_results = None
+        
+        with open(self.path, "r", encoding="utf-8") as f:
+            header = _parse_header(f.readline())
+            
+            if header is None:
+                f.seek(0)
+                header = json.load(f)
+                self._legacy_results = header.get("test_results", [])
+            elif header[BUNDLE_HEADER_KEY] > BUNDLE_FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported bundle format version {header[BUNDLE_HEADER_KEY]} in {self.path}"
+                )
+        
+        self.run_id = header["run_id"]
+        self.metadata = RunMetadata.from_dict(header["metadata"])
+        self.log_events = header.get("log_events", [])
+        self.shards = header.get("shards", [])
+
+    @property
+    def is_legacy(self) -> bool:
+        return self._legacy_results is not None
+
+    def iter_results(self) -> Iterator[TestCaseResult]:
+        for d in self.iter_result_dicts():
+            yield TestCaseResult.from_dict(d)
+
+    def iter_result_dicts(self) -> Iterator[Dict[str, Any]]:
+        if self._legacy_results is not None:
+            yield from self._legacy_results
+            return
+        
+        for line in self.iter_result_lines():
+            yield json.loads(line)
+
+    def iter_result_lines(self) -> Iterator[str]:
+        if self._legacy_results is not None:
+            for d in self._legacy_results:
+                yield json.dumps(d, separators=(",", ":"))
+            return
+        
+        with open(self.path, "r", encoding="utf-8") as f:
+            f.readline()
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+
+    def to_run(self) -> Run:
+        return Run(
+            run_id=self.run_id,
+            metadata=self.metadata,
+            test_results=list(self.iter_results()),
+            log_events=self.log_events,
+        )
+
+
+def _parse_header(line: str) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None
+    
+    if isinstance(data, dict) and BUNDLE_HEADER_KEY in data:
+        return data
+    return None
+
+
+def write_bundle(path: Path, run: Run) -> str:
+    with BundleWriter(path, run.run_id, run.metadata, run.log_events) as writer:
+        writer.write_all(run.test_results)
+    return str(writer.path)
+
+
+def read_bundle(path: Path) -> Run:
+    return BundleReader(path).to_run()
+
+
+def find_bundles(directory: Path) -> List[Path]:
+    directory = Path(directory)
+    return sorted({
+        path
+        for pattern in BUNDLE_PATTERNS
+        for path in directory.rglob(pattern)
+        if path.is_file()
+    })
+
+
+def resolve_bundle_paths(sources: Iterable[str]) -> List[Path]:
+    paths = []
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            paths.extend(find_bundles(path))
+        elif path.is_file():
+            paths.append(path)
+        else:
+            paths.extend(Path(match) for match in sorted(glob(source, recursive=True)) if Path(match).is_file())
+    return list(dict.fromkeys(paths))
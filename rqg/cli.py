@@ -1,17 +1,19 @@
 import sys
 import click
 from pathlib import Path
-from rqg.collect import collect_artifacts
-from rqg.analyze import analyze_run
-from rqg.explain import explain_test
-from rqg.upload import upload_bundle
 
 
 @click.group()
 @click.version_option(version="0.1.0")
-def main():
+@click.option("--profile", type=click.Path(dir_okay=False), help="Write cProfile stats for the whole command to this file")
+@click.option("--trace", type=click.Path(dir_okay=False), help="Write stage timings as a Chrome trace-event JSON file")
+@click.pass_context
+def main(ctx, profile, trace):
     """Release Quality Gate - CI test analysis and gating system"""
-    pass
+    if profile or trace:
+        from rqg.profiling import command_profile
+        
+        ctx.with_resource(command_profile(profile_path=profile, trace_path=trace))
 
 
 @main.command()
@@ -23,8 +25,11 @@ def main():
 @click.option("--workflow", help="CI workflow/job name")
 @click.option("--build-number", help="CI build number")
 @click.option("--attempt", type=int, help="Retry attempt number")
-def collect(config, output, repo, branch, commit, workflow, build_number, attempt):
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=1, help="Parallel worker processes for parsing")
+def collect(config, output, repo, branch, commit, workflow, build_number, attempt, jobs):
     """Collect artifacts from workspace and create bundle"""
+    from rqg.collect import collect_artifacts
+    
     try:
         bundle_path = collect_artifacts(
             config_path=config,
@@ -35,6 +40,7 @@ def collect(config, output, repo, branch, commit, workflow, build_number, attemp
             workflow=workflow,
             build_number=build_number,
             attempt=attempt,
+            jobs=jobs,
         )
         click.echo(f"Bundle created: {bundle_path}")
     except Exception as e:
@@ -42,35 +48,161 @@ def collect(config, output, repo, branch, commit, workflow, build_number, attemp
         sys.exit(1)
 
 
+@main.command()
+@click.argument("sources", nargs=-1, required=True)
+@click.option("--output", "-o", default="rqg/bundle.jsonl", help="Merged bundle path")
+def merge(sources, output):
+    """Merge shard bundles of one build into a single logical run"""
+    from rqg.merge import merge_bundles
+    
+    try:
+        result = merge_bundles(sources, output_path=output)
+        click.echo(
+            f"Merged {len(result.shards)} shards into {result.path} "
+            f"({result.results} results, {result.duplicates} duplicates dropped)"
+        )
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+
 @main.command()
 @click.option("--config", "-c", default="rqg.yml", help="Config file path")
 @click.option("--bundle", "-b", default="rqg/bundle.jsonl", help="Bundle file path")
 @click.option("--output-dir", "-o", default="rqg", help="Output directory for decision files")
-def analyze(config, bundle, output_dir):
+@click.option("--server", envvar="RQG_SERVER", help="Submit the bundle to a running 'rqg serve' (http://host:port or unix:///path/to/socket)")
+def analyze(config, bundle, output_dir, server):
     """Analyze current run with history and produce decision"""
     try:
-        decision = analyze_run(
+        decision = None
+        if server:
+            from rqg.client import analyze_remote, ServerUnavailable
+            
+            try:
+                decision = analyze_remote(server, config_path=config, bundle_path=bundle, output_dir=output_dir)
+            except ServerUnavailable as e:
+                click.echo(f"Warning: {e}; analyzing locally", err=True)
+        
+        if decision is None:
+            from rqg.analyze import analyze_run
+            
+            decision = analyze_run(
+                config_path=config,
+                bundle_path=bundle,
+                output_dir=output_dir,
+            )
+        exit_code = {
+            "PASS": 0,
+            "SOFT_BLOCK": 10,
+            "HARD_BLOCK": 20,
+        }.get(decision.get("decision"), 1)
+        sys.exit(exit_code)
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+
+@main.command()
+@click.argument("sources", nargs=-1, required=True)
+@click.option("--config", "-c", default="rqg.yml", help="Config file path")
+@click.option("--output-dir", "-o", default="rqg", help="Output directory for per-cell and aggregate decisions")
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=1, help="Parallel worker processes for flake scoring")
+def matrix(sources, config, output_dir, jobs):
+    """Analyze one commit's bundles across its env_key matrix cells"""
+    from rqg.matrix import analyze_matrix
+    
+    try:
+        aggregate = analyze_matrix(
+            sources,
             config_path=config,
-            bundle_path=bundle,
             output_dir=output_dir,
+            jobs=jobs,
         )
+        for cell in aggregate["cells"]:
+            click.echo(f"{cell['env_key']}: {cell['decision']}")
         exit_code = {
             "PASS": 0,
             "SOFT_BLOCK": 10,
             "HARD_BLOCK": 20,
-        }.get(decision.get("decision"), 1)
+        }.get(aggregate.get("decision"), 1)
         sys.exit(exit_code)
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         sys.exit(1)
 
 
+@main.command()
+@click.argument("sources", nargs=-1, required=True)
+@click.option("--config", "-c", default="rqg.yml", help="Config file path")
+@click.option("--batch-size", type=click.IntRange(min=1), default=100, help="Runs written per transaction")
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=1, help="Parallel worker processes for loading bundles")
+@click.option("--decisions-dir", help="Also run the full analysis and write per-run decisions here (slow)")
+def backfill(sources, config, batch_size, jobs, decisions_dir):
+    """Bulk-load archived bundles (directories or globs) into history"""
+    from rqg.backfill import backfill_bundles
+    
+    def progress(stats):
+        click.echo(
+            f"[{stats.bundles_done}/{stats.bundles_total}] {stats.runs} runs, {stats.results} results "
+            f"({stats.runs_per_second:.1f} runs/s, {stats.results_per_second:,.0f} results/s)",
+            err=True,
+        )
+    
+    try:
+        stats = backfill_bundles(
+            sources,
+            config_path=config,
+            batch_size=batch_size,
+            jobs=jobs,
+            decisions_dir=decisions_dir,
+            progress=progress,
+        )
+        click.echo(
+            f"Backfilled {stats.runs} runs ({stats.results} results, {stats.skipped} skipped) "
+            f"in {stats.elapsed:.1f}s"
+        )
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+
+main.add_command(backfill, name="ingest")
+
+
+@main.command()
+@click.option("--config", "-c", default="rqg.yml", help="Config file path")
+@click.option("--host", default="127.0.0.1", help="Address to listen on")
+@click.option("--port", type=click.IntRange(min=0, max=65535), default=8765, help="TCP port to listen on")
+@click.option("--socket", "socket_path", type=click.Path(dir_okay=False), help="Listen on a Unix socket instead of TCP")
+def serve(config, host, port, socket_path):
+    """Run a local daemon that keeps history warm for 'rqg analyze --server'"""
+    from rqg.server import WarmIndex, create_server
+    
+    try:
+        index = WarmIndex(config_path=config)
+        server = create_server(index, host=host, port=port, socket_path=socket_path)
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    
+    click.echo(f"rqg serve listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        index.close()
+
+
 @main.command()
 @click.argument("test_id")
 @click.option("--config", "-c", default="rqg.yml", help="Config file path")
 @click.option("--history-dir", default=".rqg", help="History database directory")
 def explain(test_id, config, history_dir):
     """Explain a test or failure cluster with evidence"""
+    from rqg.explain import explain_test
+    
     try:
         explain_test(test_id, config_path=config, history_dir=history_dir)
     except Exception as e:
@@ -79,14 +211,35 @@ def explain(test_id, config, history_dir):
 
 
 @main.command()
-@click.option("--bundle", "-b", default="rqg/bundle.jsonl", help="Bundle file path")
+@click.option("--bundle", "-b", default="rqg/bundle.jsonl", help="Bundle file or directory of bundles")
 @click.option("--api-url", help="RQG API URL")
 @click.option("--token", help="API token")
-def upload(bundle, api_url, token):
+@click.option("--chunk-size", type=click.IntRange(min=1), default=8, help="Chunk size in MiB for resumable uploads")
+@click.option("--workers", "-w", type=click.IntRange(min=1), default=4, help="Concurrent chunk and bundle uploads")
+@click.option("--retries", type=click.IntRange(min=0), default=5, help="Retries per request with exponential backoff")
+@click.option("--timeout", type=float, default=120.0, help="Read timeout per request in seconds")
+def upload(bundle, api_url, token, chunk_size, workers, retries, timeout):
     """Upload bundle to central RQG service"""
+    from rqg.upload import upload_bundle, upload_bundles
+    
+    options = {
+        "chunk_size": chunk_size * 1024 * 1024,
+        "retries": retries,
+        "timeout": (10.0, timeout),
+    }
+    
     try:
-        upload_bundle(bundle_path=bundle, api_url=api_url, token=token)
-        click.echo("Bundle uploaded successfully")
+        if Path(bundle).is_dir():
+            results = upload_bundles(bundle, api_url=api_url, token=token, parallel=workers, **options)
+            failed = [(path, error) for path, _, error in results if error]
+            for path, error in failed:
+                click.echo(f"Error: {path}: {error}", err=True)
+            click.echo(f"Uploaded {len(results) - len(failed)}/{len(results)} bundles")
+            if failed:
+                sys.exit(1)
+        else:
+            upload_bundle(bundle_path=bundle, api_url=api_url, token=token, max_workers=workers, **options)
+            click.echo("Bundle uploaded successfully")
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         sys.exit(1)
@@ -0,0 +1,77 @@
+import json
+import socket
+from http.client import HTTPConnection
+from pathlib import Path
+from typing import Optional, Dict, Any
+from urllib.parse import urlsplit
+
+
+DEFAULT_TIMEOUT = 300.0
+
+
+class ServerUnavailable(Exception):
+    pass
+
+
+class UnixHTTPConnection(HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float = DEFAULT_TIMEOUT):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+def _connection(server: str, timeout: float) -> HTTPConnection:
+    if server.startswith("unix:"):
+        return UnixHTTPConnection(urlsplit(server).path, timeout)
+    
+    parts = urlsplit(server if "://" in server else f"http://{server}")
+    return HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+
+
+def request_server(
+    server: str,
+    method: str,
+    path: str,
+    payload: Optional[Dict[str, Any]] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Dict[str, Any]:
+    connection = _connection(server, timeout)
+    try:
+        try:
+            connection.connect()
+        except OSError as e:
+            raise ServerUnavailable(f"rqg serve is not reachable at {server}: {e}") from e
+        
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        data = json.loads(response.read() or b"{}")
+    finally:
+        connection.close()
+    
+    if response.status != 200:
+        raise RuntimeError(data.get("error") or f"rqg serve returned HTTP {response.status}")
+    return data
+
+
+def analyze_remote(
+    server: str,
+    config_path: str = "rqg.yml",
+    bundle_path: str = "rqg/bundle.jsonl",
+    output_dir: str = "rqg",
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Dict[str, Any]:
+    return request_server(server, "POST", "/analyze", {
+        "config": str(Path(config_path).resolve()),
+        "bundle": str(Path(bundle_path).resolve()),
+        "output_dir": str(Path(output_dir).resolve()),
+    }, timeout=timeout)["decision"]
@@ -1,14 +1,22 @@
 import os
-import json
 import uuid
+import tempfile
+from collections import deque
 from pathlib import Path
 from datetime import datetime
 from glob import glob
-from typing import Optional
-from rqg.models import Run, RunMetadata, TestCaseResult
-from rqg.parsers import parse_junit_xml
-from rqg.fingerprint import compute_fingerprint, detect_infra_hints
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, List, Dict, Any, Callable
+from rqg.models import RunMetadata, TestCaseResult
+from rqg.bundle import BundleWriter, encode_line
+from rqg.parsers import iter_junit_xml
+from rqg.fingerprint.cache import FingerprintCache
 from rqg.config import load_config
+from rqg.logs import scan_logs
+from rqg import profiling
+
+
+_fingerprint_cache = FingerprintCache()
 
 
 def collect_artifacts(
@@ -20,6 +28,7 @@ def collect_artifacts(
     workflow: Optional[str] = None,
     build_number: Optional[str] = None,
     attempt: Optional[int] = None,
+    jobs: int = 1,
 ) -> str:
     config = load_config(config_path)
     
@@ -34,38 +43,76 @@ def collect_artifacts(
         attempt=attempt,
     )
     
-    test_results = []
-    
-    for junit_glob in config.get_junit_globs():
-        for xml_path in glob(junit_glob, recursive=True):
-            path = Path(xml_path)
-            if path.exists():
-                try:
-                    results = parse_junit_xml(path, config)
-                    test_results.extend(results)
-                except Exception as e:
-                    print(f"Warning: Failed to parse {xml_path}: {e}")
+    with profiling.stage("collect.discover"):
+        xml_paths = [
+            xml_path
+            for junit_glob in config.get_junit_globs()
+            for xml_path in glob(junit_glob, recursive=True)
+            if Path(xml_path).exists()
+        ]
+    profiling.count("collect.junit_files", len(xml_paths))
     
-    log_text = _collect_logs(config)
+    with profiling.stage("collect.logs"):
+        log_events = _collect_logs(config)
     
-    for tr in test_results:
-        if tr.failure_text:
-            tr.fingerprint = compute_fingerprint(tr.failure_text)
-    
-    run = Run(
-        run_id=run_id,
-        metadata=metadata,
-        test_results=test_results,
-        log_events=[],
-    )
+    with profiling.stage("collect.parse_and_write"):
+        with BundleWriter(Path(output_path), run_id, metadata, log_events=log_events) as writer:
+            if jobs <= 1 or len(xml_paths) <= 1:
+                for xml_path in xml_paths:
+                    _print_warning(_parse_artifact(xml_path, config, writer.write))
+            else:
+                _parse_artifacts_parallel(xml_paths, config, jobs, writer)
+            profiling.count("collect.test_results", writer.result_count)
     
-    output_file = Path(output_path)
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(run.to_dict(), f, indent=2)
+    return str(writer.path)
+
+
+def _parse_artifacts_parallel(xml_paths: List[str], config, jobs: int, writer: BundleWriter):
+    workers = min(jobs, len(xml_paths))
     
-    return str(output_file)
+    with tempfile.TemporaryDirectory(prefix="rqg-collect-", dir=writer.path.parent) as spool_dir:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for index, xml_path in enumerate(xml_paths):
+                spool_path = os.path.join(spool_dir, f"{index}.jsonl")
+                pending.append((spool_path, executor.submit(_spool_artifact, xml_path, config, spool_path)))
+                if len(pending) >= workers * 4:
+                    _copy_spool(*pending.popleft(), writer)
+            while pending:
+                _copy_spool(*pending.popleft(), writer)
+
+
+def _copy_spool(spool_path: str, future: Future, writer: BundleWriter):
+    _print_warning(future.result())
+    with open(spool_path, "r", encoding="utf-8") as f:
+        for line in f:
+            writer.write_raw(line.rstrip("\n"))
+    os.remove(spool_path)
+
+
+def _spool_artifact(xml_path: str, config, spool_path: str) -> Optional[str]:
+    with open(spool_path, "w", encoding="utf-8") as f:
+        return _parse_artifact(xml_path, config, lambda tr: f.write(encode_line(tr.to_dict()) + "\n"))
+
+
+def _parse_artifact(xml_path: str, config, write: Callable[[TestCaseResult], Any]) -> Optional[str]:
+    results = iter_junit_xml(Path(xml_path), config)
+    while True:
+        try:
+            tr = next(results, None)
+        except Exception as e:
+            return f"Warning: Failed to parse {xml_path}: {e}"
+        if tr is None:
+            return None
+        
+        if tr.failure_text:
+            tr.fingerprint = _fingerprint_cache.fingerprint(tr.failure_text)
+        write(tr)
+
+
+def _print_warning(warning: Optional[str]):
+    if warning:
+        print(warning)
 
 
 def _collect_metadata(
@@ -110,18 +157,19 @@ def _collect_metadata(
     )
 
 
-def _collect_logs(config) -> Optional[str]:
-    log_texts = []
-    
-    for log_glob in config.get_log_globs():
-        for log_path in glob(log_glob, recursive=True):
-            path = Path(log_path)
-            if path.exists():
-                try:
-                    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                        log_texts.append(f.read())
-                except Exception as e:
-                    print(f"Warning: Failed to read log {log_path}: {e}")
+def _collect_logs(config) -> List[Dict[str, Any]]:
+    log_paths = list(dict.fromkeys(
+        log_path
+        for log_glob in config.get_log_globs()
+        for log_path in glob(log_glob, recursive=True)
+        if Path(log_path).is_file()
+    ))
+    profiling.count("collect.log_files", len(log_paths))
     
-    return "\n".join(log_texts) if log_texts else None
-
+    log_events = scan_logs(
+        log_paths,
+        max_events=config.get_max_log_events(),
+        use_mmap=config.get_log_mmap(),
+    )
+    profiling.count("collect.log_events", len(log_events))
+    return log_events
@@ -1,6 +1,6 @@
 from pathlib import Path
 import yaml
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, field
 
 
@@ -14,6 +14,7 @@ class PolicyConfig:
     gating: Dict[str, Any]
     flake_detection: Dict[str, Any]
     recommendations: Dict[str, Any]
+    fingerprint: Dict[str, Any] = field(default_factory=dict)
 
     @classmethod
     def from_dict(cls, d: Dict[str, Any]) -> "PolicyConfig":
@@ -26,6 +27,7 @@ class PolicyConfig:
             gating=d.get("gating", {}),
             recommendations=d.get("recommendations", {}),
             flake_detection=d.get("flake_detection", {}),
+            fingerprint=d.get("fingerprint", {}),
         )
 
     def get_junit_globs(self) -> List[str]:
@@ -34,6 +36,18 @@ class PolicyConfig:
     def get_log_globs(self) -> List[str]:
         return self.inputs.get("log_globs", ["**/ci.log", "**/console.log"])
 
+    def get_max_log_events(self) -> int:
+        return self.inputs.get("max_log_events", 200)
+
+    def get_log_mmap(self) -> bool:
+        return self.inputs.get("log_mmap", False)
+
+    def get_log_correlation_slack(self) -> float:
+        return self.inputs.get("log_correlation_slack_seconds", 2.0)
+
+    def get_junit_timezone(self) -> Optional[str]:
+        return self.inputs.get("junit_timezone")
+
     def get_test_id_strategy(self) -> str:
         return self.identity.get("test_id_strategy", "classname::name")
 
@@ -46,6 +60,30 @@ class PolicyConfig:
     def get_lookback_days(self) -> int:
         return self.history.get("lookback_days", 14)
 
+    def get_flake_backend(self) -> str:
+        return self.flake_detection.get("backend", "auto")
+
+    def get_flake_source(self) -> str:
+        return self.flake_detection.get("source", "history")
+
+    def get_fingerprint_cache_size(self) -> int:
+        return self.fingerprint.get("cache", {}).get("max_entries", 4096)
+
+    def get_fingerprint_cache_persist(self) -> bool:
+        return self.fingerprint.get("cache", {}).get("persist", False)
+
+    def get_similarity_enabled(self) -> bool:
+        return self.fingerprint.get("similarity", {}).get("enabled", False)
+
+    def get_similarity_threshold(self) -> float:
+        return self.fingerprint.get("similarity", {}).get("threshold", 0.8)
+
+    def get_similarity_num_perm(self) -> int:
+        return self.fingerprint.get("similarity", {}).get("num_perm", 64)
+
+    def get_similarity_bands(self) -> int:
+        return self.fingerprint.get("similarity", {}).get("bands", 16)
+
 
 def load_config(config_path: str = "rqg.yml") -> PolicyConfig:
     path = Path(config_path)
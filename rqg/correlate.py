@@ -0,0 +1,84 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+from rqg.models import TestCaseResult
+from rqg.logs import INFRA_HINT_CATEGORIES
+from rqg.timeutil import parse_timestamp
+
+
+DEFAULT_WINDOW_SLACK_SECONDS = 2.0
+
+MESSAGE_TOKEN_PATTERN = re.compile(r"[\w.:/\[\]-]+")
+TOKEN_PART_PATTERN = re.compile(r"[.:/]+")
+
+
+def _message_tokens(message: str) -> Iterable[str]:
+    for token in MESSAGE_TOKEN_PATTERN.findall(message):
+        yield token
+        for part in TOKEN_PART_PATTERN.split(token):
+            if part:
+                yield part
+
+
+class LogEventIndex:
+    __slots__ = ("_events", "_times", "_timed", "_mentions")
+
+    def __init__(self, log_events: Iterable[Dict[str, Any]]):
+        timed = {True: [], False: []}
+        self._mentions: Dict[str, List[int]] = {}
+        events = [event for event in log_events if event.get("type") == "infra_hint"]
+        
+        for position, event in enumerate(events):
+            parsed = parse_timestamp(event.get("timestamp"))
+            if parsed is not None:
+                epoch, aware = parsed
+                timed[aware].append((epoch, position))
+            for token in set(_message_tokens(event.get("message", ""))):
+                self._mentions.setdefault(token, []).append(position)
+        
+        self._times: Dict[bool, List[float]] = {}
+        self._timed: Dict[bool, List[int]] = {}
+        for aware, entries in timed.items():
+            entries.sort()
+            self._times[aware] = [epoch for epoch, _ in entries]
+            self._timed[aware] = [position for _, position in entries]
+        self._events = events
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def in_window(self, start: float, end: float, aware: bool = True) -> List[int]:
+        times = self._times[aware]
+        lo = bisect_left(times, start)
+        hi = bisect_right(times, end)
+        return self._timed[aware][lo:hi]
+
+    def mentioning(self, *keys: Optional[str]) -> List[int]:
+        positions = []
+        for key in keys:
+            if key:
+                positions.extend(self._mentions.get(key, ()))
+        return positions
+
+    def events_for_test(self, tr: TestCaseResult, slack: float = DEFAULT_WINDOW_SLACK_SECONDS) -> List[Dict[str, Any]]:
+        positions = set(self.mentioning(tr.test_id, tr.name))
+        
+        parsed = parse_timestamp(tr.started_at)
+        if parsed is not None:
+            start, aware = parsed
+            end = start + (tr.duration_ms or 0) / 1000
+            positions.update(self.in_window(start - slack, end + slack, aware))
+        
+        return [self._events[position] for position in sorted(positions)]
+
+    def hints_for_test(
+        self,
+        tr: TestCaseResult,
+        slack: float = DEFAULT_WINDOW_SLACK_SECONDS,
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        events = self.events_for_test(tr, slack)
+        hints = {hint for event in events for hint in event["hints"]}
+        return (
+            [category for category in INFRA_HINT_CATEGORIES if category in hints],
+            [{"source": event["source"], "line": event["line"]} for event in events],
+        )
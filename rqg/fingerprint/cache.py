@@ -0,0 +1,98 @@
+import json
+import hashlib
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any
+from rqg.fingerprint.sanitizer import compute_fingerprint, detect_infra_hints
+from rqg import profiling
+
+
+DEFAULT_CACHE_SIZE = 4096
+
+_MISSING = object()
+
+
+def text_key(kind: str, text: str) -> str:
+    digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+    return f"{kind}:{digest}"
+
+
+class FingerprintCache:
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, store=None):
+        self.maxsize = maxsize
+        self.store = store
+        self.hits = 0
+        self.persisted_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._dirty: Dict[str, Any] = {}
+    
+    def fingerprint(self, failure_text: Optional[str], fingerprint_version: str = "v1") -> Optional[str]:
+        if not failure_text:
+            return None
+        return self._get(
+            text_key(f"fingerprint-{fingerprint_version}", failure_text),
+            lambda: compute_fingerprint(failure_text, fingerprint_version),
+            "fingerprint.compute_fingerprint",
+        )
+    
+    def infra_hints(self, failure_text: Optional[str]) -> List[str]:
+        if not failure_text:
+            return detect_infra_hints(failure_text)
+        return list(self._get(
+            text_key("infra", failure_text),
+            lambda: detect_infra_hints(failure_text),
+            "fingerprint.detect_infra_hints",
+        ))
+    
+    def _get(self, key: str, compute, stage_name: str):
+        value = self._entries.get(key, _MISSING)
+        if value is not _MISSING:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+        
+        value = self._dirty.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            self._remember(key, value)
+            return value
+        
+        if self.store is not None:
+            persisted = self.store.get_cached_value(key)
+            if persisted is not None:
+                value = json.loads(persisted)
+                self.persisted_hits += 1
+                self._dirty[key] = value
+        
+        if value is _MISSING:
+            with profiling.stage(stage_name):
+                value = compute()
+            self.misses += 1
+            if self.store is not None:
+                self._dirty[key] = value
+        
+        self._remember(key, value)
+        return value
+    
+    def _remember(self, key: str, value: Any):
+        self._entries[key] = value
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def flush(self):
+        if self.store is not None and self._dirty:
+            self.store.save_cached_values(
+                (key, json.dumps(value)) for key, value in self._dirty.items()
+            )
+        self._dirty = {}
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.persisted_hits + self.misses
+        return {
+            "hits": self.hits,
+            "persisted_hits": self.persisted_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.persisted_hits) / lookups if lookups else 0.0,
+            "max_entries": self.maxsize,
+            "persistent": self.store is not None,
+        }
@@ -1,6 +1,7 @@
 import re
 import hashlib
-from typing import Optional, List
+from functools import lru_cache
+from typing import Optional, List, Dict
 
 
 TIMESTAMP_PATTERNS = [
@@ -16,25 +17,48 @@ DURATION_PATTERN = r"\d+(\.\d+)?(ms|s|m|h)"
 
 MAX_STACKTRACE_DEPTH = 10
 
+SANITIZE_PASSES = tuple(
+    [(re.compile(pattern, re.IGNORECASE), "<TIMESTAMP>") for pattern in TIMESTAMP_PATTERNS]
+    + [
+        (re.compile(UUID_PATTERN, re.IGNORECASE), "<UUID>"),
+        (re.compile(HASH_PATTERN, re.IGNORECASE), "<HASH>"),
+        (re.compile(PORT_PATTERN), ":<PORT>"),
+        (re.compile(DURATION_PATTERN, re.IGNORECASE), "<DURATION>"),
+    ]
+)
+
+_VOLATILE_CHAR = r"[\d:.\-a-fA-FhHmMsStT\u017f]"
+
+_SANITIZE_SCANNER = re.compile(
+    r"(?P<space>[^\S ]\s*|\s{2,})"
+    r"|(?P<volatile>(?<!%(c)s)(?=%(c)s*\d|%(c)s{8})%(c)s+)" % {"c": _VOLATILE_CHAR}
+)
+
+EXCEPTION_TYPE_PATTERNS = [
+    re.compile(r"(\w+Error):"),
+    re.compile(r"(\w+Exception):"),
+    re.compile(r"(\w+Failure):"),
+]
+
+
+@lru_cache(maxsize=8192)
+def _normalize_volatile(token: str) -> str:
+    for pattern, replacement in SANITIZE_PASSES:
+        token = pattern.sub(replacement, token)
+    return token
+
+
+def _sanitize_match(match) -> str:
+    if match.lastgroup == "space":
+        return " "
+    return _normalize_volatile(match.group())
+
 
 def sanitize_failure_text(text: Optional[str]) -> str:
     if not text:
         return ""
     
-    normalized = text
-    
-    for pattern in TIMESTAMP_PATTERNS:
-        normalized = re.sub(pattern, "<TIMESTAMP>", normalized, flags=re.IGNORECASE)
-    
-    normalized = re.sub(UUID_PATTERN, "<UUID>", normalized, flags=re.IGNORECASE)
-    normalized = re.sub(HASH_PATTERN, "<HASH>", normalized, flags=re.IGNORECASE)
-    normalized = re.sub(PORT_PATTERN, ":<PORT>", normalized)
-    normalized = re.sub(DURATION_PATTERN, "<DURATION>", normalized, flags=re.IGNORECASE)
-    
-    normalized = re.sub(r"\s+", " ", normalized)
-    normalized = normalized.strip()
-    
-    return normalized
+    return _SANITIZE_SCANNER.sub(_sanitize_match, text).strip()
 
 
 def extract_top_frames(text: str, max_depth: int = MAX_STACKTRACE_DEPTH) -> List[str]:
@@ -55,14 +79,8 @@ def extract_top_frames(text: str, max_depth: int = MAX_STACKTRACE_DEPTH) -> List
 
 
 def extract_exception_type(text: str) -> str:
-    patterns = [
-        r"(\w+Error):",
-        r"(\w+Exception):",
-        r"(\w+Failure):",
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text)
+    for pattern in EXCEPTION_TYPE_PATTERNS:
+        match = pattern.search(text)
         if match:
             return match.group(1)
     
@@ -83,49 +101,58 @@ def compute_fingerprint(failure_text: Optional[str], fingerprint_version: str =
     return fingerprint
 
 
-def detect_infra_hints(failure_text: Optional[str], log_text: Optional[str] = None) -> List[str]:
-    hints = []
-    
-    combined = (failure_text or "") + "\n" + (log_text or "")
-    combined_lower = combined.lower()
-    
-    network_patterns = [
+INFRA_HINT_PATTERNS = {
+    "network": [
         r"econnreset",
         r"timeout",
         r"dns",
         r"connection refused",
         r"connection reset",
         r"socket hang up",
-    ]
-    
-    runner_patterns = [
+    ],
+    "runner": [
         r"disk full",
         r"oomkilled",
         r"no space left",
         r"agent disconnected",
         r"out of memory",
-    ]
-    
-    session_patterns = [
+    ],
+    "session": [
         r"session not created",
         r"webdriver disconnect",
         r"browser.*crash",
-    ]
-    
-    for pattern in network_patterns:
-        if re.search(pattern, combined_lower):
-            hints.append("network")
-            break
-    
-    for pattern in runner_patterns:
-        if re.search(pattern, combined_lower):
-            hints.append("runner")
-            break
-    
-    for pattern in session_patterns:
-        if re.search(pattern, combined_lower):
-            hints.append("session")
-            break
-    
-    return hints
+    ],
+}
+
+INFRA_HINT_ANCHORS = {
+    r"browser.*crash": "crash",
+}
 
+
+REGEX_METACHARACTERS = set(".^$*+?{}[]\\|()")
+
+
+class InfraHintMatcher:
+    def __init__(self, patterns: Dict[str, List[str]]):
+        self.categories = []
+        for category, category_patterns in patterns.items():
+            literals = tuple(p for p in category_patterns if not REGEX_METACHARACTERS & set(p))
+            regexes = tuple(re.compile(p) for p in category_patterns if p not in literals)
+            self.categories.append((category, literals, regexes))
+    
+    def match(self, text_lower: str) -> List[str]:
+        hints = []
+        for category, literals, regexes in self.categories:
+            if any(literal in text_lower for literal in literals) or any(
+                regex.search(text_lower) for regex in regexes
+            ):
+                hints.append(category)
+        return hints
+
+
+INFRA_HINT_MATCHER = InfraHintMatcher(INFRA_HINT_PATTERNS)
+
+
+def detect_infra_hints(failure_text: Optional[str], log_text: Optional[str] = None) -> List[str]:
+    combined = (failure_text or "") + "\n" + (log_text or "")
+    return INFRA_HINT_MATCHER.match(combined.lower())
@@ -0,0 +1,134 @@
+import re
+import zlib
+import hashlib
+import random
+from array import array
+from typing import Optional, List, Set, Tuple, Dict
+from rqg.fingerprint.sanitizer import sanitize_failure_text, extract_top_frames, extract_exception_type
+from rqg import profiling
+
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+SHINGLE_SIZE = 3
+PERMUTATION_SEED = 1
+
+TOKEN_PATTERN = re.compile(r"<\w+>|\w+")
+
+_permutations = {}
+
+
+def _get_permutations(num_perm: int) -> List[Tuple[int, int]]:
+    permutations = _permutations.get(num_perm)
+    if permutations is None:
+        rng = random.Random(PERMUTATION_SEED)
+        permutations = _permutations[num_perm] = [
+            (rng.randint(1, MERSENNE_PRIME - 1), rng.randint(0, MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+    return permutations
+
+
+def failure_shingles(failure_text: Optional[str]) -> Set[int]:
+    if not failure_text:
+        return set()
+    
+    tokens = TOKEN_PATTERN.findall(sanitize_failure_text(failure_text).lower())
+    features = [
+        " ".join(tokens[i:i + SHINGLE_SIZE])
+        for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))
+    ]
+    features.extend(f"frame:{sanitize_failure_text(frame)}" for frame in extract_top_frames(failure_text))
+    features.append(f"exception:{extract_exception_type(failure_text)}")
+    
+    return {zlib.crc32(feature.encode("utf-8")) for feature in features}
+
+
+def minhash_signature(shingles: Set[int], num_perm: int = 64) -> Tuple[int, ...]:
+    if not shingles:
+        return (MAX_HASH,) * num_perm
+    
+    return tuple(
+        min(((a * shingle + b) % MERSENNE_PRIME) & MAX_HASH for shingle in shingles)
+        for a, b in _get_permutations(num_perm)
+    )
+
+
+def estimate_jaccard(signature_a: Tuple[int, ...], signature_b: Tuple[int, ...]) -> float:
+    if len(signature_a) != len(signature_b) or not signature_a:
+        return 0.0
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+
+def lsh_buckets(signature: Tuple[int, ...], bands: int) -> List[int]:
+    rows = len(signature) // bands
+    buckets = []
+    for band in range(bands):
+        band_values = array("I", signature[band * rows:(band + 1) * rows])
+        digest = hashlib.blake2b(band_values.tobytes(), digest_size=8, person=band.to_bytes(2, "little")).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def pack_signature(signature: Tuple[int, ...]) -> bytes:
+    return array("I", signature).tobytes()
+
+
+def unpack_signature(data: bytes) -> Tuple[int, ...]:
+    signature = array("I")
+    signature.frombytes(data)
+    return tuple(signature)
+
+
+class SimilarityClusterer:
+    def __init__(
+        self,
+        store,
+        repo: str,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 16,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        
+        self.store = store
+        self.repo = repo or ""
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.matched = 0
+        self._assigned: Dict[str, str] = {}
+
+    def assign(self, fingerprint: str, failure_text: Optional[str]) -> str:
+        cluster_fingerprint = self._assigned.get(fingerprint)
+        if cluster_fingerprint is not None:
+            return cluster_fingerprint
+        
+        cluster_fingerprint = self.store.get_cluster_alias(self.repo, fingerprint)
+        if cluster_fingerprint is None:
+            cluster_fingerprint = self._match(fingerprint, failure_text)
+        
+        self._assigned[fingerprint] = cluster_fingerprint
+        return cluster_fingerprint
+
+    @profiling.timed("fingerprint.similarity_match")
+    def _match(self, fingerprint: str, failure_text: Optional[str]) -> str:
+        signature = minhash_signature(failure_shingles(failure_text), self.num_perm)
+        buckets = lsh_buckets(signature, self.bands)
+        
+        matches = []
+        for candidate, candidate_signature in self.store.find_cluster_candidates(self.repo, buckets):
+            similarity = estimate_jaccard(signature, candidate_signature)
+            if similarity >= self.threshold:
+                matches.append((-similarity, candidate))
+        
+        best_fingerprint = min(matches)[1] if matches else None
+        
+        if best_fingerprint is None:
+            self.store.save_cluster_signature(self.repo, fingerprint, fingerprint, signature, buckets)
+            return fingerprint
+        
+        self.matched += 1
+        self.store.save_cluster_signature(self.repo, fingerprint, best_fingerprint, signature)
+        return best_fingerprint
@@ -0,0 +1,217 @@
+import re
+import mmap
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple, Union
+from rqg.fingerprint.sanitizer import INFRA_HINT_PATTERNS, INFRA_HINT_ANCHORS, REGEX_METACHARACTERS
+from rqg import profiling
+
+
+DEFAULT_MAX_LOG_EVENTS = 200
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+MAX_MESSAGE_LENGTH = 500
+TIMESTAMP_SEARCH_BYTES = 64
+
+INFRA_HINT_CATEGORIES = tuple(INFRA_HINT_PATTERNS)
+
+LOG_HINT_PATTERN = re.compile("|".join(
+    pattern for patterns in INFRA_HINT_PATTERNS.values() for pattern in patterns
+).encode("ascii"))
+
+LOG_HINT_CATEGORY_PATTERNS = tuple(
+    (category, re.compile("|".join(patterns).encode("ascii")))
+    for category, patterns in INFRA_HINT_PATTERNS.items()
+)
+
+
+def hint_anchor(pattern: str) -> Optional[bytes]:
+    if not REGEX_METACHARACTERS & set(pattern):
+        return pattern.encode("ascii")
+    anchor = INFRA_HINT_ANCHORS.get(pattern)
+    return anchor.encode("ascii") if anchor else None
+
+
+def _hint_anchors() -> Optional[Tuple[bytes, ...]]:
+    anchors = {hint_anchor(pattern) for patterns in INFRA_HINT_PATTERNS.values() for pattern in patterns}
+    return None if None in anchors else tuple(sorted(anchors))
+
+
+LOG_HINT_ANCHORS = _hint_anchors()
+
+LOG_TIMESTAMP_PATTERN = re.compile(
+    rb"(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2}(?:[.,]\d{1,9})?)(Z|[+-]\d{2}:?\d{2})?"
+)
+
+
+def _iter_stream_windows(path: Path, chunk_size: int) -> Iterator[Tuple[bytes, int, int]]:
+    carry = b""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                if carry:
+                    yield carry, 0, len(carry)
+                return
+            
+            data = carry + block
+            cut = data.rfind(b"\n") + 1
+            if cut == 0 and len(data) < chunk_size:
+                carry = data
+                continue
+            if cut == 0:
+                cut = len(data)
+            carry = data[cut:]
+            yield data, 0, cut
+
+
+def _iter_mmap_windows(buffer: mmap.mmap, chunk_size: int) -> Iterator[Tuple[mmap.mmap, int, int]]:
+    size = len(buffer)
+    pos = 0
+    while pos < size:
+        end = min(pos + chunk_size, size)
+        if end < size:
+            newline = buffer.rfind(b"\n", pos, end)
+            if newline >= 0:
+                end = newline + 1
+        yield buffer, pos, end
+        pos = end
+
+
+def _timestamp(line: bytes) -> Optional[str]:
+    match = LOG_TIMESTAMP_PATTERN.search(line, 0, TIMESTAMP_SEARCH_BYTES)
+    if match is None:
+        return None
+    date, time, zone = match.groups()
+    return f"{date.decode()}T{time.decode().replace(',', '.')}{(zone or b'').decode()}"
+
+
+class LogScanner:
+    def __init__(
+        self,
+        max_events: int = DEFAULT_MAX_LOG_EVENTS,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        use_mmap: bool = False,
+    ):
+        self.chunk_size = chunk_size
+        self.use_mmap = use_mmap
+        self.events: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self.bytes_scanned = 0
+        share, extra = divmod(max(0, max_events), len(INFRA_HINT_CATEGORIES))
+        self._budget = {
+            category: share + (1 if index < extra else 0)
+            for index, category in enumerate(INFRA_HINT_CATEGORIES)
+        }
+
+    def scan_file(self, path: Union[str, Path]):
+        path = Path(path)
+        summary = {
+            "type": "log_file",
+            "source": str(path),
+            "bytes": 0,
+            "lines": 0,
+            "hints": {},
+            "dropped": 0,
+        }
+        self.events.append(summary)
+        
+        with open(path, "rb") as f:
+            size = f.seek(0, 2)
+            if self.use_mmap and size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    self._scan_windows(_iter_mmap_windows(buffer, self.chunk_size), summary)
+                    return summary
+        
+        self._scan_windows(_iter_stream_windows(path, self.chunk_size), summary)
+        return summary
+
+    def _scan_windows(self, windows: Iterable[Tuple[Any, int, int]], summary: Dict[str, Any]):
+        source = summary["source"]
+        hint_counts = summary["hints"]
+        
+        trailing = False
+        for buffer, start, end in windows:
+            text = buffer[start:end].lower()
+            line_number = summary["lines"] + 1
+            counted = 0
+            
+            for line_start, line_end in _candidate_lines(text):
+                hints = _line_hints(text, line_start, line_end)
+                if not hints:
+                    continue
+                
+                for hint in hints:
+                    hint_counts[hint] = hint_counts.get(hint, 0) + 1
+                line_number += text.count(b"\n", counted, line_start)
+                counted = line_start
+                
+                if any(self._budget[hint] > 0 for hint in hints):
+                    for hint in hints:
+                        self._budget[hint] -= 1
+                    line = buffer[start + line_start:start + min(line_end, line_start + MAX_MESSAGE_LENGTH)]
+                    self.events.append({
+                        "type": "infra_hint",
+                        "source": source,
+                        "line": line_number,
+                        "timestamp": _timestamp(line),
+                        "hints": hints,
+                        "message": line.decode("utf-8", "replace").strip(),
+                    })
+                else:
+                    summary["dropped"] += 1
+                    self.dropped += 1
+            
+            summary["lines"] += text.count(b"\n")
+            summary["bytes"] += end - start
+            self.bytes_scanned += end - start
+            trailing = not text.endswith(b"\n")
+        
+        if trailing:
+            summary["lines"] += 1
+
+
+def _candidate_lines(text: bytes) -> List[Tuple[int, int]]:
+    if LOG_HINT_ANCHORS is None:
+        return sorted({
+            _line_bounds(text, match.start())
+            for match in LOG_HINT_PATTERN.finditer(text)
+        })
+    
+    lines = {}
+    for anchor in LOG_HINT_ANCHORS:
+        pos = text.find(anchor)
+        while pos >= 0:
+            line_start, line_end = _line_bounds(text, pos)
+            lines[line_start] = line_end
+            pos = text.find(anchor, line_end)
+    return sorted(lines.items())
+
+
+def _line_hints(text: bytes, line_start: int, line_end: int) -> List[str]:
+    return [
+        category for category, pattern in LOG_HINT_CATEGORY_PATTERNS
+        if pattern.search(text, line_start, line_end)
+    ]
+
+
+def _line_bounds(text: bytes, pos: int) -> Tuple[int, int]:
+    line_end = text.find(b"\n", pos)
+    return text.rfind(b"\n", 0, pos) + 1, len(text) if line_end < 0 else line_end
+
+
+def scan_logs(
+    paths: Iterable[Union[str, Path]],
+    max_events: int = DEFAULT_MAX_LOG_EVENTS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    use_mmap: bool = False,
+) -> List[Dict[str, Any]]:
+    scanner = LogScanner(max_events=max_events, chunk_size=chunk_size, use_mmap=use_mmap)
+    for path in paths:
+        try:
+            scanner.scan_file(path)
+        except Exception as e:
+            print(f"Warning: Failed to read log {path}: {e}")
+    
+    profiling.count("collect.log_bytes", scanner.bytes_scanned)
+    profiling.count("collect.log_events_dropped", scanner.dropped)
+    return scanner.events
+
@@ -0,0 +1,204 @@
+import re
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Iterable, Optional, Set, Tuple
+from rqg.models import Run, TestCaseResult, FailureCluster, FlakeScore
+from rqg.bundle import BundleReader, resolve_bundle_paths
+from rqg.config import PolicyConfig, load_config
+from rqg.storage import SQLiteStore, HistoryTable
+from rqg.fingerprint.cache import FingerprintCache
+from rqg.scoring import compute_flake_scores_batch
+from rqg.analyze import AnalysisState, ingest_run, decide_run, write_outputs
+from rqg import profiling
+
+
+DECISION_SEVERITY = {"PASS": 0, "SOFT_BLOCK": 1, "HARD_BLOCK": 2}
+
+MATRIX_GROUP_FIELDS = ("repo", "branch", "commit_sha")
+
+
+@dataclass
+class MatrixCell:
+    env_key: str
+    bundle: BundleReader
+    run: Optional[Run] = None
+
+
+class MatrixState(AnalysisState):
+    def __init__(self, config: PolicyConfig, store: SQLiteStore, cells: List[MatrixCell], jobs: int = 1):
+        super().__init__(config, store)
+        self.cells = cells
+        self.jobs = jobs
+        self._clusters: Optional[List[FailureCluster]] = None
+        self._scores: Optional[Dict[str, Dict[Tuple[str, str], FlakeScore]]] = None
+
+    def failure_clusters(self, run: Run, failures: List[TestCaseResult]) -> List[FailureCluster]:
+        if self._clusters is None:
+            self._clusters = self.store.get_failure_clusters(
+                repo=run.metadata.repo,
+                fingerprints=(
+                    tr.fingerprint for cell in self.cells for tr in cell.run.test_results
+                    if tr.outcome == "fail" and tr.fingerprint
+                ),
+                lookback_days=self.config.get_lookback_days(),
+                exclude_run_ids=[cell.run.run_id for cell in self.cells],
+            )
+        return self._clusters
+
+    def flake_scores(self, run: Run, env_key: str) -> Dict[Tuple[str, str], FlakeScore]:
+        if self.use_test_stats:
+            return super().flake_scores(run, env_key)
+        
+        if self._scores is None:
+            self._scores = self._score_cells(run)
+        return self._scores[run.run_id]
+
+    def _score_cells(self, run: Run) -> Dict[str, Dict[Tuple[str, str], FlakeScore]]:
+        with profiling.stage("matrix.partition_history"):
+            partitions = self.history(run).partition(self.config.get_env_key_fields())
+        
+        with profiling.stage("matrix.flake_scoring"):
+            histories = []
+            for cell in self.cells:
+                history = partitions.pop(cell.env_key, None) or HistoryTable()
+                history.extend_run(cell.run)
+                histories.append(history)
+            keys = [{(tr.test_id, cell.env_key) for tr in cell.run.test_results} for cell in self.cells]
+            configs = [self.config] * len(self.cells)
+            
+            if self.jobs > 1 and len(self.cells) > 1:
+                with ProcessPoolExecutor(max_workers=min(self.jobs, len(self.cells))) as executor:
+                    cell_scores = list(executor.map(_score_partition, histories, configs, keys))
+            else:
+                cell_scores = list(map(_score_partition, histories, configs, keys))
+        
+        return {cell.run.run_id: scores for cell, scores in zip(self.cells, cell_scores)}
+
+
+def cell_dirname(env_key: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", env_key).strip("-") or "default"
+
+
+def _score_partition(history: HistoryTable, config: PolicyConfig, keys: Set[Tuple[str, str]]):
+    return compute_flake_scores_batch(history, config, keys=keys)
+
+
+def _load_cells(bundle_paths: List[Path], env_key_fields: List[str]) -> List[MatrixCell]:
+    cells = {}
+    groups = set()
+    for path in bundle_paths:
+        bundle = BundleReader(path)
+        metadata = bundle.metadata
+        groups.add(tuple(getattr(metadata, name) for name in MATRIX_GROUP_FIELDS))
+        
+        env_key = metadata.env_key(env_key_fields)
+        if env_key in cells:
+            raise ValueError(
+                f"Bundles {cells[env_key].bundle.path} and {path} share env_key '{env_key}'; "
+                f"merge shard bundles with 'rqg merge' first"
+            )
+        cells[env_key] = MatrixCell(env_key=env_key, bundle=bundle)
+    
+    if len(groups) > 1:
+        raise ValueError(f"Matrix bundles belong to {len(groups)} different commits (repo/branch/commit); analyze each commit separately")
+    return list(cells.values())
+
+
+def analyze_matrix(
+    sources: Iterable[str],
+    config_path: str = "rqg.yml",
+    output_dir: str = "rqg",
+    jobs: int = 1,
+) -> Dict[str, Any]:
+    with profiling.profiling() as profiler:
+        return _analyze_matrix(sources, config_path, output_dir, jobs, profiler)
+
+
+def _analyze_matrix(
+    sources: Iterable[str],
+    config_path: str,
+    output_dir: str,
+    jobs: int,
+    profiler: profiling.Profiler,
+) -> Dict[str, Any]:
+    config = load_config(config_path)
+    
+    bundle_paths = resolve_bundle_paths(sources)
+    if not bundle_paths:
+        raise FileNotFoundError(f"No bundles found in {', '.join(sources)}")
+    cells = _load_cells(bundle_paths, config.get_env_key_fields())
+    metadata = cells[0].bundle.metadata
+    output_path = Path(output_dir)
+    results = []
+    
+    with SQLiteStore(
+        stats_window=config.get_lookback_runs(),
+        stats_days=config.get_lookback_days(),
+    ) as store:
+        fingerprint_cache = FingerprintCache(
+            maxsize=config.get_fingerprint_cache_size(),
+            store=store if config.get_fingerprint_cache_persist() else None,
+        )
+        state = MatrixState(config, store, cells, jobs)
+        
+        with profiling.stage("matrix.ingest"):
+            for cell in cells:
+                cell.run = ingest_run(cell.bundle, cell.env_key, state, fingerprint_cache)
+        
+        for cell in cells:
+            decision_record = decide_run(cell.run, cell.env_key, state, fingerprint_cache)
+            cell_dir = output_path / cell_dirname(cell.env_key)
+            with profiling.stage("analyze.write_output"):
+                write_outputs(decision_record, cell_dir)
+            
+            results.append({
+                "env_key": cell.env_key,
+                "run_id": cell.run.run_id,
+                "bundle": str(cell.bundle.path),
+                "decision": decision_record.decision,
+                "reasons": [reason["type"] for reason in decision_record.decision_reasons],
+                "summary": decision_record.current_run_summary,
+                "output_dir": str(cell_dir),
+            })
+    
+    aggregate = {
+        "decision": max((cell["decision"] for cell in results), key=DECISION_SEVERITY.__getitem__),
+        "run_context": {
+            "repo": metadata.repo,
+            "branch": metadata.branch,
+            "commit": metadata.commit_sha,
+        },
+        "cells": results,
+        "cache_stats": fingerprint_cache.stats(),
+        "timings": profiler.timings(),
+    }
+    
+    output_path.mkdir(parents=True, exist_ok=True)
+    with open(output_path / "matrix.json", "w", encoding="utf-8") as f:
+        json.dump(aggregate, f, indent=2)
+    _write_matrix_summary(aggregate, output_path / "matrix.md")
+    return aggregate
+
+
+def _write_matrix_summary(aggregate: Dict[str, Any], output_path: Path):
+    lines = [
+        "# RQG Matrix Decision\n",
+        f"**Decision:** {aggregate['decision']}\n",
+        f"- Repository: {aggregate['run_context']['repo']}",
+        f"- Commit: {aggregate['run_context']['commit']}",
+        f"- Branch: {aggregate['run_context']['branch']}",
+        "\n## Cells\n",
+        "| Environment | Decision | Failed | Total | Reasons |",
+        "|---|---|---|---|---|",
+    ]
+    for cell in aggregate["cells"]:
+        reasons = ", ".join(sorted(set(cell["reasons"]))) or "-"
+        lines.append(
+            f"| {cell['env_key']} | {cell['decision']} | {cell['summary']['failed']} "
+            f"| {cell['summary']['total_tests']} | {reasons} |"
+        )
+    
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
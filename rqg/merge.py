@@ -0,0 +1,165 @@
+import json
+import heapq
+import tempfile
+import uuid
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+from rqg.models import RunMetadata
+from rqg.bundle import BundleReader, BundleWriter, resolve_bundle_paths
+from rqg import profiling
+
+
+OUTCOME_PRIORITY = {"fail": 0, "pass": 1, "skip": 2}
+
+SHARD_GROUP_FIELDS = ("repo", "branch", "commit_sha", "workflow", "build_number", "attempt")
+
+
+@dataclass
+class ShardSummary:
+    shard_id: Optional[str]
+    run_id: str
+    source: str
+    tests: int = 0
+    passed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    duration_ms: float = 0.0
+    slowest_ms: float = 0.0
+    wall_ms: Optional[float] = None
+
+    def add(self, tr: Dict[str, Any]):
+        self.tests += 1
+        outcome = tr.get("outcome", "pass")
+        if outcome == "fail":
+            self.failed += 1
+        elif outcome == "skip":
+            self.skipped += 1
+        else:
+            self.passed += 1
+        duration = tr.get("duration_ms") or 0.0
+        self.duration_ms += duration
+        self.slowest_ms = max(self.slowest_ms, duration)
+
+    def to_dict(self):
+        return {
+            "shard_id": self.shard_id,
+            "run_id": self.run_id,
+            "source": self.source,
+            "tests": self.tests,
+            "passed": self.passed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "duration_ms": round(self.duration_ms, 3),
+            "slowest_ms": round(self.slowest_ms, 3),
+            "wall_ms": round(self.wall_ms, 3) if self.wall_ms is not None else None,
+        }
+
+
+@dataclass
+class MergeResult:
+    path: str
+    run_id: str
+    shards: List[Dict[str, Any]]
+    results: int
+    duplicates: int
+
+
+def shard_group_key(metadata: RunMetadata) -> Tuple:
+    return tuple(getattr(metadata, field) for field in SHARD_GROUP_FIELDS)
+
+
+def merged_run_id(metadata: RunMetadata) -> str:
+    key = "|".join(str(value) for value in shard_group_key(metadata))
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"rqg-merge:{key}"))
+
+
+def _spill_sorted(reader: BundleReader, spill_dir: Path, index: int) -> Tuple[Path, ShardSummary]:
+    metadata = reader.metadata
+    summary = ShardSummary(shard_id=metadata.shard_id, run_id=reader.run_id, source=str(reader.path))
+    if metadata.started_at and metadata.ended_at:
+        summary.wall_ms = (metadata.ended_at - metadata.started_at).total_seconds() * 1000
+    
+    rows = []
+    for line in reader.iter_result_lines():
+        data = json.loads(line)
+        summary.add(data)
+        rows.append((json.dumps(data["test_id"]), OUTCOME_PRIORITY.get(data.get("outcome", "pass"), len(OUTCOME_PRIORITY)), line))
+    rows.sort(key=lambda row: row[:2])
+    
+    spill_path = spill_dir / f"shard-{index}.jsonl"
+    with open(spill_path, "w", encoding="utf-8") as f:
+        for key, priority, line in rows:
+            f.write(f"{key}\t{priority}\t{line}\n")
+    return spill_path, summary
+
+
+def _iter_spill(path: Path, index: int) -> Iterator[Tuple[str, int, int, int, str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for position, spilled in enumerate(f):
+            key, priority, line = spilled.rstrip("\n").split("\t", 2)
+            yield key, int(priority), index, position, line
+
+
+def _merged_metadata(readers: List[BundleReader]) -> RunMetadata:
+    started = [reader.metadata.started_at for reader in readers if reader.metadata.started_at]
+    ended = [reader.metadata.ended_at for reader in readers if reader.metadata.ended_at]
+    return replace(
+        readers[0].metadata,
+        shard_id=None,
+        started_at=min(started) if started else None,
+        ended_at=max(ended) if ended else None,
+    )
+
+
+def merge_shard_bundles(readers: List[BundleReader], output_path: Path) -> MergeResult:
+    if not readers:
+        raise ValueError("No shard bundles to merge")
+    
+    keys = {shard_group_key(reader.metadata) for reader in readers}
+    if len(keys) > 1:
+        raise ValueError(
+            f"Shard bundles belong to {len(keys)} different builds "
+            f"(repo/branch/commit/workflow/build_number/attempt); merge each build separately"
+        )
+    
+    readers = sorted(readers, key=lambda reader: (reader.metadata.shard_id or "", str(reader.path)))
+    metadata = _merged_metadata(readers)
+    run_id = merged_run_id(metadata)
+    log_events = [
+        dict(event, shard_id=reader.metadata.shard_id)
+        for reader in readers
+        for event in reader.log_events
+    ]
+    
+    results = 0
+    duplicates = 0
+    with tempfile.TemporaryDirectory(prefix="rqg-merge-") as tmp:
+        with profiling.stage("merge.sort_shards"):
+            spills = [_spill_sorted(reader, Path(tmp), index) for index, reader in enumerate(readers)]
+        shards = [summary.to_dict() for _, summary in spills]
+        
+        with profiling.stage("merge.k_way_merge"):
+            with BundleWriter(Path(output_path), run_id, metadata, log_events=log_events, shards=shards) as writer:
+                previous = None
+                merged = heapq.merge(*(_iter_spill(path, index) for index, (path, _) in enumerate(spills)))
+                for key, _, _, _, line in merged:
+                    if key == previous:
+                        duplicates += 1
+                        continue
+                    previous = key
+                    writer.write_raw(line)
+                results = writer.result_count
+    
+    profiling.count("merge.shards", len(shards))
+    profiling.count("merge.results", results)
+    profiling.count("merge.duplicates", duplicates)
+    return MergeResult(path=str(writer.path), run_id=run_id, shards=shards, results=results, duplicates=duplicates)
+
+
+def merge_bundles(sources: Iterable[str], output_path: str = "rqg/bundle.jsonl") -> MergeResult:
+    paths = [path for path in resolve_bundle_paths(sources) if path.resolve() != Path(output_path).resolve()]
+    if not paths:
+        raise FileNotFoundError(f"No shard bundles found in {', '.join(sources)}")
+    
+    return merge_shard_bundles([BundleReader(path) for path in paths], Path(output_path))
@@ -58,6 +58,7 @@ class TestCaseResult:
     retry_count: Optional[int] = None
     system_out: Optional[str] = None
     system_err: Optional[str] = None
+    started_at: Optional[str] = None
 
     def to_dict(self):
         return asdict(self)
@@ -101,6 +102,8 @@ class FailureCluster:
     infra_hints: List[str] = field(default_factory=list)
     test_ids: List[str] = field(default_factory=list)
     occurrence_count: int = 0
+    repo: Optional[str] = None
+    branch: Optional[str] = None
 
     def to_dict(self):
         d = asdict(self)
@@ -139,6 +142,8 @@ class DecisionRecord:
     decision: str
     decision_reasons: List[Dict[str, Any]]
     analysis_errors: List[str] = field(default_factory=list)
+    cache_stats: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, Any] = field(default_factory=dict)
     timestamp: str = field(default_factory=lambda: datetime.utcnow().isoformat())
 
     def to_dict(self):
@@ -1,4 +1,3 @@
-from rqg.parsers.junit import parse_junit_xml
-
-__all__ = ["parse_junit_xml"]
+from rqg.parsers.junit import parse_junit_xml, iter_junit_xml
 
+__all__ = ["parse_junit_xml", "iter_junit_xml"]
@@ -1,86 +1,145 @@
 from pathlib import Path
-from typing import List, Optional
+from datetime import tzinfo
+from typing import Iterator, List, Optional
 from lxml import etree
 from rqg.models import TestCaseResult
 from rqg.config import PolicyConfig
+from rqg.timeutil import parse_timestamp, parse_timezone, format_timestamp
 
 
 def parse_junit_xml(xml_path: Path, config: PolicyConfig) -> List[TestCaseResult]:
-    results = []
+    return list(iter_junit_xml(xml_path, config))
+
+
+def iter_junit_xml(xml_path: Path, config: PolicyConfig) -> Iterator[TestCaseResult]:
+    strategy = config.get_test_id_strategy()
+    default_tz = parse_timezone(config.get_junit_timezone())
+    root = None
+    suites = []
+    open_testcases = 0
     
     try:
-        tree = etree.parse(str(xml_path))
-        root = tree.getroot()
-        
-        if root.tag == "testsuites":
-            for testsuite in root:
-                if testsuite.tag == "testsuite":
-                    results.extend(_parse_testsuite(testsuite, config))
-        elif root.tag == "testsuite":
-            results.extend(_parse_testsuite(root, config))
-        else:
-            for testsuite in root.xpath(".//testsuite"):
-                results.extend(_parse_testsuite(testsuite, config))
+        for event, elem in etree.iterparse(
+            str(xml_path),
+            events=("start", "end"),
+            tag=("testsuite", "testcase"),
+        ):
+            if root is None:
+                root = elem.getroottree().getroot()
+            
+            if elem.tag == "testsuite":
+                if event == "start":
+                    suites.append([
+                        elem.get("name", "unknown"),
+                        _is_collected_suite(elem, root),
+                        parse_timestamp(elem.get("timestamp"), default_tz),
+                    ])
+                else:
+                    suites.pop()
+                    if elem is not root:
+                        _release(elem)
+                continue
+            
+            if event == "start":
+                open_testcases += 1
+                continue
+            
+            open_testcases -= 1
+            started_at = _advance_clock(elem, suites, default_tz)
+            for suite_name, collected, _ in suites:
+                if collected:
+                    yield _parse_testcase(elem, suite_name, strategy, started_at)
+            if open_testcases == 0:
+                _release(elem)
     
     except etree.XMLSyntaxError as e:
         raise ValueError(f"Invalid XML in {xml_path}: {e}")
+
+
+def _is_collected_suite(testsuite_elem, root) -> bool:
+    if root.tag == "testsuites":
+        return testsuite_elem.getparent() is root
+    if root.tag == "testsuite":
+        return testsuite_elem is root
+    return True
+
+
+def _advance_clock(testcase, suites: list, default_tz: Optional[tzinfo]) -> Optional[str]:
+    started = parse_timestamp(testcase.get("timestamp"), default_tz)
+    clock = next((suite for suite in reversed(suites) if suite[2] is not None), None)
+    if started is None and clock is not None:
+        started = clock[2]
+    if started is None:
+        return None
     
-    return results
+    epoch, aware = started
+    if clock is not None and clock[2][1] == aware:
+        clock[2] = (max(clock[2][0], epoch + _duration_seconds(testcase)), aware)
+    return format_timestamp(epoch, aware)
+
+
+def _duration_seconds(testcase) -> float:
+    try:
+        return float(testcase.get("time") or 0)
+    except ValueError:
+        return 0.0
 
 
-def _parse_testsuite(testsuite_elem, config: PolicyConfig) -> List[TestCaseResult]:
-    results = []
-    suite_name = testsuite_elem.get("name", "unknown")
+def _release(elem):
+    elem.clear(keep_tail=True)
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def _parse_testcase(testcase, suite_name: str, strategy: str, started_at: Optional[str] = None) -> TestCaseResult:
+    classname = testcase.get("classname", "")
+    name = testcase.get("name", "")
+    
+    test_id = _build_test_id(classname, name, strategy)
+    
+    duration = testcase.get("time")
+    duration_ms = float(duration) * 1000 if duration else None
+    
+    outcome = "pass"
+    failure_text = None
+    system_out = None
+    system_err = None
+    
+    failure = testcase.find("failure")
+    error = testcase.find("error")
+    skipped = testcase.find("skipped")
+    
+    if skipped is not None:
+        outcome = "skip"
+    elif failure is not None:
+        outcome = "fail"
+        failure_text = failure.text or failure.get("message", "")
+    elif error is not None:
+        outcome = "fail"
+        failure_text = error.text or error.get("message", "")
+    
+    system_out_elem = testcase.find("system-out")
+    if system_out_elem is not None:
+        system_out = system_out_elem.text
     
-    for testcase in testsuite_elem.xpath(".//testcase"):
-        classname = testcase.get("classname", "")
-        name = testcase.get("name", "")
-        
-        test_id = _build_test_id(classname, name, config.get_test_id_strategy())
-        
-        duration = testcase.get("time")
-        duration_ms = float(duration) * 1000 if duration else None
-        
-        outcome = "pass"
-        failure_text = None
-        system_out = None
-        system_err = None
-        
-        failure = testcase.find("failure")
-        error = testcase.find("error")
-        skipped = testcase.find("skipped")
-        
-        if skipped is not None:
-            outcome = "skip"
-        elif failure is not None:
-            outcome = "fail"
-            failure_text = failure.text or failure.get("message", "")
-        elif error is not None:
-            outcome = "fail"
-            failure_text = error.text or error.get("message", "")
-        
-        system_out_elem = testcase.find("system-out")
-        if system_out_elem is not None:
-            system_out = system_out_elem.text
-        
-        system_err_elem = testcase.find("system-err")
-        if system_err_elem is not None:
-            system_err = system_err_elem.text
-        
-        result = TestCaseResult(
-            test_id=test_id,
-            suite=suite_name,
-            classname=classname,
-            name=name,
-            duration_ms=duration_ms,
-            outcome=outcome,
-            failure_text=failure_text,
-            system_out=system_out,
-            system_err=system_err,
-        )
-        results.append(result)
+    system_err_elem = testcase.find("system-err")
+    if system_err_elem is not None:
+        system_err = system_err_elem.text
     
-    return results
+    return TestCaseResult(
+        test_id=test_id,
+        suite=suite_name,
+        classname=classname,
+        name=name,
+        duration_ms=duration_ms,
+        outcome=outcome,
+        failure_text=failure_text,
+        system_out=system_out,
+        system_err=system_err,
+        started_at=started_at,
+    )
 
 
 def _build_test_id(classname: str, name: str, strategy: str) -> str:
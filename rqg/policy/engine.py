@@ -2,8 +2,11 @@ from typing import List, Dict, Any
 from rqg.models import Run, DecisionRecord
 from rqg.config import PolicyConfig
 from rqg.recommendations import generate_recommendations
+from rqg.policy.rules import compile_rules, known_flaky_ids, new_cluster_fingerprints
+from rqg import profiling
 
 
+@profiling.timed("policy.apply_policy")
 def apply_policy(
     current_run: Run,
     new_clusters: List[Dict[str, Any]],
@@ -32,18 +35,13 @@ def apply_policy(
             "data": {"count": new_cluster_count, "clusters": new_clusters[:5]},
         })
     
-    critical_paths = hard_block.get("critical_paths", [])
-    required_suites = hard_block.get("required_suites", [])
+    rules = compile_rules(config)
+    new_fingerprints = new_cluster_fingerprints(new_clusters)
+    flaky_ids = known_flaky_ids(known_flaky)
     
     for tr in current_failures:
-        suite_lower = tr.suite.lower()
-        test_id_lower = tr.test_id.lower()
-        
-        for critical in critical_paths:
-            if critical.lower() in suite_lower or critical.lower() in test_id_lower:
-                if tr.fingerprint not in [c["fingerprint"] for c in new_clusters]:
-                    continue
-                
+        if tr.fingerprint in new_fingerprints:
+            for critical in rules.matching_critical_paths(tr.suite, tr.test_id):
                 decision = "HARD_BLOCK"
                 reasons.append({
                     "type": "critical_path_failure",
@@ -52,20 +50,14 @@ def apply_policy(
                     "data": {"test_id": tr.test_id, "suite": tr.suite},
                 })
         
-        if tr.suite in required_suites:
-            is_known_flaky = any(
-                f["test_id"] == tr.test_id and f.get("flake_score", 0) >= 0.75
-                for f in known_flaky
-            )
-            
-            if not is_known_flaky:
-                decision = "HARD_BLOCK"
-                reasons.append({
-                    "type": "required_suite_failure",
-                    "severity": "high",
-                    "message": f"Required suite '{tr.suite}' has failure",
-                    "data": {"test_id": tr.test_id, "suite": tr.suite},
-                })
+        if tr.suite in rules.required_suites and tr.test_id not in flaky_ids:
+            decision = "HARD_BLOCK"
+            reasons.append({
+                "type": "required_suite_failure",
+                "severity": "high",
+                "message": f"Required suite '{tr.suite}' has failure",
+                "data": {"test_id": tr.test_id, "suite": tr.suite},
+            })
     
     if decision == "PASS":
         max_known_flaky = soft_block.get("max_known_flaky_failures", 5)
@@ -0,0 +1,107 @@
+import re
+from collections import deque
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Optional, Set, FrozenSet, Tuple
+from rqg.config import PolicyConfig
+
+
+KNOWN_FLAKY_SCORE = 0.75
+
+
+class SubstringMatcher:
+    __slots__ = ("_goto", "_fail", "_outputs", "_always", "_prefilter")
+
+    def __init__(self, patterns: Iterable[str]):
+        patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        always = []
+        
+        for index, pattern in enumerate(patterns):
+            if not pattern:
+                always.append(index)
+                continue
+            node = 0
+            for char in pattern:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][char] = child
+                    self._goto.append({})
+                    outputs.append([])
+                node = child
+            outputs[node].append(index)
+        
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                state = self._fail[node]
+                while state and char not in self._goto[state]:
+                    state = self._fail[state]
+                self._fail[child] = self._goto[state].get(char, 0)
+                outputs[child].extend(outputs[self._fail[child]])
+        
+        self._outputs = [tuple(output) for output in outputs]
+        self._always = frozenset(always)
+        
+        literals = sorted({pattern for pattern in patterns if pattern}, key=len)
+        self._prefilter = re.compile("|".join(map(re.escape, literals))) if literals else None
+
+    def find(self, *texts: str) -> Set[int]:
+        found = set(self._always)
+        if self._prefilter is None:
+            return found
+        
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        for text in texts:
+            if not self._prefilter.search(text):
+                continue
+            node = 0
+            for char in text:
+                while node and char not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(char, 0)
+                if outputs[node]:
+                    found.update(outputs[node])
+        return found
+
+
+class CompiledRules:
+    __slots__ = ("critical_paths", "required_suites", "_matcher")
+
+    def __init__(self, critical_paths: Iterable[str], required_suites: Iterable[str]):
+        self.critical_paths: Tuple[str, ...] = tuple(critical_paths)
+        self.required_suites: FrozenSet[str] = frozenset(required_suites)
+        self._matcher = SubstringMatcher([critical.lower() for critical in self.critical_paths])
+
+    def matching_critical_paths(self, suite: str, test_id: str) -> List[str]:
+        if not self.critical_paths:
+            return []
+        matched = self._matcher.find(suite.lower(), test_id.lower())
+        return [self.critical_paths[index] for index in sorted(matched)]
+
+
+@lru_cache(maxsize=32)
+def _compile(critical_paths: Tuple[str, ...], required_suites: Tuple[Any, ...]) -> CompiledRules:
+    return CompiledRules(critical_paths, required_suites)
+
+
+def compile_rules(config: PolicyConfig) -> CompiledRules:
+    hard_block = config.gating.get("hard_block", {})
+    return _compile(
+        tuple(hard_block.get("critical_paths", [])),
+        tuple(hard_block.get("required_suites", [])),
+    )
+
+
+def known_flaky_ids(known_flaky: Iterable[Dict[str, Any]]) -> Set[str]:
+    return {f["test_id"] for f in known_flaky if f.get("flake_score", 0) >= KNOWN_FLAKY_SCORE}
+
+
+def new_cluster_fingerprints(new_clusters: Iterable[Dict[str, Any]]) -> Set[Optional[str]]:
+    return {c["fingerprint"] for c in new_clusters}
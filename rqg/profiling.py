@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import threading
+import cProfile
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+
+MAX_TRACE_EVENTS = 200000
+
+_active_profiler: ContextVar[Optional["Profiler"]] = ContextVar("rqg_profiler", default=None)
+
+
+class Profiler:
+    def __init__(self, record_events: bool = False):
+        self.record_events = record_events
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.dropped_events = 0
+
+    def add_span(self, name: str, start: float, duration: float):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = [0, 0.0]
+        stage[0] += 1
+        stage[1] += duration
+        
+        if self.record_events:
+            if len(self.events) >= MAX_TRACE_EVENTS:
+                self.dropped_events += 1
+                return
+            self.events.append({
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (start - self.started) * 1e6,
+                "dur": duration * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            })
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def timings(self) -> Dict[str, Any]:
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages": {
+                name: {"calls": calls, "total_ms": round(total * 1000, 3)}
+                for name, (calls, total) in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def write_chrome_trace(self, path: Path):
+        events = list(self.events)
+        elapsed = (time.perf_counter() - self.started) * 1e6
+        for name, value in self.counters.items():
+            events.append({
+                "name": name,
+                "ph": "C",
+                "ts": elapsed,
+                "pid": os.getpid(),
+                "args": {"value": value},
+            })
+        
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "traceEvents": events,
+                "displayTimeUnit": "ms",
+                "otherData": {"dropped_events": self.dropped_events},
+            }, f)
+
+
+def active_profiler() -> Optional[Profiler]:
+    return _active_profiler.get()
+
+
+@contextmanager
+def profiling(record_events: bool = False):
+    profiler = _active_profiler.get()
+    if profiler is not None:
+        yield profiler
+        return
+    
+    profiler = Profiler(record_events=record_events)
+    token = _active_profiler.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _active_profiler.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield
+        return
+    
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.add_span(name, start, time.perf_counter() - start)
+
+
+def timed(name: str):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _active_profiler.get()
+            if profiler is None:
+                return func(*args, **kwargs)
+            
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.add_span(name, start, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def count(name: str, value: int = 1):
+    profiler = _active_profiler.get()
+    if profiler is not None:
+        profiler.count(name, value)
+
+
+@contextmanager
+def command_profile(profile_path: Optional[str] = None, trace_path: Optional[str] = None):
+    cprofile = None
+    if profile_path:
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+    
+    try:
+        with profiling(record_events=bool(trace_path)) as profiler:
+            yield profiler
+    finally:
+        if cprofile is not None:
+            cprofile.disable()
+            Path(profile_path).parent.mkdir(parents=True, exist_ok=True)
+            cprofile.dump_stats(profile_path)
+        if trace_path:
+            profiler.write_chrome_trace(Path(trace_path))
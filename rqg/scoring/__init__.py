@@ -1,4 +1,7 @@
-from rqg.scoring.flake import compute_flake_scores
-
-__all__ = ["compute_flake_scores"]
+from rqg.scoring.flake import (
+    compute_flake_scores,
+    compute_flake_scores_batch,
+    compute_flake_scores_from_stats,
+)
 
+__all__ = ["compute_flake_scores", "compute_flake_scores_batch", "compute_flake_scores_from_stats"]
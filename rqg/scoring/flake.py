@@ -1,49 +1,79 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple, Union
 from collections import defaultdict
 from rqg.models import Run, TestCaseResult, FlakeScore
 from rqg.config import PolicyConfig
+from rqg.storage.history import HistoryTable, NO_RETRY
+from rqg import profiling
+from rqg.scoring.vectorized import compute_flake_scores_numpy, numpy_available
 
 
-def compute_flake_scores(
+class _OutcomeAccumulator:
+    __slots__ = (
+        "total",
+        "fails",
+        "transitions",
+        "prev_outcome",
+        "retry_attempts",
+        "retry_passes",
+        "commit_outcomes",
+        "inconsistent",
+    )
+    
+    def __init__(self):
+        self.total = 0
+        self.fails = 0
+        self.transitions = 0
+        self.prev_outcome = None
+        self.retry_attempts = 0
+        self.retry_passes = 0
+        self.commit_outcomes = {}
+        self.inconsistent = False
+    
+    def add(self, commit: str, outcome: str, retry_count: Optional[int]):
+        self.total += 1
+        
+        if outcome == "fail":
+            self.fails += 1
+        
+        if self.prev_outcome and self.prev_outcome != outcome:
+            self.transitions += 1
+        
+        self.prev_outcome = outcome
+        
+        if retry_count and retry_count > 0:
+            self.retry_attempts += 1
+            if outcome == "pass":
+                self.retry_passes += 1
+        
+        if not self.inconsistent:
+            first_outcome = self.commit_outcomes.setdefault(commit, outcome)
+            if first_outcome != outcome:
+                self.inconsistent = True
+                self.commit_outcomes = {}
+    
+    def to_score(self, test_id: str, env_key: str) -> FlakeScore:
+        return build_flake_score(
+            test_id=test_id,
+            env_key=env_key,
+            total=self.total,
+            fails=self.fails,
+            intermittency=self.transitions,
+            retry_attempts=self.retry_attempts,
+            retry_passes=self.retry_passes,
+            same_commit_inconsistency=self.inconsistent,
+        )
+
+
+def build_flake_score(
     test_id: str,
     env_key: str,
-    runs: List[Run],
-    config: PolicyConfig
+    total: int,
+    fails: int,
+    intermittency: int,
+    retry_attempts: int,
+    retry_passes: int,
+    same_commit_inconsistency: bool,
 ) -> FlakeScore:
-    test_outcomes = []
-    consecutive_changes = 0
-    retry_pass_count = 0
-    retry_attempt_count = 0
-    same_commit_outcomes = defaultdict(list)
-    
-    prev_outcome = None
-    
-    for run in runs:
-        for tr in run.test_results:
-            if tr.test_id == test_id:
-                run_env_key = run.metadata.env_key(config.get_env_key_fields())
-                if run_env_key == env_key:
-                    outcome = tr.outcome
-                    test_outcomes.append({
-                        "run_id": run.run_id,
-                        "commit": run.metadata.commit_sha,
-                        "outcome": outcome,
-                        "retry_count": tr.retry_count or 0,
-                    })
-                    
-                    if prev_outcome and prev_outcome != outcome:
-                        consecutive_changes += 1
-                    
-                    prev_outcome = outcome
-                    
-                    if tr.retry_count and tr.retry_count > 0:
-                        retry_attempt_count += 1
-                        if outcome == "pass":
-                            retry_pass_count += 1
-                    
-                    same_commit_outcomes[run.metadata.commit_sha].append(outcome)
-    
-    total = len(test_outcomes)
     if total == 0:
         return FlakeScore(
             test_id=test_id,
@@ -55,18 +85,9 @@ def compute_flake_scores(
             intermittency=0,
         )
     
-    fails = sum(1 for o in test_outcomes if o["outcome"] == "fail")
     fail_rate = fails / total if total > 0 else 0.0
     
-    intermittency = consecutive_changes
-    
-    retry_pass_rate = retry_pass_count / retry_attempt_count if retry_attempt_count > 0 else None
-    
-    same_commit_inconsistency = False
-    for commit, outcomes in same_commit_outcomes.items():
-        if len(set(outcomes)) > 1:
-            same_commit_inconsistency = True
-            break
+    retry_pass_rate = retry_passes / retry_attempts if retry_attempts > 0 else None
     
     flake_score = 0.0
     confidence = 0.0
@@ -109,3 +130,142 @@ def compute_flake_scores(
         same_commit_inconsistency=same_commit_inconsistency,
     )
 
+
+def compute_flake_scores(
+    test_id: str,
+    env_key: str,
+    runs: List[Run],
+    config: PolicyConfig
+) -> FlakeScore:
+    env_key_fields = config.get_env_key_fields()
+    accumulator = _OutcomeAccumulator()
+    
+    for run in runs:
+        if run.metadata.env_key(env_key_fields) != env_key:
+            continue
+        
+        for tr in run.test_results:
+            if tr.test_id == test_id:
+                accumulator.add(run.metadata.commit_sha, tr.outcome, tr.retry_count)
+    
+    return accumulator.to_score(test_id, env_key)
+
+
+@profiling.timed("scoring.compute_flake_scores_batch")
+def compute_flake_scores_batch(
+    runs: Union[HistoryTable, Iterable[Run]],
+    config: PolicyConfig,
+    keys: Optional[Set[Tuple[str, str]]] = None,
+) -> Dict[Tuple[str, str], FlakeScore]:
+    env_key_fields = config.get_env_key_fields()
+    backend = config.get_flake_backend()
+    
+    if backend in ("auto", "numpy") and numpy_available():
+        scores = compute_flake_scores_numpy(runs, env_key_fields, keys)
+    else:
+        if backend == "numpy":
+            print("Warning: NumPy is not installed, falling back to the python flake scoring backend")
+        scores = _compute_flake_scores_python(runs, env_key_fields, keys)
+    
+    if keys is not None:
+        for key in keys:
+            if key not in scores:
+                scores[key] = _OutcomeAccumulator().to_score(key[0], key[1])
+    
+    return scores
+
+
+@profiling.timed("scoring.compute_flake_scores_from_stats")
+def compute_flake_scores_from_stats(
+    stats: Dict[str, Any],
+    env_key: str,
+    test_ids: Iterable[str],
+) -> Dict[Tuple[str, str], FlakeScore]:
+    scores = {}
+    
+    for test_id in test_ids:
+        test_stats = stats.get(test_id)
+        if test_stats is None:
+            scores[(test_id, env_key)] = _OutcomeAccumulator().to_score(test_id, env_key)
+            continue
+        
+        scores[(test_id, env_key)] = build_flake_score(
+            test_id=test_id,
+            env_key=env_key,
+            total=test_stats.total,
+            fails=test_stats.fails,
+            intermittency=test_stats.transitions,
+            retry_attempts=test_stats.retry_attempts,
+            retry_passes=test_stats.retry_passes,
+            same_commit_inconsistency=test_stats.inconsistent_commits > 0,
+        )
+    
+    return scores
+
+
+def _compute_flake_scores_python(
+    runs: Union[HistoryTable, Iterable[Run]],
+    env_key_fields: List[str],
+    keys: Optional[Set[Tuple[str, str]]],
+) -> Dict[Tuple[str, str], FlakeScore]:
+    if isinstance(runs, HistoryTable):
+        return _compute_flake_scores_history(runs, env_key_fields, keys)
+    
+    accumulators = defaultdict(_OutcomeAccumulator)
+    
+    for run in runs:
+        env_key = run.metadata.env_key(env_key_fields)
+        commit = run.metadata.commit_sha
+        
+        for tr in run.test_results:
+            key = (tr.test_id, env_key)
+            if keys is not None and key not in keys:
+                continue
+            accumulators[key].add(commit, tr.outcome, tr.retry_count)
+    
+    return {
+        key: accumulator.to_score(key[0], key[1])
+        for key, accumulator in accumulators.items()
+    }
+
+
+def _compute_flake_scores_history(
+    history: HistoryTable,
+    env_key_fields: List[str],
+    keys: Optional[Set[Tuple[str, str]]],
+) -> Dict[Tuple[str, str], FlakeScore]:
+    env_index = {}
+    run_env = [env_index.setdefault(env_key, len(env_index)) for env_key in history.run_env_keys(env_key_fields)]
+    env_keys = list(env_index)
+    envs = len(env_keys)
+    
+    selected = None
+    if keys is not None:
+        selected = set()
+        for test_id, env_key in keys:
+            test = history.test_index(test_id)
+            if test is not None and env_key in env_index:
+                selected.add(test * envs + env_index[env_key])
+    
+    accumulators = defaultdict(_OutcomeAccumulator)
+    outcomes = history.outcomes
+    run_commit = history.run_commit
+    rows = zip(history.row_run, history.row_test, history.row_outcome, history.row_retry)
+    
+    for run_index, test, code, retry in rows:
+        key = test * envs + run_env[run_index]
+        if selected is not None and key not in selected:
+            continue
+        accumulators[key].add(
+            run_commit[run_index],
+            outcomes[code],
+            None if retry == NO_RETRY else retry,
+        )
+    
+    test_ids = history.test_ids
+    scores = {}
+    for key, accumulator in accumulators.items():
+        test_id = test_ids[key // envs]
+        env_key = env_keys[key % envs]
+        scores[(test_id, env_key)] = accumulator.to_score(test_id, env_key)
+    return scores
@@ -0,0 +1,335 @@
+from dataclasses import dataclass
+from typing import List, Dict, Iterable, Optional, Set, Tuple, Any, Union
+from rqg.models import Run, FlakeScore
+from rqg.storage.history import HistoryTable, NO_RETRY
+
+np = None
+_numpy_loaded = False
+
+
+MISSING = 0
+PASS = 1
+FAIL = 2
+SKIP = 3
+
+
+def _load_numpy():
+    global np, _numpy_loaded
+    if not _numpy_loaded:
+        _numpy_loaded = True
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np
+
+
+def numpy_available() -> bool:
+    return _load_numpy() is not None
+
+
+@dataclass
+class OutcomeMatrix:
+    keys: List[Tuple[str, str]]
+    outcomes: Any
+    retried: Any
+    column_commits: Any
+    falsy_codes: List[int]
+
+
+def build_outcome_matrix(
+    runs: Union[HistoryTable, Iterable[Run]],
+    env_key_fields: List[str],
+    keys: Optional[Set[Tuple[str, str]]] = None,
+) -> OutcomeMatrix:
+    if _load_numpy() is None:
+        raise RuntimeError("NumPy is required for the vectorized flake scoring backend")
+    
+    if isinstance(runs, HistoryTable):
+        return _build_history_matrix(runs, env_key_fields, keys)
+    
+    codes = {"pass": PASS, "fail": FAIL, "skip": SKIP}
+    row_keys = []
+    rows_by_env = {}
+    commit_index = {}
+    
+    if keys is not None:
+        for test_id, env_key in keys:
+            rows_by_env.setdefault(env_key, {})[test_id] = len(row_keys)
+            row_keys.append((test_id, env_key))
+    
+    column_commits = []
+    entry_rows = []
+    entry_cols = []
+    entry_codes = []
+    entry_retried = []
+    
+    column = 0
+    for run in runs:
+        env_key = run.metadata.env_key(env_key_fields)
+        commit = commit_index.setdefault(run.metadata.commit_sha, len(commit_index))
+        env_rows = rows_by_env.get(env_key)
+        
+        if env_rows is None:
+            if keys is not None:
+                continue
+            env_rows = rows_by_env[env_key] = {}
+        
+        test_results = run.test_results
+        if keys is None:
+            for tr in test_results:
+                if tr.test_id not in env_rows:
+                    env_rows[tr.test_id] = len(row_keys)
+                    row_keys.append((tr.test_id, env_key))
+        
+        run_rows = np.array([env_rows.get(tr.test_id, -1) for tr in test_results], dtype=np.int32)
+        run_codes = [codes.get(tr.outcome) for tr in test_results]
+        if None in run_codes:
+            for tr in test_results:
+                codes.setdefault(tr.outcome, len(codes) + 1)
+            run_codes = [codes[tr.outcome] for tr in test_results]
+        run_codes = np.array(run_codes, dtype=np.int8)
+        run_retried = np.array(
+            [bool(tr.retry_count and tr.retry_count > 0) for tr in test_results],
+            dtype=np.bool_,
+        )
+        
+        selected = run_rows >= 0
+        if not selected.all():
+            run_rows = run_rows[selected]
+            run_codes = run_codes[selected]
+            run_retried = run_retried[selected]
+        
+        if len(run_rows) == 0:
+            continue
+        
+        occurrence = _occurrence_index(run_rows)
+        width = int(occurrence.max()) + 1
+        
+        entry_rows.append(run_rows)
+        entry_cols.append(occurrence + column)
+        entry_codes.append(run_codes)
+        entry_retried.append(run_retried)
+        column_commits.extend([commit] * width)
+        column += width
+    
+    outcomes = np.zeros((len(row_keys), column), dtype=np.int8)
+    retried = np.zeros((len(row_keys), column), dtype=np.bool_)
+    
+    if entry_rows:
+        rows = np.concatenate(entry_rows)
+        cols = np.concatenate(entry_cols)
+        outcomes[rows, cols] = np.concatenate(entry_codes)
+        retried[rows, cols] = np.concatenate(entry_retried)
+    
+    return OutcomeMatrix(
+        keys=row_keys,
+        outcomes=outcomes,
+        retried=retried,
+        column_commits=np.array(column_commits, dtype=np.int32),
+        falsy_codes=[code for outcome, code in codes.items() if not outcome],
+    )
+
+
+def _build_history_matrix(
+    history: HistoryTable,
+    env_key_fields: List[str],
+    keys: Optional[Set[Tuple[str, str]]],
+) -> OutcomeMatrix:
+    env_index = {}
+    run_env = np.array(
+        [env_index.setdefault(env_key, len(env_index)) for env_key in history.run_env_keys(env_key_fields)],
+        dtype=np.int64,
+    )
+    env_keys = list(env_index)
+    envs = max(len(env_keys), 1)
+    
+    row_run = np.frombuffer(history.row_run, dtype=np.intc).astype(np.int64)
+    row_test = np.frombuffer(history.row_test, dtype=np.intc).astype(np.int64)
+    row_outcome = np.frombuffer(history.row_outcome, dtype=np.int8)
+    row_retry = np.frombuffer(history.row_retry, dtype=np.uint16)
+    composite = row_test * envs + run_env[row_run]
+    
+    if keys is None:
+        key_codes, rows = np.unique(composite, return_inverse=True)
+        row_keys = [
+            (history.test_ids[code // envs], env_keys[code % envs])
+            for code in key_codes.tolist()
+        ]
+        selected = np.ones(len(composite), dtype=np.bool_)
+    else:
+        row_keys = list(keys)
+        key_codes = np.full(len(row_keys), -1, dtype=np.int64)
+        for i, (test_id, env_key) in enumerate(row_keys):
+            test = history.test_index(test_id)
+            if test is not None and env_key in env_index:
+                key_codes[i] = test * envs + env_index[env_key]
+        
+        order = np.argsort(key_codes, kind="stable")
+        sorted_codes = np.append(key_codes[order], np.iinfo(np.int64).max)
+        positions = np.searchsorted(sorted_codes, composite)
+        selected = sorted_codes[positions] == composite
+        rows = np.append(order, 0)[positions]
+    
+    codes = {"pass": PASS, "fail": FAIL, "skip": SKIP}
+    for outcome in history.outcomes:
+        codes.setdefault(outcome, len(codes) + 1)
+    code_map = np.array([codes[outcome] for outcome in history.outcomes], dtype=np.int8)
+    
+    rows = rows[selected]
+    entry_runs = row_run[selected]
+    entry_codes = code_map[row_outcome[selected]]
+    entry_retried = (row_retry[selected] != NO_RETRY) & (row_retry[selected] > 0)
+    
+    occurrence = _occurrence_index(entry_runs * max(len(row_keys), 1) + rows)
+    widths = np.zeros(history.run_count, dtype=np.int64)
+    np.maximum.at(widths, entry_runs, occurrence + 1)
+    offsets = np.cumsum(widths) - widths
+    columns = int(widths.sum())
+    
+    outcomes = np.zeros((len(row_keys), columns), dtype=np.int8)
+    retried = np.zeros((len(row_keys), columns), dtype=np.bool_)
+    cols = offsets[entry_runs] + occurrence
+    outcomes[rows, cols] = entry_codes
+    retried[rows, cols] = entry_retried
+    
+    return OutcomeMatrix(
+        keys=row_keys,
+        outcomes=outcomes,
+        retried=retried,
+        column_commits=np.repeat(np.frombuffer(history.run_commit, dtype=np.intc), widths).astype(np.int32),
+        falsy_codes=[codes[outcome] for outcome in history.outcomes if not outcome],
+    )
+
+
+def _occurrence_index(rows):
+    occurrence = np.zeros(len(rows), dtype=np.int32)
+    order = np.argsort(rows, kind="stable")
+    sorted_rows = rows[order]
+    duplicate = sorted_rows[1:] == sorted_rows[:-1]
+    
+    if duplicate.any():
+        positions = np.arange(len(rows), dtype=np.int32)
+        group_start = np.maximum.accumulate(np.where(np.r_[True, ~duplicate], positions, 0))
+        occurrence[order] = positions - group_start
+    
+    return occurrence
+
+
+def _count_transitions(outcomes, present, falsy_codes):
+    columns = outcomes.shape[1]
+    if columns == 0:
+        return np.zeros(outcomes.shape[0], dtype=np.int64)
+    
+    positions = np.where(present, np.arange(columns, dtype=np.int32), -1)
+    last_present = np.maximum.accumulate(positions, axis=1)
+    
+    previous = np.full_like(last_present, -1)
+    previous[:, 1:] = last_present[:, :-1]
+    
+    previous_values = np.take_along_axis(outcomes, np.maximum(previous, 0), axis=1)
+    changed = present & (previous >= 0) & (previous_values != outcomes)
+    if falsy_codes:
+        changed &= ~np.isin(previous_values, falsy_codes)
+    
+    return changed.sum(axis=1)
+
+
+def _same_commit_inconsistency(outcomes, present, column_commits):
+    rows, columns = outcomes.shape
+    if columns == 0:
+        return np.zeros(rows, dtype=np.bool_)
+    
+    order = np.argsort(column_commits, kind="stable")
+    sorted_commits = column_commits[order]
+    starts = np.flatnonzero(np.r_[True, sorted_commits[1:] != sorted_commits[:-1]])
+    grouped = outcomes[:, order]
+    
+    distinct = np.zeros((rows, len(starts)), dtype=np.int16)
+    for code in np.unique(grouped[present[:, order]]):
+        distinct += np.logical_or.reduceat(grouped == code, starts, axis=1)
+    
+    return (distinct > 1).any(axis=1)
+
+
+def compute_flake_scores_numpy(
+    runs: Iterable[Run],
+    env_key_fields: List[str],
+    keys: Optional[Set[Tuple[str, str]]] = None,
+) -> Dict[Tuple[str, str], FlakeScore]:
+    matrix = build_outcome_matrix(runs, env_key_fields, keys)
+    outcomes = matrix.outcomes
+    present = outcomes != MISSING
+    
+    total = present.sum(axis=1)
+    fails = (outcomes == FAIL).sum(axis=1)
+    intermittency = _count_transitions(outcomes, present, matrix.falsy_codes)
+    retry_attempts = (matrix.retried & present).sum(axis=1)
+    retry_passes = (matrix.retried & (outcomes == PASS)).sum(axis=1)
+    inconsistent = _same_commit_inconsistency(outcomes, present, matrix.column_commits)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fail_rate = np.where(total > 0, fails / total, 0.0)
+        retry_pass_rate = np.where(retry_attempts > 0, retry_passes / retry_attempts, np.nan)
+    
+    eligible = total >= 3
+    confidence = np.where(eligible, np.minimum(1.0, total / 20.0), 0.0)
+    
+    flake_score = np.zeros(len(total), dtype=np.float64)
+    flake_score += np.where(
+        eligible & (intermittency > 0),
+        np.minimum(0.4, intermittency * 0.1),
+        0.0,
+    )
+    flake_score += np.where(
+        eligible & (retry_attempts > 0) & (retry_pass_rate > 0.5),
+        np.minimum(0.3, retry_pass_rate * 0.4),
+        0.0,
+    )
+    flake_score += np.where(eligible & inconsistent, 0.3, 0.0)
+    flake_score += np.where(
+        eligible & (fail_rate > 0.3) & (fail_rate < 0.9),
+        np.minimum(0.2, (fail_rate - 0.3) * 0.4),
+        0.0,
+    )
+    flake_score = np.minimum(1.0, flake_score)
+    
+    scores = {}
+    columns = zip(
+        matrix.keys,
+        total.tolist(),
+        fails.tolist(),
+        fail_rate.tolist(),
+        intermittency.tolist(),
+        retry_attempts.tolist(),
+        retry_pass_rate.tolist(),
+        inconsistent.tolist(),
+        flake_score.tolist(),
+        confidence.tolist(),
+    )
+    for key, total_i, fails_i, fail_rate_i, inter_i, attempts_i, rpr_i, incons_i, score_i, conf_i in columns:
+        if total_i == 0:
+            continue
+        
+        rpr_i = rpr_i if attempts_i > 0 else None
+        scores[key] = FlakeScore(
+            test_id=key[0],
+            env_key=key[1],
+            flake_score=score_i,
+            confidence=conf_i,
+            evidence={
+                "total_runs": total_i,
+                "fail_count": fails_i,
+                "fail_rate": fail_rate_i,
+                "intermittency": inter_i,
+                "retry_pass_rate": rpr_i,
+                "same_commit_inconsistency": incons_i,
+            },
+            fail_rate=fail_rate_i,
+            intermittency=inter_i,
+            retry_pass_rate=rpr_i,
+            same_commit_inconsistency=incons_i,
+        )
+    
+    return scores
@@ -0,0 +1,400 @@
+import os
+import copy
+import json
+import socketserver
+import stat
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+from rqg.models import Run, RunMetadata, TestCaseResult, FailureCluster
+from rqg.config import PolicyConfig, load_config
+from rqg.storage import SQLiteStore, HistoryTable
+from rqg.storage.test_stats import RollingTestStats
+from rqg.storage.failure_clusters import (
+    ClusterState,
+    CLUSTER_WINDOW_DAYS,
+    MAX_CLUSTER_WINDOW_RUNS,
+    merge_cluster_states,
+    track_failure,
+    apply_cluster_failures,
+)
+from rqg.fingerprint.cache import FingerprintCache
+from rqg.analyze import AnalysisState, open_bundle, analyze_bundle
+from rqg import profiling
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+MAX_WARM_WINDOWS = 32
+
+MAX_WARM_STATS = 64
+
+MAX_WARM_CLUSTERS = 10000
+
+
+@dataclass
+class WarmRun:
+    run_id: str
+    metadata: RunMetadata
+    started_at: str
+    tests: array
+    codes: array
+    retries: array
+    fingerprints: Dict[int, str]
+
+
+class RunWindow:
+    __slots__ = ("limit", "runs", "dictionary")
+
+    def __init__(self, limit: int, dictionary: Optional[HistoryTable] = None):
+        self.limit = limit
+        self.runs: List[WarmRun] = []
+        self.dictionary = dictionary if dictionary is not None else HistoryTable()
+
+    def __contains__(self, run_id: str) -> bool:
+        return any(run.run_id == run_id for run in self.runs)
+
+    @classmethod
+    def from_history(cls, history: HistoryTable, limit: int) -> "RunWindow":
+        window = cls(limit, history.empty_like())
+        window.runs = [
+            WarmRun(run_id, metadata, metadata.started_at.isoformat(), array("i"), array("b"), array("H"), {})
+            for run_id, metadata in zip(history.run_ids, history.run_metadata)
+        ]
+        fingerprints = history.fingerprints
+        rows = zip(history.row_run, history.row_test, history.row_outcome, history.row_retry)
+        for row, (run_index, test, code, retry) in enumerate(rows):
+            warm = window.runs[run_index]
+            fingerprint = fingerprints.get(row)
+            if fingerprint:
+                warm.fingerprints[len(warm.tests)] = fingerprint
+            warm.tests.append(test)
+            warm.codes.append(code)
+            warm.retries.append(retry)
+        return window
+
+    def add(self, run: Run):
+        started_at = run.metadata.started_at.isoformat()
+        position = next(
+            (index for index, warm in enumerate(self.runs) if warm.started_at < started_at),
+            len(self.runs),
+        )
+        encoded = self.dictionary.encode_rows(
+            (tr.test_id, tr.outcome, tr.retry_count, tr.fingerprint) for tr in run.test_results
+        )
+        self.runs.insert(position, WarmRun(run.run_id, run.metadata, started_at, *encoded))
+        del self.runs[self.limit:]
+
+    def table(self, cutoff: str) -> HistoryTable:
+        history = self.dictionary.empty_like()
+        for warm in self.runs:
+            if warm.started_at < cutoff:
+                break
+            run_index = history.add_run(warm.run_id, warm.metadata)
+            history.extend_encoded(run_index, warm.tests, warm.codes, warm.retries, warm.fingerprints)
+        return history
+
+
+def _evict(cache: OrderedDict, maxsize: int):
+    while len(cache) > maxsize:
+        cache.popitem(last=False)
+
+
+class WarmState(AnalysisState):
+    def __init__(self, config: PolicyConfig, store: SQLiteStore):
+        super().__init__(config, store)
+        self.data_version = store.data_version()
+        self.windows: "OrderedDict[Tuple[str, str], RunWindow]" = OrderedDict()
+        self.clusters: "OrderedDict[Tuple[str, str], Dict[Tuple[str, str, str], ClusterState]]" = OrderedDict()
+        self.stats: "OrderedDict[Tuple[str, str, str], Dict[str, Optional[RollingTestStats]]]" = OrderedDict()
+
+    def test_stats_cache(self, run: Run, env_key: str) -> Optional[Dict[str, Optional[RollingTestStats]]]:
+        if not self.use_test_stats:
+            return None
+        
+        key = (run.metadata.repo, run.metadata.branch, env_key)
+        cached = self.stats.get(key)
+        if cached is None:
+            cached = self.stats[key] = {}
+            _evict(self.stats, MAX_WARM_STATS)
+        else:
+            self.stats.move_to_end(key)
+        return cached
+
+    def ingested(self, run: Run):
+        with profiling.stage("serve.update_index"):
+            self._update_clusters(run)
+            if not self.use_test_stats:
+                self._update_window(run)
+
+    def history(self, run: Run) -> HistoryTable:
+        metadata = run.metadata
+        key = (metadata.repo, metadata.branch)
+        window = self.windows.get(key) if metadata.branch else None
+        if window is None:
+            return super().history(run)
+        
+        self.windows.move_to_end(key)
+        cutoff = (datetime.utcnow() - timedelta(days=self.config.get_lookback_days())).isoformat()
+        return window.table(cutoff)
+
+    def test_stats(self, run: Run, env_key: str) -> Dict[str, RollingTestStats]:
+        metadata = run.metadata
+        cached = self.test_stats_cache(run, env_key)
+        test_ids = list(dict.fromkeys(tr.test_id for tr in run.test_results))
+        
+        missing = [test_id for test_id in test_ids if test_id not in cached]
+        loaded = self.store.load_test_stats(metadata.repo, metadata.branch, env_key, missing)
+        for test_id in missing:
+            cached[test_id] = loaded.get(test_id)
+        profiling.count("serve.test_stats_loads", len(missing))
+        
+        cutoff = (datetime.utcnow() - timedelta(days=self.store.stats_days)).isoformat()
+        stats = {}
+        for test_id in test_ids:
+            test_stats = cached[test_id]
+            if test_stats is None:
+                continue
+            if test_stats.oldest_at is not None and test_stats.oldest_at < cutoff:
+                test_stats = copy.deepcopy(test_stats)
+                test_stats.expire(self.store.stats_window, cutoff)
+            stats[test_id] = test_stats
+        return stats
+
+    def failure_clusters(self, run: Run, failures: List[TestCaseResult]) -> List[FailureCluster]:
+        repo = run.metadata.repo or ""
+        fingerprints = list(dict.fromkeys(tr.fingerprint for tr in failures if tr.fingerprint))
+        
+        missing = [fingerprint for fingerprint in fingerprints if (repo, fingerprint) not in self.clusters]
+        for fingerprint in missing:
+            self.clusters[(repo, fingerprint)] = {}
+        for key, state in self.store.get_cluster_states(repo, missing).items():
+            self.clusters[(repo, key[2])][key] = state
+        profiling.count("serve.cluster_loads", len(missing))
+        
+        cutoff = (datetime.utcnow() - timedelta(days=self.config.get_lookback_days())).isoformat()
+        clusters = []
+        for fingerprint in fingerprints:
+            states = list(self.clusters[(repo, fingerprint)].values())
+            if not states:
+                continue
+            cluster = merge_cluster_states(run.metadata.repo, None, fingerprint, states, cutoff, {run.run_id})
+            if cluster is not None:
+                clusters.append(cluster)
+        
+        for fingerprint in fingerprints:
+            self.clusters.move_to_end((repo, fingerprint))
+        _evict(self.clusters, MAX_WARM_CLUSTERS)
+        return clusters
+
+    def _update_clusters(self, run: Run):
+        metadata = run.metadata
+        repo = metadata.repo or ""
+        run_failures = {}
+        for tr in run.test_results:
+            if tr.outcome == "fail" and tr.fingerprint:
+                track_failure(run_failures, tr.test_id, tr.fingerprint, tr.failure_text)
+        
+        warm = {
+            fingerprint: failure for fingerprint, failure in run_failures.items()
+            if (repo, fingerprint) in self.clusters
+        }
+        if not warm:
+            return
+        
+        seen = metadata.started_at or metadata.ended_at
+        if seen is None:
+            for fingerprint in warm:
+                del self.clusters[(repo, fingerprint)]
+            return
+        
+        states = {}
+        for fingerprint in warm:
+            states.update(self.clusters[(repo, fingerprint)])
+        apply_cluster_failures(states, repo, metadata.branch or "", run.run_id, seen.isoformat(), warm)
+        
+        cutoff = (seen - timedelta(days=CLUSTER_WINDOW_DAYS)).isoformat()
+        for key, state in states.items():
+            state.expire(MAX_CLUSTER_WINDOW_RUNS, cutoff)
+            if state.window:
+                self.clusters[(repo, key[2])][key] = state
+            else:
+                self.clusters[(repo, key[2])].pop(key, None)
+
+    def _update_window(self, run: Run):
+        metadata = run.metadata
+        if not metadata.branch:
+            return
+        
+        key = (metadata.repo, metadata.branch)
+        window = self.windows.get(key)
+        if window is None or run.run_id in window:
+            history = super().history(run)
+            self.windows[key] = RunWindow.from_history(history, self.config.get_lookback_runs())
+        elif metadata.started_at:
+            window.add(run)
+        self.windows.move_to_end(key)
+        _evict(self.windows, MAX_WARM_WINDOWS)
+
+
+class WarmIndex:
+    def __init__(self, config_path: str = "rqg.yml", db_path: str = ".rqg/rqg.db"):
+        self.config_path = str(Path(config_path).resolve())
+        self.db_path = str(Path(db_path).resolve())
+        self.analyses = 0
+        self.reloads = 0
+        self.store: Optional[SQLiteStore] = None
+        self._load_config()
+
+    def close(self):
+        if self.store is not None:
+            self.fingerprint_cache.flush()
+            self.store.close()
+            self.store = None
+
+    def _config_stamp(self) -> Optional[int]:
+        try:
+            return os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load_config(self):
+        self.close()
+        self.config = load_config(self.config_path)
+        self._config_stamp_seen = self._config_stamp()
+        self.store = SQLiteStore(
+            self.db_path,
+            stats_window=self.config.get_lookback_runs(),
+            stats_days=self.config.get_lookback_days(),
+        )
+        self.fingerprint_cache = FingerprintCache(
+            maxsize=self.config.get_fingerprint_cache_size(),
+            store=self.store if self.config.get_fingerprint_cache_persist() else None,
+        )
+        self.reset()
+
+    def reset(self):
+        self.state = WarmState(self.config, self.store)
+
+    def refresh(self):
+        if self._config_stamp() != self._config_stamp_seen:
+            self._load_config()
+            self.reloads += 1
+        elif self.store.data_version() != self.state.data_version:
+            self.reset()
+            self.reloads += 1
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "config": self.config_path,
+            "db": self.db_path,
+            "analyses": self.analyses,
+            "reloads": self.reloads,
+            "history_windows": len(self.state.windows),
+            "clusters": sum(len(states) for states in self.state.clusters.values()),
+            "test_stats": sum(len(stats) for stats in self.state.stats.values()),
+            "cache_stats": self.fingerprint_cache.stats(),
+        }
+
+    def analyze(self, bundle_path: str, output_dir: str = "rqg") -> Dict[str, Any]:
+        with profiling.profiling() as profiler:
+            try:
+                return self._analyze(Path(bundle_path), Path(output_dir), profiler)
+            except Exception:
+                if self.store is not None:
+                    self.reset()
+                raise
+
+    def _analyze(self, bundle_file: Path, output_path: Path, profiler: profiling.Profiler) -> Dict[str, Any]:
+        self.refresh()
+        bundle = open_bundle(bundle_file)
+        decision = analyze_bundle(bundle, output_path, self.state, self.fingerprint_cache, profiler)
+        self.analyses += 1
+        return decision
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        config_path = request.get("config")
+        if config_path and str(Path(config_path).resolve()) != self.config_path:
+            raise ValueError(f"rqg serve is running with config {self.config_path}, not {config_path}")
+        if not request.get("bundle"):
+            raise ValueError("Request is missing 'bundle'")
+        
+        return self.analyze(request["bundle"], request.get("output_dir") or "rqg")
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, payload: Dict[str, Any]):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/status":
+            return self._reply(200, self.server.index.status())
+        return self._reply(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/analyze":
+            return self._reply(404, {"error": f"Unknown path: {self.path}"})
+        
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            decision = self.server.index.handle(request)
+        except (ValueError, FileNotFoundError) as e:
+            return self._reply(400, {"error": str(e)})
+        except Exception as e:
+            return self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+        return self._reply(200, {"decision": decision})
+
+
+class AnalysisServer(HTTPServer):
+    def __init__(self, address: Tuple[str, int], index: WarmIndex):
+        super().__init__(address, AnalysisHandler)
+        self.index = index
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class UnixAnalysisServer(socketserver.UnixStreamServer):
+        def __init__(self, path: str, index: WarmIndex):
+            if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+                os.unlink(path)
+            super().__init__(path, AnalysisHandler)
+            self.index = index
+
+        @property
+        def url(self) -> str:
+            return f"unix://{os.path.abspath(self.server_address)}"
+
+        def server_close(self):
+            super().server_close()
+            if os.path.exists(self.server_address):
+                os.unlink(self.server_address)
+
+
+def create_server(
+    index: WarmIndex,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None,
+):
+    if socket_path is None:
+        return AnalysisServer((host, port), index)
+    if not hasattr(socketserver, "UnixStreamServer"):
+        raise ValueError("Unix sockets are not supported on this platform; use --host/--port")
+    return UnixAnalysisServer(socket_path, index)
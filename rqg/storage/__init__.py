@@ -1,4 +1,4 @@
 from rqg.storage.sqlite_store import SQLiteStore
+from rqg.storage.history import HistoryTable
 
-__all__ = ["SQLiteStore"]
-
+__all__ = ["SQLiteStore", "HistoryTable"]
@@ -0,0 +1,146 @@
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Optional, Any, Iterable, Collection, Dict, Tuple
+from rqg.models import FailureCluster
+
+
+MAX_CLUSTER_TEST_IDS = 50
+
+MAX_CLUSTER_WINDOW_RUNS = 500
+
+CLUSTER_WINDOW_DAYS = 90
+
+EXAMPLE_FAILURE_TEXT_MAX_CHARS = 5000
+
+
+@dataclass
+class ClusterState:
+    first_seen_at: Optional[str] = None
+    last_seen_at: Optional[str] = None
+    example_failure_text: str = ""
+    infra_hints: List[str] = field(default_factory=list)
+    test_ids: List[str] = field(default_factory=list)
+    occurrence_count: int = 0
+    window: List[List[Any]] = field(default_factory=list)
+
+    def contains_run(self, run_id: str) -> bool:
+        return any(entry[0] == run_id for entry in self.window)
+
+    def add(self, run_id: str, seen_at: str, test_ids: Iterable[str], example_failure_text: Optional[str]):
+        if self.first_seen_at is None or seen_at < self.first_seen_at:
+            self.first_seen_at = seen_at
+        if self.last_seen_at is None or seen_at > self.last_seen_at:
+            self.last_seen_at = seen_at
+        
+        if not self.example_failure_text and example_failure_text:
+            self.example_failure_text = example_failure_text[:EXAMPLE_FAILURE_TEXT_MAX_CHARS]
+        
+        for test_id in test_ids:
+            if len(self.test_ids) >= MAX_CLUSTER_TEST_IDS:
+                break
+            if test_id not in self.test_ids:
+                self.test_ids.append(test_id)
+        
+        self.occurrence_count += 1
+        self.window.append([run_id, seen_at])
+        if len(self.window) > 1 and seen_at < self.window[-2][1]:
+            self.window.sort(key=lambda entry: entry[1])
+
+    def expire(self, max_entries: int, cutoff: Optional[str] = None):
+        drop = max(0, len(self.window) - max_entries)
+        while drop < len(self.window) and cutoff is not None and self.window[drop][1] < cutoff:
+            drop += 1
+        if drop:
+            del self.window[:drop]
+
+    def window_entries(self, cutoff: str, exclude_run_ids: Collection[str] = ()) -> List[List[Any]]:
+        return [
+            entry for entry in self.window
+            if entry[1] >= cutoff and entry[0] not in exclude_run_ids
+        ]
+
+    def to_row(self) -> tuple:
+        return (
+            self.first_seen_at,
+            self.last_seen_at,
+            self.example_failure_text,
+            json.dumps(self.infra_hints),
+            json.dumps(self.test_ids),
+            self.occurrence_count,
+            json.dumps(self.window, separators=(",", ":")),
+        )
+
+    @classmethod
+    def from_row(cls, row) -> "ClusterState":
+        return cls(
+            first_seen_at=row["first_seen_at"],
+            last_seen_at=row["last_seen_at"],
+            example_failure_text=row["example_failure_text"] or "",
+            infra_hints=json.loads(row["infra_hints"] or "[]"),
+            test_ids=json.loads(row["test_ids"] or "[]"),
+            occurrence_count=row["occurrence_count"] or 0,
+            window=json.loads(row["window"] or "[]"),
+        )
+
+
+def merge_cluster_states(
+    repo: str,
+    branch: Optional[str],
+    fingerprint: str,
+    states: List[ClusterState],
+    cutoff: str,
+    exclude_run_ids: Collection[str] = (),
+) -> Optional[FailureCluster]:
+    entries = {}
+    for state in states:
+        for run_id, seen_at in state.window_entries(cutoff, exclude_run_ids):
+            entries[run_id] = seen_at
+    
+    if not entries:
+        return None
+    
+    test_ids = []
+    for state in states:
+        for test_id in state.test_ids:
+            if test_id not in test_ids and len(test_ids) < MAX_CLUSTER_TEST_IDS:
+                test_ids.append(test_id)
+    
+    return FailureCluster(
+        fingerprint=fingerprint,
+        first_seen_at=datetime.fromisoformat(min(s.first_seen_at for s in states if s.first_seen_at)),
+        last_seen_at=datetime.fromisoformat(max(entries.values())),
+        example_failure_text=next((s.example_failure_text for s in states if s.example_failure_text), ""),
+        infra_hints=next((s.infra_hints for s in states if s.infra_hints), []),
+        test_ids=test_ids,
+        occurrence_count=len(entries),
+        repo=repo,
+        branch=branch,
+    )
+
+
+def track_failure(run_failures: dict, test_id: str, fingerprint: str, failure_text: Optional[str]):
+    failure = run_failures.get(fingerprint)
+    if failure is None:
+        run_failures[fingerprint] = ([test_id], failure_text)
+    elif test_id not in failure[0] and len(failure[0]) < MAX_CLUSTER_TEST_IDS:
+        failure[0].append(test_id)
+
+
+def apply_cluster_failures(
+    states: Dict[Tuple[str, str, str], ClusterState],
+    repo: str,
+    branch: str,
+    run_id: str,
+    seen_at: str,
+    run_failures: Dict[str, Tuple[List[str], Optional[str]]],
+):
+    cutoff = (datetime.fromisoformat(seen_at) - timedelta(days=CLUSTER_WINDOW_DAYS)).isoformat()
+    for fingerprint, (test_ids, failure_text) in run_failures.items():
+        state = states.get((repo, branch, fingerprint))
+        if state is None:
+            state = states[(repo, branch, fingerprint)] = ClusterState()
+        elif state.contains_run(run_id):
+            continue
+        state.add(run_id, seen_at, test_ids, failure_text)
+        state.expire(MAX_CLUSTER_WINDOW_RUNS, cutoff)
@@ -0,0 +1,212 @@
+from array import array
+from sys import intern
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
+from rqg.models import Run, RunMetadata, TestCaseResult
+
+
+NO_RETRY = 0xFFFF
+MAX_RETRY = 0xFFFE
+MAX_OUTCOMES = 127
+
+
+def _retry_value(retry_count: Optional[int]) -> int:
+    return NO_RETRY if retry_count is None else max(0, min(retry_count, MAX_RETRY))
+
+
+class HistoryTable:
+    __slots__ = (
+        "run_ids",
+        "run_metadata",
+        "run_commit",
+        "commits",
+        "test_ids",
+        "outcomes",
+        "row_run",
+        "row_test",
+        "row_outcome",
+        "row_retry",
+        "fingerprints",
+        "_test_index",
+        "_outcome_index",
+        "_commit_index",
+    )
+
+    def __init__(self):
+        self.run_ids: List[str] = []
+        self.run_metadata: List[RunMetadata] = []
+        self.run_commit = array("i")
+        self.commits: List[str] = []
+        self.test_ids: List[str] = []
+        self.outcomes: List[Optional[str]] = []
+        self.row_run = array("i")
+        self.row_test = array("i")
+        self.row_outcome = array("b")
+        self.row_retry = array("H")
+        self.fingerprints: Dict[int, str] = {}
+        self._test_index: Dict[str, int] = {}
+        self._outcome_index: Dict[Optional[str], int] = {}
+        self._commit_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.row_run)
+
+    @property
+    def run_count(self) -> int:
+        return len(self.run_ids)
+
+    def add_run(self, run_id: str, metadata: RunMetadata) -> int:
+        commit = self._commit_index.get(metadata.commit_sha)
+        if commit is None:
+            commit = self._commit_index[metadata.commit_sha] = len(self.commits)
+            self.commits.append(metadata.commit_sha)
+        
+        self.run_ids.append(run_id)
+        self.run_metadata.append(metadata)
+        self.run_commit.append(commit)
+        return len(self.run_ids) - 1
+
+    def append(
+        self,
+        run_index: int,
+        test_id: str,
+        outcome: Optional[str],
+        retry_count: Optional[int] = None,
+        fingerprint: Optional[str] = None,
+    ):
+        test = self._test_index.get(test_id)
+        if test is None:
+            test = self._test_code(test_id)
+        
+        code = self._outcome_index.get(outcome)
+        if code is None:
+            code = self._outcome_code(outcome)
+        
+        if fingerprint:
+            self.fingerprints[len(self.row_run)] = fingerprint
+        
+        self.row_run.append(run_index)
+        self.row_test.append(test)
+        self.row_outcome.append(code)
+        self.row_retry.append(NO_RETRY if retry_count is None else max(0, min(retry_count, MAX_RETRY)))
+
+    def _test_code(self, test_id: str) -> int:
+        test = self._test_index.get(test_id)
+        if test is None:
+            test = self._test_index[test_id] = len(self.test_ids)
+            self.test_ids.append(intern(test_id))
+        return test
+
+    def _outcome_code(self, outcome: Optional[str]) -> int:
+        code = self._outcome_index.get(outcome)
+        if code is None:
+            if len(self.outcomes) >= MAX_OUTCOMES:
+                raise ValueError(f"Too many distinct outcomes in history (max {MAX_OUTCOMES})")
+            code = self._outcome_index[outcome] = len(self.outcomes)
+            self.outcomes.append(outcome)
+        return code
+
+    def empty_like(self) -> "HistoryTable":
+        table = HistoryTable()
+        table.test_ids = list(self.test_ids)
+        table.outcomes = list(self.outcomes)
+        table._test_index = dict(self._test_index)
+        table._outcome_index = dict(self._outcome_index)
+        return table
+
+    def encode_rows(
+        self,
+        rows: Iterable[Tuple[str, Optional[str], Optional[int], Optional[str]]],
+    ) -> Tuple[array, array, array, Dict[int, str]]:
+        tests = array("i")
+        codes = array("b")
+        retries = array("H")
+        fingerprints = {}
+        for row, (test_id, outcome, retry_count, fingerprint) in enumerate(rows):
+            tests.append(self._test_code(test_id))
+            codes.append(self._outcome_code(outcome))
+            retries.append(_retry_value(retry_count))
+            if fingerprint:
+                fingerprints[row] = fingerprint
+        return tests, codes, retries, fingerprints
+
+    def extend_encoded(
+        self,
+        run_index: int,
+        tests: array,
+        codes: array,
+        retries: array,
+        fingerprints: Dict[int, str],
+    ):
+        offset = len(self.row_run)
+        for row, fingerprint in fingerprints.items():
+            self.fingerprints[offset + row] = fingerprint
+        
+        self.row_run.extend(array("i", [run_index]) * len(tests))
+        self.row_test.extend(tests)
+        self.row_outcome.extend(codes)
+        self.row_retry.extend(retries)
+
+    def extend_run(self, run: Run) -> int:
+        run_index = self.add_run(run.run_id, run.metadata)
+        for tr in run.test_results:
+            self.append(run_index, tr.test_id, tr.outcome, tr.retry_count, tr.fingerprint)
+        return run_index
+
+    @classmethod
+    def from_runs(cls, runs: List[Run]) -> "HistoryTable":
+        table = cls()
+        for run in runs:
+            table.extend_run(run)
+        return table
+
+    def test_index(self, test_id: str) -> Optional[int]:
+        return self._test_index.get(test_id)
+
+    def run_env_keys(self, env_key_fields: List[str]) -> List[str]:
+        return [metadata.env_key(env_key_fields) for metadata in self.run_metadata]
+
+    def partition(self, env_key_fields: List[str]) -> Dict[str, "HistoryTable"]:
+        partitions: Dict[str, HistoryTable] = {}
+        run_map = []
+        for run_id, metadata in zip(self.run_ids, self.run_metadata):
+            env_key = metadata.env_key(env_key_fields)
+            table = partitions.get(env_key)
+            if table is None:
+                table = partitions[env_key] = HistoryTable()
+            run_map.append((table, table.add_run(run_id, metadata)))
+        
+        test_ids = self.test_ids
+        outcomes = self.outcomes
+        fingerprints = self.fingerprints
+        for row, (run_index, test, code, retry) in enumerate(zip(self.row_run, self.row_test, self.row_outcome, self.row_retry)):
+            table, partition_run = run_map[run_index]
+            table.append(
+                partition_run,
+                test_ids[test],
+                outcomes[code],
+                None if retry == NO_RETRY else retry,
+                fingerprints.get(row),
+            )
+        return partitions
+
+    def iter_rows(self) -> Iterator[Tuple[int, str, Optional[str], Optional[int]]]:
+        test_ids = self.test_ids
+        outcomes = self.outcomes
+        for run_index, test, code, retry in zip(self.row_run, self.row_test, self.row_outcome, self.row_retry):
+            yield run_index, test_ids[test], outcomes[code], None if retry == NO_RETRY else retry
+
+    def to_runs(self) -> List[Run]:
+        runs = [
+            Run(run_id=run_id, metadata=metadata)
+            for run_id, metadata in zip(self.run_ids, self.run_metadata)
+        ]
+        fingerprints = self.fingerprints
+        for row, (run_index, test_id, outcome, retry_count) in enumerate(self.iter_rows()):
+            runs[run_index].test_results.append(TestCaseResult(
+                test_id=test_id,
+                suite=None,
+                outcome=outcome,
+                fingerprint=fingerprints.get(row),
+                retry_count=retry_count,
+            ))
+        return runs
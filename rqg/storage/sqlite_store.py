@@ -1,22 +1,190 @@
 import sqlite3
 import json
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Set, Tuple
 from datetime import datetime, timedelta
 from rqg.models import Run, RunMetadata, TestCaseResult, FailureCluster, FlakeScore
 from rqg.config import PolicyConfig
+from rqg import profiling
+from rqg.storage.test_stats import RollingTestStats
+from rqg.storage.history import HistoryTable
+from rqg.storage.failure_clusters import (
+    ClusterState,
+    merge_cluster_states,
+    track_failure,
+    apply_cluster_failures,
+)
+from rqg.fingerprint.similarity import pack_signature, unpack_signature
+
+
+RUN_ID_BATCH_SIZE = 500
+
+FAILURE_TEXT_MAX_CHARS = 10000
+
+FINGERPRINT_CACHE_MAX_ROWS = 100000
+
+BULK_DROPPABLE_INDEXES = {
+    "idx_test_results_test": "CREATE INDEX IF NOT EXISTS idx_test_results_test ON test_results(test_id)",
+    "idx_test_results_fingerprint": "CREATE INDEX IF NOT EXISTS idx_test_results_fingerprint ON test_results(fingerprint)",
+}
+
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+def result_row(tr: TestCaseResult) -> tuple:
+    return (
+        tr.test_id,
+        tr.suite,
+        tr.classname,
+        tr.name,
+        tr.duration_ms,
+        tr.outcome,
+        tr.failure_text[:FAILURE_TEXT_MAX_CHARS] if tr.failure_text else None,
+        tr.fingerprint,
+        tr.retry_count,
+    )
+
+
+def result_row_from_dict(d: Dict[str, Any]) -> tuple:
+    failure_text = d.get("failure_text")
+    return (
+        d["test_id"],
+        d.get("suite"),
+        d.get("classname"),
+        d.get("name"),
+        d.get("duration_ms"),
+        d.get("outcome", "pass"),
+        failure_text[:FAILURE_TEXT_MAX_CHARS] if failure_text else None,
+        d.get("fingerprint"),
+        d.get("retry_count"),
+    )
+
+
+def _track_observations(rows: Iterable[tuple], observations: list) -> Iterator[tuple]:
+    for row in rows:
+        observations.append((row[0], row[5], row[8]))
+        yield row
+
+
+def _track_failures(rows: Iterable[tuple], run_failures: dict) -> Iterator[tuple]:
+    for row in rows:
+        if row[5] == "fail" and row[7]:
+            track_failure(run_failures, row[0], row[7], row[6])
+        yield row
+
+
+def _apply_test_observations(
+    existing: Dict[str, RollingTestStats],
+    run_id: str,
+    metadata: RunMetadata,
+    observations: List[Tuple[str, str, Optional[int]]],
+    stats_window: int,
+    stats_days: int,
+) -> Set[str]:
+    started_at = metadata.started_at.isoformat()
+    cutoff = (metadata.started_at - timedelta(days=stats_days)).isoformat()
+    already_counted = {
+        test_id for test_id, stats in existing.items() if stats.contains_run(run_id)
+    }
+    
+    for test_id, outcome, retry_count in observations:
+        if test_id in already_counted:
+            continue
+        stats = existing.get(test_id)
+        if stats is None:
+            stats = existing[test_id] = RollingTestStats()
+        stats.add(
+            run_id,
+            started_at,
+            metadata.commit_sha,
+            outcome,
+            bool(retry_count and retry_count > 0),
+        )
+    
+    for stats in existing.values():
+        stats.expire(stats_window, cutoff)
+    return already_counted
+
+
+def _count_statement(statement: str):
+    profiling.count("sqlite.statements")
 
 
 class SQLiteStore:
-    def __init__(self, db_path: str = ".rqg/rqg.db"):
+    def __init__(
+        self,
+        db_path: str = ".rqg/rqg.db",
+        timeout: float = 30.0,
+        stats_window: int = 50,
+        stats_days: int = 14,
+    ):
         self.db_path = Path(db_path)
+        self.stats_window = stats_window
+        self.stats_days = stats_days
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._transaction_depth = 0
+        self._conn = self._connect(timeout)
         self._init_db()
     
-    def _init_db(self):
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+    def _connect(self, timeout: float) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        if profiling.active_profiler() is not None:
+            conn.set_trace_callback(_count_statement)
+        return conn
+    
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def __enter__(self) -> "SQLiteStore":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    @contextmanager
+    def transaction(self):
+        if self._transaction_depth:
+            self._transaction_depth += 1
+            try:
+                yield self._conn
+            finally:
+                self._transaction_depth -= 1
+            return
         
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._transaction_depth = 1
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        else:
+            self._conn.execute("COMMIT")
+        finally:
+            self._transaction_depth = 0
+    
+    def _init_db(self):
+        with self.transaction() as conn:
+            self._create_schema(conn.cursor())
+    
+    def _create_schema(self, cursor: sqlite3.Cursor):
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS runs (
                 run_id TEXT PRIMARY KEY,
@@ -57,101 +225,482 @@ class SQLiteStore:
             )
         """)
         
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_runs_commit ON runs(commit_sha);
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_runs_repo_branch ON runs(repo, branch);
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_test_results_run ON test_results(run_id);
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS run_shards (
+                run_id TEXT NOT NULL,
+                shard_index INTEGER NOT NULL,
+                shard_id TEXT,
+                source_run_id TEXT,
+                tests INTEGER,
+                passed INTEGER,
+                failed INTEGER,
+                skipped INTEGER,
+                duration_ms REAL,
+                slowest_ms REAL,
+                wall_ms REAL,
+                PRIMARY KEY (run_id, shard_index)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS test_stats (
+                repo TEXT,
+                branch TEXT,
+                test_id TEXT,
+                env_key TEXT,
+                total INTEGER,
+                fails INTEGER,
+                transitions INTEGER,
+                last_outcome TEXT,
+                retry_attempts INTEGER,
+                retry_passes INTEGER,
+                inconsistent_commits INTEGER,
+                oldest_at TEXT,
+                window TEXT,
+                commit_outcomes TEXT,
+                PRIMARY KEY (repo, branch, env_key, test_id)
+            )
+        """)
+        
+        self._create_failure_clusters(cursor)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS cluster_signatures (
+                repo TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                cluster_fingerprint TEXT NOT NULL,
+                signature BLOB,
+                PRIMARY KEY (repo, fingerprint)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS cluster_lsh (
+                repo TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                fingerprint TEXT NOT NULL,
+                PRIMARY KEY (repo, bucket, fingerprint)
+            ) WITHOUT ROWID
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprint_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                used_at TEXT
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_fingerprint_cache_used ON fingerprint_cache(used_at)
+        """)
+        
+        for create_index in BULK_DROPPABLE_INDEXES.values():
+            cursor.execute(create_index)
+    
+    def _create_failure_clusters(self, cursor: sqlite3.Cursor):
+        cursor.execute("PRAGMA table_info(failure_clusters)")
+        columns = {row[1] for row in cursor.fetchall()}
+        legacy = bool(columns) and "repo" not in columns
+        if legacy:
+            cursor.execute("ALTER TABLE failure_clusters RENAME TO failure_clusters_legacy")
+        
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS failure_clusters (
-                fingerprint TEXT PRIMARY KEY,
+                repo TEXT NOT NULL,
+                branch TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
                 first_seen_at TEXT,
                 last_seen_at TEXT,
                 example_failure_text TEXT,
                 infra_hints TEXT,
                 test_ids TEXT,
-                occurrence_count INTEGER DEFAULT 0
+                occurrence_count INTEGER DEFAULT 0,
+                window TEXT,
+                PRIMARY KEY (repo, branch, fingerprint)
             )
         """)
         
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_runs_commit ON runs(commit_sha);
+            CREATE INDEX IF NOT EXISTS idx_failure_clusters_repo_fingerprint
+            ON failure_clusters(repo, fingerprint)
         """)
         
+        if legacy:
+            self._rebuild_failure_clusters(cursor)
+            cursor.execute("DROP TABLE failure_clusters_legacy")
+    
+    def _rebuild_failure_clusters(self, cursor: sqlite3.Cursor):
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_runs_repo_branch ON runs(repo, branch);
+            SELECT fingerprint, example_failure_text, infra_hints
+            FROM failure_clusters_legacy
         """)
+        legacy_details = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
         
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_test_results_run ON test_results(run_id);
+            SELECT r.repo, r.branch, r.run_id,
+                COALESCE(r.started_at, r.ended_at) AS seen_at,
+                tr.test_id, tr.fingerprint, tr.failure_text
+            FROM test_results tr
+            JOIN runs r ON tr.run_id = r.run_id
+            WHERE tr.fingerprint IS NOT NULL
+                AND tr.outcome = 'fail'
+                AND COALESCE(r.started_at, r.ended_at) IS NOT NULL
+            ORDER BY seen_at, r.run_id, tr.id
         """)
         
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_test_results_test ON test_results(test_id);
-        """)
+        states = {}
+        run_failures = {}
+        current_run = None
+        for repo, branch, run_id, seen_at, test_id, fingerprint, failure_text in cursor.fetchall():
+            if current_run is not None and current_run[2] != run_id:
+                apply_cluster_failures(states, *current_run, run_failures)
+                run_failures = {}
+            current_run = (repo or "", branch or "", run_id, seen_at)
+            track_failure(run_failures, test_id, fingerprint, failure_text)
+        if current_run is not None:
+            apply_cluster_failures(states, *current_run, run_failures)
         
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_test_results_fingerprint ON test_results(fingerprint);
-        """)
+        for (_, _, fingerprint), state in states.items():
+            example_failure_text, infra_hints = legacy_details.get(fingerprint, (None, None))
+            if example_failure_text:
+                state.example_failure_text = example_failure_text
+            if infra_hints:
+                state.infra_hints = json.loads(infra_hints)
         
-        conn.commit()
-        conn.close()
+        self._write_cluster_states(cursor, states)
+    
+    def _write_cluster_states(self, cursor: sqlite3.Cursor, states: Dict[Tuple[str, str, str], ClusterState]):
+        cursor.executemany("""
+            INSERT OR REPLACE INTO failure_clusters (
+                repo, branch, fingerprint, first_seen_at, last_seen_at,
+                example_failure_text, infra_hints, test_ids, occurrence_count, window
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (key + state.to_row() for key, state in states.items()))
     
-    def save_run(self, run: Run):
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+    def _select_cluster_states(
+        self,
+        cursor: sqlite3.Cursor,
+        repo: str,
+        branch: Optional[str],
+        fingerprints: Optional[List[str]],
+    ) -> Dict[Tuple[str, str, str], ClusterState]:
+        scope = "repo = ?"
+        params = [repo]
+        if branch is not None:
+            scope += " AND branch = ?"
+            params.append(branch)
         
-        metadata = run.metadata
-        cursor.execute("""
-            INSERT OR REPLACE INTO runs (
-                run_id, repo, branch, commit_sha, ci_provider, workflow, job,
-                build_number, attempt, started_at, ended_at, os, browser,
-                device, runner_pool, shard_id, status
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        if fingerprints is None:
+            batches = [None]
+        else:
+            batches = [
+                fingerprints[start:start + RUN_ID_BATCH_SIZE]
+                for start in range(0, len(fingerprints), RUN_ID_BATCH_SIZE)
+            ]
+        
+        states = {}
+        cursor.row_factory = sqlite3.Row
+        for batch in batches:
+            if batch is None:
+                cursor.execute(f"SELECT * FROM failure_clusters WHERE {scope}", params)
+            else:
+                placeholders = ", ".join("?" * len(batch))
+                cursor.execute(f"""
+                    SELECT * FROM failure_clusters
+                    WHERE {scope} AND fingerprint IN ({placeholders})
+                """, params + batch)
+            for row in cursor:
+                states[(row["repo"], row["branch"], row["fingerprint"])] = ClusterState.from_row(row)
+        cursor.row_factory = None
+        
+        return states
+    
+    def _update_failure_clusters(
+        self,
+        cursor: sqlite3.Cursor,
+        run_id: str,
+        metadata: RunMetadata,
+        run_failures: Dict[str, Tuple[List[str], Optional[str]]],
+    ):
+        seen = metadata.started_at or metadata.ended_at or datetime.utcnow()
+        repo = metadata.repo or ""
+        branch = metadata.branch or ""
+        
+        states = self._select_cluster_states(cursor, repo, branch, list(run_failures))
+        apply_cluster_failures(states, repo, branch, run_id, seen.isoformat(), run_failures)
+        self._write_cluster_states(cursor, states)
+    
+    def save_run(self, run: Run, env_key: Optional[str] = None):
+        self.save_run_rows(
             run.run_id,
-            metadata.repo,
-            metadata.branch,
-            metadata.commit_sha,
-            metadata.ci_provider,
-            metadata.workflow,
-            metadata.job,
-            metadata.build_number,
-            metadata.attempt,
-            metadata.started_at.isoformat() if metadata.started_at else None,
-            metadata.ended_at.isoformat() if metadata.ended_at else None,
-            metadata.os,
-            metadata.browser,
-            metadata.device,
-            metadata.runner_pool,
-            metadata.shard_id,
-            "success" if all(tr.outcome == "pass" for tr in run.test_results) else "failure",
-        ))
+            run.metadata,
+            (result_row(tr) for tr in run.test_results),
+            env_key=env_key,
+        )
+    
+    def save_run_shards(self, run_id: str, shards: List[Dict[str, Any]]):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM run_shards WHERE run_id = ?", (run_id,))
+            conn.executemany("""
+                INSERT INTO run_shards (
+                    run_id, shard_index, shard_id, source_run_id, tests, passed,
+                    failed, skipped, duration_ms, slowest_ms, wall_ms
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
+                    run_id,
+                    index,
+                    shard.get("shard_id"),
+                    shard.get("run_id"),
+                    shard.get("tests"),
+                    shard.get("passed"),
+                    shard.get("failed"),
+                    shard.get("skipped"),
+                    shard.get("duration_ms"),
+                    shard.get("slowest_ms"),
+                    shard.get("wall_ms"),
+                )
+                for index, shard in enumerate(shards)
+            ])
+    
+    def get_run_shards(self, run_id: str) -> List[Dict[str, Any]]:
+        cursor = self._conn.cursor()
+        cursor.execute("""
+            SELECT shard_id, source_run_id, tests, passed, failed, skipped,
+                duration_ms, slowest_ms, wall_ms
+            FROM run_shards
+            WHERE run_id = ?
+            ORDER BY shard_index
+        """, (run_id,))
+        columns = ("shard_id", "run_id", "tests", "passed", "failed", "skipped", "duration_ms", "slowest_ms", "wall_ms")
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    @contextmanager
+    def bulk_ingest(self):
+        with self.transaction() as conn:
+            for index_name in BULK_DROPPABLE_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+        try:
+            yield self
+        finally:
+            with self.transaction() as conn:
+                for create_index in BULK_DROPPABLE_INDEXES.values():
+                    conn.execute(create_index)
+    
+    @profiling.timed("store.save_run_rows")
+    def save_run_rows(
+        self,
+        run_id: str,
+        metadata: RunMetadata,
+        rows: Iterable[tuple],
+        rebuild_indexes: bool = False,
+        env_key: Optional[str] = None,
+        test_stats: Optional[Dict[str, Optional[RollingTestStats]]] = None,
+    ):
+        observations = []
+        if env_key is not None:
+            rows = _track_observations(rows, observations)
         
-        cursor.execute("DELETE FROM test_results WHERE run_id = ?", (run.run_id,))
+        run_failures = {}
+        rows = _track_failures(rows, run_failures)
         
-        for tr in run.test_results:
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            
             cursor.execute("""
+                INSERT OR REPLACE INTO runs (
+                    run_id, repo, branch, commit_sha, ci_provider, workflow, job,
+                    build_number, attempt, started_at, ended_at, os, browser,
+                    device, runner_pool, shard_id, status
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)
+            """, (
+                run_id,
+                metadata.repo,
+                metadata.branch,
+                metadata.commit_sha,
+                metadata.ci_provider,
+                metadata.workflow,
+                metadata.job,
+                metadata.build_number,
+                metadata.attempt,
+                metadata.started_at.isoformat() if metadata.started_at else None,
+                metadata.ended_at.isoformat() if metadata.ended_at else None,
+                metadata.os,
+                metadata.browser,
+                metadata.device,
+                metadata.runner_pool,
+                metadata.shard_id,
+            ))
+            
+            cursor.execute("DELETE FROM test_results WHERE run_id = ?", (run_id,))
+            
+            if rebuild_indexes:
+                for index_name in BULK_DROPPABLE_INDEXES:
+                    cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+            
+            cursor.executemany("""
                 INSERT INTO test_results (
                     run_id, test_id, suite, classname, name, duration_ms,
                     outcome, failure_text, fingerprint, retry_count
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                run.run_id,
-                tr.test_id,
-                tr.suite,
-                tr.classname,
-                tr.name,
-                tr.duration_ms,
-                tr.outcome,
-                tr.failure_text[:10000] if tr.failure_text else None,
-                tr.fingerprint,
-                tr.retry_count,
-            ))
+            """, ((run_id,) + row for row in rows))
+            
+            if rebuild_indexes:
+                for create_index in BULK_DROPPABLE_INDEXES.values():
+                    cursor.execute(create_index)
+            
+            cursor.execute("""
+                UPDATE runs SET status = CASE
+                    WHEN EXISTS (
+                        SELECT 1 FROM test_results
+                        WHERE run_id = ? AND outcome IS NOT 'pass'
+                    ) THEN 'failure'
+                    ELSE 'success'
+                END
+                WHERE run_id = ?
+            """, (run_id, run_id))
+            
+            if run_failures:
+                self._update_failure_clusters(cursor, run_id, metadata, run_failures)
+            
+            if env_key is not None and metadata.started_at:
+                self._update_test_stats(cursor, run_id, metadata, env_key, observations, test_stats)
+    
+    def _update_test_stats(
+        self,
+        cursor: sqlite3.Cursor,
+        run_id: str,
+        metadata: RunMetadata,
+        env_key: str,
+        observations: List[Tuple[str, str, Optional[int]]],
+        cached: Optional[Dict[str, Optional[RollingTestStats]]] = None,
+    ):
+        test_ids = list(dict.fromkeys(test_id for test_id, _, _ in observations))
+        if cached is None:
+            existing = self._select_test_stats(cursor, metadata.repo, metadata.branch, env_key, test_ids)
+        else:
+            missing = [test_id for test_id in test_ids if test_id not in cached]
+            existing = self._select_test_stats(cursor, metadata.repo, metadata.branch, env_key, missing)
+            existing.update((test_id, cached[test_id]) for test_id in test_ids if cached.get(test_id) is not None)
         
-        conn.commit()
-        conn.close()
+        already_counted = _apply_test_observations(
+            existing, run_id, metadata, observations, self.stats_window, self.stats_days
+        )
+        if cached is not None:
+            cached.update(existing)
+        
+        cursor.executemany("""
+            INSERT OR REPLACE INTO test_stats (
+                repo, branch, test_id, env_key, total, fails, transitions,
+                last_outcome, retry_attempts, retry_passes, inconsistent_commits,
+                oldest_at, window, commit_outcomes
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (metadata.repo, metadata.branch, test_id, env_key) + stats.to_row()
+            for test_id, stats in existing.items()
+            if test_id not in already_counted
+        ))
+    
+    def _select_test_stats(
+        self,
+        cursor: sqlite3.Cursor,
+        repo: str,
+        branch: str,
+        env_key: str,
+        test_ids: List[str],
+    ) -> Dict[str, RollingTestStats]:
+        stats = {}
+        cursor.row_factory = sqlite3.Row
+        for start in range(0, len(test_ids), RUN_ID_BATCH_SIZE):
+            batch = test_ids[start:start + RUN_ID_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            cursor.execute(f"""
+                SELECT * FROM test_stats
+                WHERE repo = ? AND branch = ? AND env_key = ? AND test_id IN ({placeholders})
+            """, [repo, branch, env_key] + batch)
+            for row in cursor:
+                stats[row["test_id"]] = RollingTestStats.from_row(row)
+        cursor.row_factory = None
+        return stats
+    
+    def load_test_stats(
+        self,
+        repo: str,
+        branch: str,
+        env_key: str,
+        test_ids: Iterable[str],
+    ) -> Dict[str, RollingTestStats]:
+        return self._select_test_stats(self._conn.cursor(), repo, branch, env_key, list(dict.fromkeys(test_ids)))
+    
+    @profiling.timed("store.get_test_stats")
+    def get_test_stats(
+        self,
+        repo: str,
+        branch: str,
+        env_key: str,
+        test_ids: Iterable[str],
+    ) -> Dict[str, RollingTestStats]:
+        cursor = self._conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cutoff = (datetime.utcnow() - timedelta(days=self.stats_days)).isoformat()
+        test_ids = list(dict.fromkeys(test_ids))
+        
+        stats = {}
+        expired = []
+        for start in range(0, len(test_ids), RUN_ID_BATCH_SIZE):
+            batch = test_ids[start:start + RUN_ID_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            cursor.execute(f"""
+                SELECT test_id, total, fails, transitions, retry_attempts, retry_passes,
+                    inconsistent_commits, oldest_at
+                FROM test_stats
+                WHERE repo = ? AND branch = ? AND env_key = ? AND test_id IN ({placeholders})
+            """, [repo, branch, env_key] + batch)
+            
+            for row in cursor:
+                if row["oldest_at"] is not None and row["oldest_at"] < cutoff:
+                    expired.append(row["test_id"])
+                else:
+                    stats[row["test_id"]] = RollingTestStats.from_counters(row)
+        
+        for start in range(0, len(expired), RUN_ID_BATCH_SIZE):
+            batch = expired[start:start + RUN_ID_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            cursor.execute(f"""
+                SELECT * FROM test_stats
+                WHERE repo = ? AND branch = ? AND env_key = ? AND test_id IN ({placeholders})
+            """, [repo, branch, env_key] + batch)
+            
+            for row in cursor:
+                test_stats = RollingTestStats.from_row(row)
+                test_stats.expire(self.stats_window, cutoff)
+                stats[row["test_id"]] = test_stats
+        
+        profiling.count("store.test_stats_rows", len(stats))
+        return stats
     
     def get_recent_runs(self, repo: str, branch: Optional[str] = None, 
                        lookback_runs: int = 50, lookback_days: int = 14) -> List[Run]:
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        return self.get_history(repo, branch, lookback_runs, lookback_days).to_runs()
+    
+    @profiling.timed("store.get_history")
+    def get_history(self, repo: str, branch: Optional[str] = None,
+                    lookback_runs: int = 50, lookback_days: int = 14) -> HistoryTable:
+        cursor = self._conn.cursor()
+        cursor.row_factory = sqlite3.Row
         
         cutoff_date = (datetime.utcnow() - timedelta(days=lookback_days)).isoformat()
         
@@ -169,12 +718,10 @@ class SQLiteStore:
         params.append(lookback_runs)
         
         cursor.execute(query, params)
-        rows = cursor.fetchall()
         
-        runs = []
-        for row in rows:
-            run_id = row["run_id"]
-            metadata = RunMetadata(
+        history = HistoryTable()
+        for row in cursor.fetchall():
+            history.add_run(row["run_id"], RunMetadata(
                 repo=row["repo"],
                 branch=row["branch"],
                 commit_sha=row["commit_sha"],
@@ -190,113 +737,189 @@ class SQLiteStore:
                 device=row["device"],
                 runner_pool=row["runner_pool"],
                 shard_id=row["shard_id"],
-            )
-            
-            cursor.execute("SELECT * FROM test_results WHERE run_id = ?", (run_id,))
-            test_rows = cursor.fetchall()
-            
-            test_results = []
-            for tr_row in test_rows:
-                test_results.append(TestCaseResult(
-                    test_id=tr_row["test_id"],
-                    suite=tr_row["suite"],
-                    classname=tr_row["classname"],
-                    name=tr_row["name"],
-                    duration_ms=tr_row["duration_ms"],
-                    outcome=tr_row["outcome"],
-                    failure_text=tr_row["failure_text"],
-                    fingerprint=tr_row["fingerprint"],
-                    retry_count=tr_row["retry_count"],
-                ))
+            ))
+        
+        results_cursor = self._conn.cursor()
+        append = history.append
+        
+        batch_size = RUN_ID_BATCH_SIZE // 2
+        for start in range(0, history.run_count, batch_size):
+            batch = list(enumerate(history.run_ids[start:start + batch_size], start))
+            ordering = ", ".join("(?, ?)" for _ in batch)
+            results_cursor.execute(f"""
+                WITH ordering(position, run_id) AS (VALUES {ordering})
+                SELECT o.position, tr.test_id, tr.outcome, tr.retry_count, tr.fingerprint
+                FROM ordering o
+                JOIN test_results tr ON tr.run_id = o.run_id
+                ORDER BY o.position, tr.id
+            """, [value for pair in batch for value in pair])
             
-            runs.append(Run(run_id=run_id, metadata=metadata, test_results=test_results))
+            for position, test_id, outcome, retry_count, fingerprint in results_cursor:
+                append(position, test_id, outcome, retry_count, fingerprint)
         
-        conn.close()
-        return runs
+        profiling.count("store.history_runs", history.run_count)
+        profiling.count("store.history_rows", len(history))
+        return history
     
-    def get_failure_clusters(self, lookback_days: int = 14) -> List[FailureCluster]:
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    def get_failure_text(self, run_id: str, test_id: str) -> Optional[str]:
+        cursor = self._conn.cursor()
+        cursor.execute("""
+            SELECT failure_text FROM test_results
+            WHERE run_id = ? AND test_id = ? AND failure_text IS NOT NULL
+            ORDER BY id
+            LIMIT 1
+        """, (run_id, test_id))
         
-        cutoff_date = (datetime.utcnow() - timedelta(days=lookback_days)).isoformat()
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    @profiling.timed("store.get_failure_clusters")
+    def get_failure_clusters(
+        self,
+        repo: str,
+        fingerprints: Optional[Iterable[str]] = None,
+        lookback_days: int = 14,
+        branch: Optional[str] = None,
+        exclude_run_id: Optional[str] = None,
+        exclude_run_ids: Iterable[str] = (),
+    ) -> List[FailureCluster]:
+        cutoff = (datetime.utcnow() - timedelta(days=lookback_days)).isoformat()
+        excluded = set(exclude_run_ids)
+        if exclude_run_id is not None:
+            excluded.add(exclude_run_id)
+        if fingerprints is not None:
+            fingerprints = list(dict.fromkeys(fingerprints))
+            if not fingerprints:
+                return []
         
-        cursor.execute("""
-            SELECT 
-                tr.fingerprint,
-                MIN(r.started_at) as first_seen,
-                MAX(r.started_at) as last_seen,
-                COUNT(DISTINCT tr.run_id) as occurrence_count
-            FROM test_results tr
-            JOIN runs r ON tr.run_id = r.run_id
-            WHERE tr.fingerprint IS NOT NULL 
-                AND tr.outcome = 'fail'
-                AND r.started_at >= ?
-            GROUP BY tr.fingerprint
-        """, (cutoff_date,))
+        states = self._select_cluster_states(self._conn.cursor(), repo or "", branch, fingerprints)
+        profiling.count("store.cluster_rows", len(states))
         
-        rows = cursor.fetchall()
+        grouped = {}
+        for (_, _, fingerprint), state in states.items():
+            grouped.setdefault(fingerprint, []).append(state)
         
         clusters = []
-        for row in rows:
-            fingerprint = row["fingerprint"]
-            
-            cursor.execute("""
-                SELECT example_failure_text, infra_hints, test_ids
-                FROM failure_clusters
-                WHERE fingerprint = ?
-            """, (fingerprint,))
-            
-            cluster_row = cursor.fetchone()
-            if cluster_row:
-                example_text = cluster_row["example_failure_text"]
-                infra_hints = json.loads(cluster_row["infra_hints"] or "[]")
-                test_ids = json.loads(cluster_row["test_ids"] or "[]")
-            else:
-                cursor.execute("""
-                    SELECT failure_text, test_id
-                    FROM test_results
-                    WHERE fingerprint = ? AND failure_text IS NOT NULL
-                    LIMIT 1
-                """, (fingerprint,))
-                
-                example_row = cursor.fetchone()
-                example_text = example_row["failure_text"] if example_row else ""
-                infra_hints = []
-                test_ids = [example_row["test_id"]] if example_row else []
-            
-            clusters.append(FailureCluster(
-                fingerprint=fingerprint,
-                first_seen_at=datetime.fromisoformat(row["first_seen"]),
-                last_seen_at=datetime.fromisoformat(row["last_seen"]),
-                example_failure_text=example_text,
-                infra_hints=infra_hints,
-                test_ids=test_ids,
-                occurrence_count=row["occurrence_count"],
-            ))
+        for fingerprint, fingerprint_states in grouped.items():
+            cluster = merge_cluster_states(
+                repo, branch, fingerprint, fingerprint_states, cutoff, excluded
+            )
+            if cluster is not None:
+                clusters.append(cluster)
         
-        conn.close()
         return clusters
     
-    def update_failure_cluster(self, cluster: FailureCluster):
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
+    def get_cluster_states(self, repo: str, fingerprints: Iterable[str]) -> Dict[Tuple[str, str, str], ClusterState]:
+        fingerprints = list(dict.fromkeys(fingerprints))
+        if not fingerprints:
+            return {}
+        return self._select_cluster_states(self._conn.cursor(), repo or "", None, fingerprints)
+    
+    def data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    @profiling.timed("store.get_cluster_alias")
+    def get_cluster_alias(self, repo: str, fingerprint: str) -> Optional[str]:
+        cursor = self._conn.cursor()
         cursor.execute("""
-            INSERT OR REPLACE INTO failure_clusters (
-                fingerprint, first_seen_at, last_seen_at, example_failure_text,
-                infra_hints, test_ids, occurrence_count
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            cluster.fingerprint,
-            cluster.first_seen_at.isoformat(),
-            cluster.last_seen_at.isoformat(),
-            cluster.example_failure_text[:5000],
-            json.dumps(cluster.infra_hints),
-            json.dumps(cluster.test_ids),
-            cluster.occurrence_count,
-        ))
+            SELECT cluster_fingerprint FROM cluster_signatures
+            WHERE repo = ? AND fingerprint = ?
+        """, (repo, fingerprint))
+        
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    @profiling.timed("store.find_cluster_candidates")
+    def find_cluster_candidates(self, repo: str, buckets: List[int]) -> List[Tuple[str, Tuple[int, ...]]]:
+        if not buckets:
+            return []
+        
+        placeholders = ", ".join("?" * len(buckets))
+        cursor = self._conn.cursor()
+        cursor.execute(f"""
+            SELECT s.fingerprint, s.signature
+            FROM cluster_signatures s
+            WHERE s.repo = ? AND s.fingerprint IN (
+                SELECT l.fingerprint FROM cluster_lsh l
+                WHERE l.repo = ? AND l.bucket IN ({placeholders})
+            )
+        """, [repo, repo] + list(buckets))
         
-        conn.commit()
-        conn.close()
+        return [(fingerprint, unpack_signature(signature)) for fingerprint, signature in cursor.fetchall()]
+    
+    @profiling.timed("store.save_cluster_signature")
+    def save_cluster_signature(
+        self,
+        repo: str,
+        fingerprint: str,
+        cluster_fingerprint: str,
+        signature: Tuple[int, ...],
+        buckets: Optional[List[int]] = None,
+    ):
+        with self.transaction() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO cluster_signatures (
+                    repo, fingerprint, cluster_fingerprint, signature
+                ) VALUES (?, ?, ?, ?)
+            """, (repo, fingerprint, cluster_fingerprint, pack_signature(signature)))
+            
+            if buckets:
+                conn.executemany("""
+                    INSERT OR IGNORE INTO cluster_lsh (repo, bucket, fingerprint) VALUES (?, ?, ?)
+                """, ((repo, bucket, fingerprint) for bucket in buckets))
+    
+    @profiling.timed("store.get_cached_value")
+    def get_cached_value(self, key: str) -> Optional[str]:
+        cursor = self._conn.cursor()
+        cursor.execute("SELECT value FROM fingerprint_cache WHERE key = ?", (key,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    @profiling.timed("store.save_cached_values")
+    def save_cached_values(self, items: Iterable[Tuple[str, str]]):
+        used_at = datetime.utcnow().isoformat()
+        with self.transaction() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO fingerprint_cache (key, value, used_at) VALUES (?, ?, ?)
+            """, ((key, value, used_at) for key, value in items))
+            
+            conn.execute("""
+                DELETE FROM fingerprint_cache WHERE used_at < (
+                    SELECT used_at FROM fingerprint_cache
+                    ORDER BY used_at DESC
+                    LIMIT 1 OFFSET ?
+                )
+            """, (FINGERPRINT_CACHE_MAX_ROWS,))
+    
+    def update_failure_cluster(self, cluster: FailureCluster):
+        self.update_failure_clusters([cluster])
+    
+    def update_failure_clusters(self, clusters: Iterable[FailureCluster]):
+        with self.transaction() as conn:
+            conn.executemany("""
+                INSERT INTO failure_clusters (
+                    repo, branch, fingerprint, first_seen_at, last_seen_at,
+                    example_failure_text, infra_hints, test_ids, occurrence_count, window
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, '[]')
+                ON CONFLICT (repo, branch, fingerprint) DO UPDATE SET
+                    first_seen_at = excluded.first_seen_at,
+                    last_seen_at = excluded.last_seen_at,
+                    example_failure_text = excluded.example_failure_text,
+                    infra_hints = excluded.infra_hints,
+                    test_ids = excluded.test_ids,
+                    occurrence_count = excluded.occurrence_count
+            """, (
+                (
+                    cluster.repo or "",
+                    cluster.branch or "",
+                    cluster.fingerprint,
+                    cluster.first_seen_at.isoformat(),
+                    cluster.last_seen_at.isoformat(),
+                    cluster.example_failure_text[:5000],
+                    json.dumps(cluster.infra_hints),
+                    json.dumps(cluster.test_ids),
+                    cluster.occurrence_count,
+                )
+                for cluster in clusters
+            ))
 
@@ -0,0 +1,119 @@
+import json
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Any
+
+
+@dataclass
+class RollingTestStats:
+    total: int = 0
+    fails: int = 0
+    transitions: int = 0
+    retry_attempts: int = 0
+    retry_passes: int = 0
+    inconsistent_commits: int = 0
+    window: List[List[Any]] = field(default_factory=list)
+    commit_outcomes: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    
+    @property
+    def last_outcome(self) -> Optional[str]:
+        return self.window[-1][3] if self.window else None
+    
+    @property
+    def oldest_at(self) -> Optional[str]:
+        return self.window[0][1] if self.window else None
+    
+    def contains_run(self, run_id: str) -> bool:
+        return any(entry[0] == run_id for entry in self.window)
+    
+    def add(self, run_id: str, started_at: str, commit: str, outcome: str, retried: bool):
+        last_outcome = self.last_outcome
+        if last_outcome and last_outcome != outcome:
+            self.transitions += 1
+        
+        self.window.append([run_id, started_at, commit, outcome, retried])
+        self.total += 1
+        
+        if outcome == "fail":
+            self.fails += 1
+        
+        if retried:
+            self.retry_attempts += 1
+            if outcome == "pass":
+                self.retry_passes += 1
+        
+        counts = self.commit_outcomes.setdefault(commit, {})
+        distinct_before = len(counts)
+        counts[outcome] = counts.get(outcome, 0) + 1
+        if distinct_before == 1 and len(counts) == 2:
+            self.inconsistent_commits += 1
+    
+    def evict_oldest(self):
+        run_id, started_at, commit, outcome, retried = self.window.pop(0)
+        
+        if self.window and outcome and outcome != self.window[0][3]:
+            self.transitions -= 1
+        
+        self.total -= 1
+        
+        if outcome == "fail":
+            self.fails -= 1
+        
+        if retried:
+            self.retry_attempts -= 1
+            if outcome == "pass":
+                self.retry_passes -= 1
+        
+        counts = self.commit_outcomes[commit]
+        distinct_before = len(counts)
+        counts[outcome] -= 1
+        if counts[outcome] == 0:
+            del counts[outcome]
+        if distinct_before == 2 and len(counts) == 1:
+            self.inconsistent_commits -= 1
+        if not counts:
+            del self.commit_outcomes[commit]
+    
+    def expire(self, max_entries: int, cutoff: Optional[str] = None):
+        while self.window and (
+            len(self.window) > max_entries
+            or (cutoff is not None and self.window[0][1] < cutoff)
+        ):
+            self.evict_oldest()
+    
+    def to_row(self) -> tuple:
+        return (
+            self.total,
+            self.fails,
+            self.transitions,
+            self.last_outcome,
+            self.retry_attempts,
+            self.retry_passes,
+            self.inconsistent_commits,
+            self.oldest_at,
+            json.dumps(self.window, separators=(",", ":")),
+            json.dumps(self.commit_outcomes, separators=(",", ":")),
+        )
+    
+    @classmethod
+    def from_counters(cls, row) -> "RollingTestStats":
+        return cls(
+            total=row["total"],
+            fails=row["fails"],
+            transitions=row["transitions"],
+            retry_attempts=row["retry_attempts"],
+            retry_passes=row["retry_passes"],
+            inconsistent_commits=row["inconsistent_commits"],
+        )
+    
+    @classmethod
+    def from_row(cls, row) -> "RollingTestStats":
+        return cls(
+            total=row["total"],
+            fails=row["fails"],
+            transitions=row["transitions"],
+            retry_attempts=row["retry_attempts"],
+            retry_passes=row["retry_passes"],
+            inconsistent_commits=row["inconsistent_commits"],
+            window=json.loads(row["window"]),
+            commit_outcomes=json.loads(row["commit_outcomes"]),
+        )
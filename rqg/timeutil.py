@@ -0,0 +1,57 @@
+import re
+from datetime import datetime, timezone, timedelta, tzinfo
+from typing import Optional, Tuple
+
+
+TIMESTAMP_PATTERN = re.compile(
+    r"^\s*(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:[.,](\d+))?\s*(Z|[+-]\d{2}:?\d{2})?\s*$",
+    re.IGNORECASE,
+)
+
+ZONE_PATTERN = re.compile(r"^\s*(Z|UTC|[+-]\d{2}:?\d{2})\s*$", re.IGNORECASE)
+
+
+def _zone(value: str) -> timezone:
+    if value.upper() in ("Z", "UTC"):
+        return timezone.utc
+    value = value.replace(":", "")
+    offset = timedelta(hours=int(value[1:3]), minutes=int(value[3:5]))
+    return timezone(-offset if value[0] == "-" else offset)
+
+
+def parse_timezone(value: Optional[str]) -> Optional[tzinfo]:
+    if not value:
+        return None
+    
+    match = ZONE_PATTERN.match(value)
+    if match is None:
+        raise ValueError(f"Invalid timezone '{value}': expected UTC, Z or a +HH:MM offset")
+    return _zone(match.group(1))
+
+
+def parse_timestamp(value: Optional[str], default_tz: Optional[tzinfo] = None) -> Optional[Tuple[float, bool]]:
+    if not value:
+        return None
+    
+    match = TIMESTAMP_PATTERN.match(value)
+    if match is None:
+        return None
+    
+    year, month, day, hour, minute, second, fraction, zone = match.groups()
+    tz = _zone(zone) if zone else default_tz
+    
+    try:
+        moment = datetime(
+            int(year), int(month), int(day), int(hour), int(minute), int(second),
+            tzinfo=tz or timezone.utc,
+        )
+    except ValueError:
+        return None
+    return moment.timestamp() + (float(f"0.{fraction}") if fraction else 0.0), tz is not None
+
+
+def format_timestamp(epoch: float, aware: bool = True) -> str:
+    moment = datetime.fromtimestamp(epoch, timezone.utc)
+    if not aware:
+        return moment.replace(tzinfo=None).isoformat()
+    return moment.isoformat().replace("+00:00", "Z")
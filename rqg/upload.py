@@ -1,34 +1,222 @@
 from pathlib import Path
-import json
 import os
-from typing import Optional
+import zlib
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple, Union
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from rqg.bundle import BundleReader, find_bundles
 
 
-def upload_bundle(bundle_path: str, api_url: Optional[str] = None, token: Optional[str] = None):
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_TIMEOUT = (10.0, 120.0)
+READ_BLOCK_SIZE = 1024 * 1024
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+RETRY_METHODS = frozenset({"GET", "PUT"})
+
+
+def iter_file_range(path: Path, offset: int = 0, length: Optional[int] = None) -> Iterator[bytes]:
+    remaining = length
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while remaining is None or remaining > 0:
+            block = f.read(READ_BLOCK_SIZE if remaining is None else min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            if remaining is not None:
+                remaining -= len(block)
+            yield block
+
+
+def gzip_file_range(path: Path, offset: int = 0, length: Optional[int] = None) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    parts = [compressor.compress(block) for block in iter_file_range(path, offset, length)]
+    parts.append(compressor.flush())
+    return b"".join(parts)
+
+
+def file_digest(path: Path, offset: int = 0, length: Optional[int] = None) -> str:
+    digest = hashlib.sha256()
+    for block in iter_file_range(path, offset, length):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+class BundleUploader:
+    def __init__(
+        self,
+        api_url: str,
+        token: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_workers: int = DEFAULT_WORKERS,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+    ):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        
+        self.api_url = api_url.rstrip("/")
+        self.chunk_size = chunk_size
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.session = requests.Session()
+        
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=self.max_workers,
+            pool_maxsize=self.max_workers,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self) -> "BundleUploader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        response = self.session.request(method, f"{self.api_url}{path}", timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def upload(self, bundle_path: Union[str, Path]) -> Dict[str, Any]:
+        bundle_file = Path(bundle_path)
+        if not bundle_file.exists():
+            raise FileNotFoundError(f"Bundle not found: {bundle_path}")
+        
+        reader = BundleReader(bundle_file)
+        size = bundle_file.stat().st_size
+        headers = {
+            "Content-Encoding": "gzip",
+            "Content-Type": "application/json" if reader.is_legacy else "application/x-ndjson",
+            "X-RQG-Run-Id": reader.run_id,
+        }
+        
+        if size <= self.chunk_size:
+            response = self._request(
+                "POST",
+                "/api/v1/bundles",
+                data=gzip_file_range(bundle_file),
+                headers=headers,
+            )
+            return response.json()
+        
+        return self._upload_chunked(bundle_file, reader.run_id, size, headers)
+
+    def _upload_chunked(self, bundle_file: Path, run_id: str, size: int, headers: Dict[str, str]) -> Dict[str, Any]:
+        chunks = (size + self.chunk_size - 1) // self.chunk_size
+        upload = self._request("POST", "/api/v1/uploads", json={
+            "run_id": run_id,
+            "filename": bundle_file.name,
+            "content_type": headers["Content-Type"],
+            "size": size,
+            "sha256": file_digest(bundle_file),
+            "chunk_size": self.chunk_size,
+            "chunks": chunks,
+        }).json()
+        
+        upload_id = upload["upload_id"]
+        received = set(upload.get("received", []))
+        pending = [index for index in range(chunks) if index not in received]
+
+        def upload_chunk(index: int):
+            offset = index * self.chunk_size
+            length = min(self.chunk_size, size - offset)
+            self._request(
+                "PUT",
+                f"/api/v1/uploads/{upload_id}/chunks/{index}",
+                data=gzip_file_range(bundle_file, offset, length),
+                headers={
+                    "Content-Encoding": "gzip",
+                    "Content-Type": "application/octet-stream",
+                    "X-RQG-Chunk-Offset": str(offset),
+                    "X-RQG-Chunk-Sha256": file_digest(bundle_file, offset, length),
+                },
+            )
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(pending)))) as executor:
+            list(executor.map(upload_chunk, pending))
+        
+        result = self._request("POST", f"/api/v1/uploads/{upload_id}/complete").json()
+        result.setdefault("chunks_uploaded", len(pending))
+        result.setdefault("chunks_resumed", len(received))
+        return result
+
+    def upload_many(
+        self,
+        bundle_paths: Iterable[Union[str, Path]],
+        parallel: int = DEFAULT_WORKERS,
+    ) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+        def upload_one(path):
+            try:
+                return str(path), self.upload(path), None
+            except Exception as e:
+                return str(path), None, str(e)
+        
+        bundle_paths = list(bundle_paths)
+        with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(bundle_paths) or 1))) as executor:
+            return list(executor.map(upload_one, bundle_paths))
+
+
+def _resolve_api(api_url: Optional[str], token: Optional[str]) -> Tuple[str, Optional[str]]:
     api_url = api_url or os.getenv("RQG_API_URL")
     token = token or os.getenv("RQG_API_TOKEN")
     
     if not api_url:
         raise ValueError("API URL not provided. Set RQG_API_URL env var or use --api-url")
     
-    bundle_file = Path(bundle_path)
-    if not bundle_file.exists():
-        raise FileNotFoundError(f"Bundle not found: {bundle_path}")
-    
-    with open(bundle_file, "r", encoding="utf-8") as f:
-        bundle_data = json.load(f)
+    return api_url, token
+
+
+def upload_bundle(
+    bundle_path: str,
+    api_url: Optional[str] = None,
+    token: Optional[str] = None,
+    **options,
+) -> Dict[str, Any]:
+    api_url, token = _resolve_api(api_url, token)
     
-    headers = {"Content-Type": "application/json"}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
+    with BundleUploader(api_url, token=token, **options) as uploader:
+        return uploader.upload(bundle_path)
+
+
+def upload_bundles(
+    bundle_dir: str,
+    api_url: Optional[str] = None,
+    token: Optional[str] = None,
+    parallel: int = DEFAULT_WORKERS,
+    **options,
+) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    api_url, token = _resolve_api(api_url, token)
     
-    response = requests.post(
-        f"{api_url}/api/v1/bundles",
-        json=bundle_data,
-        headers=headers,
-    )
+    bundle_paths = find_bundles(bundle_dir)
+    if not bundle_paths:
+        raise FileNotFoundError(f"No bundles found in {bundle_dir}")
     
-    response.raise_for_status()
-    return response.json()
-
+    options.setdefault("max_workers", parallel)
+    with BundleUploader(api_url, token=token, **options) as uploader:
+        return uploader.upload_many(bundle_paths, parallel=parallel)
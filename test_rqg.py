@@ -1,9 +1,14 @@
 import os
+import json
 import sys
 import shutil
 from pathlib import Path
 from rqg.collect import collect_artifacts
 from rqg.analyze import analyze_run
+from rqg.config import PolicyConfig
+from rqg.models import Run, RunMetadata, TestCaseResult
+from rqg.scoring import compute_flake_scores, compute_flake_scores_batch, compute_flake_scores_from_stats
+from rqg.storage import SQLiteStore
 
 if sys.platform == 'win32':
     import codecs
@@ -144,6 +149,989 @@ def test_with_fixtures():
             if Path(f).exists():
                 Path(f).unlink()
 
+def _synthetic_history(run_count=40, tests_per_run=30, seed=7):
+    import random
+    
+    rng = random.Random(seed)
+    runs = []
+    for i in range(run_count):
+        metadata = RunMetadata(
+            repo="test/repo",
+            branch="main",
+            commit_sha=rng.choice(["c1", "c2", "c3", "c4"]),
+            os=rng.choice(["linux", "macos", None]),
+        )
+        test_results = [
+            TestCaseResult(
+                test_id=f"suite.Test::case_{rng.randrange(tests_per_run)}",
+                suite="suite",
+                outcome=rng.choice(["pass", "pass", "pass", "fail", "skip"]),
+                retry_count=rng.choice([None, 0, 1]),
+            )
+            for _ in range(tests_per_run)
+        ]
+        runs.append(Run(run_id=f"run-{i}", metadata=metadata, test_results=test_results))
+    return runs
+
+
+def test_flake_scores_batch_matches_single():
+    config = PolicyConfig.from_dict({})
+    runs = _synthetic_history()
+    keys = {
+        (f"suite.Test::case_{i}", env_key)
+        for i in range(35)
+        for env_key in ["os=linux", "os=macos", "default"]
+    }
+    
+    batch = compute_flake_scores_batch(runs, config, keys=keys)
+    
+    assert set(batch) == keys
+    for test_id, env_key in keys:
+        assert batch[(test_id, env_key)] == compute_flake_scores(test_id, env_key, runs, config)
+
+
+def test_flake_scores_numpy_backend_matches_python():
+    import pytest
+    
+    pytest.importorskip("numpy")
+    runs = _synthetic_history()
+    python_config = PolicyConfig.from_dict({"flake_detection": {"backend": "python"}})
+    numpy_config = PolicyConfig.from_dict({"flake_detection": {"backend": "numpy"}})
+    
+    assert compute_flake_scores_batch(runs, numpy_config) == compute_flake_scores_batch(runs, python_config)
+
+
+def test_history_table_scores_match_run_objects(tmp_path):
+    from datetime import datetime
+    from rqg.storage import HistoryTable
+    
+    runs = _synthetic_history(run_count=12, tests_per_run=15)
+    runs[0].test_results[0].outcome = "error"
+    history = HistoryTable.from_runs(runs)
+    keys = {(f"suite.Test::case_{i}", env_key) for i in range(20) for env_key in ["os=linux", "default", "os=bsd"]}
+    
+    for backend in ["python", "numpy"]:
+        config = PolicyConfig.from_dict({"flake_detection": {"backend": backend}})
+        assert compute_flake_scores_batch(history, config) == compute_flake_scores_batch(runs, config)
+        assert compute_flake_scores_batch(history, config, keys=keys) == compute_flake_scores_batch(runs, config, keys=keys)
+    
+    store = SQLiteStore(db_path=str(tmp_path / "rqg.db"))
+    for run in runs:
+        run.metadata.started_at = datetime.utcnow()
+        store.save_run(run)
+    
+    stored = store.get_history(repo="test/repo", branch="main")
+    materialized = {run.run_id: run for run in stored.to_runs()}
+    store.close()
+    
+    assert len(stored) == len(history)
+    for run in runs:
+        assert [
+            (tr.test_id, tr.outcome, tr.retry_count) for tr in materialized[run.run_id].test_results
+        ] == [(tr.test_id, tr.outcome, tr.retry_count) for tr in run.test_results]
+
+
+def test_history_batches_fit_legacy_sqlite_variable_limit(tmp_path):
+    import sqlite3
+    import pytest
+    from datetime import datetime, timedelta
+    
+    if not hasattr(sqlite3.Connection, "setlimit"):
+        pytest.skip("sqlite3.Connection.setlimit requires Python 3.11")
+    runs = _synthetic_history(run_count=520, tests_per_run=2)
+    now = datetime.utcnow()
+    store = SQLiteStore(db_path=str(tmp_path / "rqg.db"))
+    for i, run in enumerate(runs):
+        run.metadata.started_at = now - timedelta(seconds=i)
+        store.save_run(run)
+    store._conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    
+    history = store.get_history(repo="test/repo", branch="main", lookback_runs=520)
+    store.close()
+    
+    assert history.run_ids == [run.run_id for run in runs]
+    assert len(history) == sum(len(run.test_results) for run in runs)
+
+
+def test_recent_runs_load_failure_text_lazily(tmp_path):
+    from datetime import datetime
+    
+    store = SQLiteStore(db_path=str(tmp_path / "rqg.db"))
+    runs = _synthetic_history(run_count=5, tests_per_run=10)
+    for run in runs:
+        run.metadata.started_at = datetime.utcnow()
+        for tr in run.test_results:
+            if tr.outcome == "fail":
+                tr.failure_text = f"AssertionError: {tr.test_id} failed in {run.run_id}"
+        store.save_run(run)
+    
+    history = store.get_recent_runs(repo="test/repo", branch="main")
+    by_id = {run.run_id: run for run in runs}
+    
+    assert len(history) == len(runs)
+    for run in history:
+        original = by_id[run.run_id]
+        assert [tr.test_id for tr in run.test_results] == [tr.test_id for tr in original.test_results]
+        assert [tr.outcome for tr in run.test_results] == [tr.outcome for tr in original.test_results]
+        assert all(tr.failure_text is None for tr in run.test_results)
+    
+    failing = next(tr for tr in runs[0].test_results if tr.outcome == "fail")
+    assert store.get_failure_text("run-0", failing.test_id) == failing.failure_text
+
+
+def _write_shard_history(db_path, shard):
+    from datetime import datetime
+    
+    with SQLiteStore(db_path=db_path) as store:
+        for run in _synthetic_history(run_count=10, tests_per_run=20, seed=shard):
+            run.run_id = f"shard-{shard}-{run.run_id}"
+            run.metadata.started_at = datetime.utcnow()
+            store.save_run(run)
+            store.get_recent_runs(repo="test/repo", branch="main")
+    return shard
+
+
+def test_store_allows_parallel_shard_writers(tmp_path):
+    from concurrent.futures import ProcessPoolExecutor
+    
+    db_path = str(tmp_path / "rqg.db")
+    SQLiteStore(db_path=db_path).close()
+    
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        assert sorted(pool.map(_write_shard_history, [db_path] * 4, range(4))) == [0, 1, 2, 3]
+    
+    with SQLiteStore(db_path=db_path) as store:
+        assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert len(store.get_recent_runs(repo="test/repo", lookback_runs=100)) == 40
+
+
+def test_bulk_ingest_rebuilds_indexes(tmp_path):
+    from rqg.storage.sqlite_store import result_row_from_dict
+    
+    rows = [
+        {"test_id": "suite.A::ok", "suite": "suite", "outcome": "pass"},
+        {"test_id": "suite.A::broken", "suite": "suite", "outcome": "fail", "failure_text": "boom"},
+    ]
+    
+    with SQLiteStore(db_path=str(tmp_path / "rqg.db")) as store:
+        metadata = RunMetadata(repo="test/repo", branch="main", commit_sha="c1")
+        store.save_run_rows("bulk-run", metadata, (result_row_from_dict(d) for d in rows), rebuild_indexes=True)
+        
+        conn = store._conn
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_test_results_test", "idx_test_results_fingerprint"} <= indexes
+        assert conn.execute("SELECT status FROM runs WHERE run_id = 'bulk-run'").fetchone()[0] == "failure"
+        assert conn.execute("SELECT COUNT(*) FROM test_results WHERE run_id = 'bulk-run'").fetchone()[0] == 2
+
+
+def test_fresh_store_has_bulk_droppable_indexes(tmp_path):
+    with SQLiteStore(db_path=str(tmp_path / "rqg.db")) as store:
+        indexes = {row[0] for row in store._conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    
+    assert {"idx_test_results_test", "idx_test_results_fingerprint"} <= indexes
+
+
+def test_test_stats_match_windowed_recompute(tmp_path):
+    from datetime import datetime, timedelta
+    from rqg.scoring.flake import _OutcomeAccumulator
+    
+    window = 8
+    runs = _synthetic_history(run_count=30, tests_per_run=12, seed=3)
+    base = datetime.utcnow() - timedelta(hours=len(runs))
+    observations = {}
+    
+    with SQLiteStore(db_path=str(tmp_path / "rqg.db"), stats_window=window) as store:
+        for i, run in enumerate(runs):
+            run.metadata.os = "linux"
+            run.metadata.started_at = base + timedelta(hours=i)
+            store.save_run(run, env_key="os=linux")
+            store.save_run(run, env_key="os=linux")
+            for tr in run.test_results:
+                observations.setdefault(tr.test_id, []).append((run.metadata.commit_sha, tr))
+        
+        test_ids = sorted(observations)
+        stats = store.get_test_stats("test/repo", "main", "os=linux", test_ids)
+    
+    scores = compute_flake_scores_from_stats(stats, "os=linux", test_ids)
+    for test_id in test_ids:
+        accumulator = _OutcomeAccumulator()
+        for commit, tr in observations[test_id][-window:]:
+            accumulator.add(commit, tr.outcome, tr.retry_count)
+        assert scores[(test_id, "os=linux")] == accumulator.to_score(test_id, "os=linux")
+
+
+
+def test_sanitizer_single_scan_matches_sequential_passes():
+    from rqg.fingerprint import sanitize_failure_text, detect_infra_hints
+    
+    cases = {
+        "deadbeef2024-01-01 12:30:45": "<HASH><TIMESTAMP> <TIMESTAMP>",
+        "retry  in\t1.5s  on :8080": "retry in <DURATION> on :<PORT>",
+        "job 1234:56:78 took 10ms": "job 12<TIMESTAMP> took <DURATION>",
+        "caf\u017fe 0xABCDEF12\n\n": "caf\u017fe 0x<HASH>",
+        "attached cafebabe": "attached <HASH>",
+    }
+    for text, expected in cases.items():
+        assert sanitize_failure_text(text) == expected
+    
+    assert detect_infra_hints("Browser process CRASHED", "ECONNRESET") == ["network", "session"]
+    assert detect_infra_hints("AssertionError: expected 1") == []
+
+
+def test_streaming_junit_parser_keeps_suite_semantics(tmp_path):
+    from rqg.config import load_config
+    from rqg.parsers import iter_junit_xml
+    
+    xml_path = tmp_path / "nested.xml"
+    xml_path.write_text(
+        '<testsuites>'
+        '<testsuite name="A">'
+        '<testcase classname="pkg.A" name="fails" time="0.5"><failure message="m">boom</failure>'
+        '<system-out>out</system-out></testcase>'
+        '<testsuite name="Inner"><testcase name="errors"><error message="bad"/></testcase></testsuite>'
+        '</testsuite>'
+        '<testcase name="orphan"/>'
+        '<testsuite name="B"><testcase name="skipped"><skipped/></testcase></testsuite>'
+        '</testsuites>',
+        encoding="utf-8",
+    )
+    
+    results = list(iter_junit_xml(xml_path, load_config("rqg.yml")))
+    
+    assert [(r.suite, r.name, r.outcome) for r in results] == [
+        ("A", "fails", "fail"),
+        ("A", "errors", "fail"),
+        ("B", "skipped", "skip"),
+    ]
+    assert results[0].failure_text == "boom"
+    assert results[0].system_out == "out"
+    assert results[0].duration_ms == 500.0
+    assert results[1].failure_text == "bad"
+
+
+def test_parallel_collect_matches_serial(tmp_path, monkeypatch, capsys):
+    from rqg.bundle import read_bundle
+    from benchmarks.synthetic import generate_junit_files
+    
+    generate_junit_files(tmp_path / "reports", files=6, tests_per_file=20, fail_rate=0.2)
+    (tmp_path / "reports" / "TEST-Broken.xml").write_text("<testsuite><testcase", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    
+    bundles = {}
+    for jobs in (1, 3):
+        path = collect_artifacts(config_path="missing.yml", output_path=f"bundle-{jobs}.jsonl", jobs=jobs)
+        bundles[jobs] = [tr.to_dict() for tr in read_bundle(path).test_results]
+        assert "Failed to parse reports/TEST-Broken.xml" in capsys.readouterr().out
+    
+    assert len(bundles[1]) == 120
+    assert bundles[1] == bundles[3]
+
+
+def test_jsonl_bundle_roundtrip_and_legacy_detection(tmp_path):
+    import json
+    from rqg.bundle import BundleReader, write_bundle
+    
+    run = _synthetic_history(run_count=1, tests_per_run=5, seed=4)[0]
+    run.test_results[0].failure_text = "line one\nline two"
+    
+    path = write_bundle(tmp_path / "bundle.jsonl", run)
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    
+    assert len(lines) == 1 + len(run.test_results)
+    assert json.loads(lines[0])["rqg_bundle"] == 2
+    
+    reader = BundleReader(path)
+    assert not reader.is_legacy
+    assert reader.to_run().to_dict() == run.to_dict()
+    
+    legacy_path = tmp_path / "legacy.jsonl"
+    legacy_path.write_text(json.dumps(run.to_dict(), indent=2), encoding="utf-8")
+    
+    legacy_reader = BundleReader(legacy_path)
+    assert legacy_reader.is_legacy
+    assert legacy_reader.to_run().to_dict() == run.to_dict()
+
+
+def test_failure_clusters_maintained_on_ingest(tmp_path):
+    import sqlite3
+    from datetime import datetime, timedelta
+    
+    def failing_run(run_id, repo, branch, fingerprint, hours_ago):
+        metadata = RunMetadata(
+            repo=repo,
+            branch=branch,
+            commit_sha="c1",
+            started_at=datetime.utcnow() - timedelta(hours=hours_ago),
+        )
+        return Run(run_id=run_id, metadata=metadata, test_results=[
+            TestCaseResult(test_id="t1", suite="s", outcome="fail", failure_text="boom", fingerprint=fingerprint),
+            TestCaseResult(test_id="t2", suite="s", outcome="fail", failure_text="boom", fingerprint=fingerprint),
+        ])
+    
+    db_path = str(tmp_path / "rqg.db")
+    with SQLiteStore(db_path=db_path) as store:
+        store.save_run(failing_run("r1", "repo/a", "main", "fp-old", 5))
+        store.save_run(failing_run("r1", "repo/a", "main", "fp-old", 5))
+        store.save_run(failing_run("r2", "repo/a", "feature", "fp-old", 3))
+        store.save_run(failing_run("r3", "repo/b", "main", "fp-other", 2))
+        store.save_run(failing_run("r4", "repo/a", "main", "fp-new", 1))
+        
+        clusters = store.get_failure_clusters("repo/a", ["fp-old", "fp-new", "fp-other"], exclude_run_id="r4")
+        main_only = store.get_failure_clusters("repo/a", ["fp-old"], branch="main")
+    
+    assert [c.fingerprint for c in clusters] == ["fp-old"]
+    assert clusters[0].occurrence_count == 2
+    assert clusters[0].test_ids == ["t1", "t2"]
+    assert clusters[0].example_failure_text == "boom"
+    assert main_only[0].occurrence_count == 1
+    
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP TABLE failure_clusters")
+    conn.execute("""
+        CREATE TABLE failure_clusters (
+            fingerprint TEXT PRIMARY KEY, first_seen_at TEXT, last_seen_at TEXT,
+            example_failure_text TEXT, infra_hints TEXT, test_ids TEXT, occurrence_count INTEGER
+        )
+    """)
+    conn.execute("INSERT INTO failure_clusters VALUES ('fp-old', NULL, NULL, 'curated', '[\"network\"]', '[]', 0)")
+    conn.commit()
+    conn.close()
+    
+    with SQLiteStore(db_path=db_path) as store:
+        migrated = store.get_failure_clusters("repo/a", ["fp-old", "fp-new"])
+    
+    assert {c.fingerprint: c.occurrence_count for c in migrated} == {"fp-old": 2, "fp-new": 1}
+    assert [c.infra_hints for c in migrated if c.fingerprint == "fp-old"] == [["network"]]
+
+
+def test_similarity_clusterer_attaches_near_duplicates(tmp_path):
+    from rqg.fingerprint import compute_fingerprint
+    from rqg.fingerprint.similarity import SimilarityClusterer
+    
+    frames = "\n".join(f"  at com.example.Service{i}.call(Service{i}.java:{i * 7})" for i in range(8))
+    original = f"AssertionError: expected status 200 but got 500 from /api/orders\n{frames}"
+    variant = f"AssertionError: expected status 200 but got 503 from /api/orders\n{frames}"
+    unrelated = "TimeoutError: page did not load\n  at Browser.open(browser.js:10)"
+    
+    with SQLiteStore(db_path=str(tmp_path / "rqg.db")) as store:
+        clusterer = SimilarityClusterer(store, repo="test/repo", threshold=0.7)
+        first = clusterer.assign(compute_fingerprint(original), original)
+        assert first == compute_fingerprint(original)
+        assert clusterer.assign(compute_fingerprint(variant), variant) == first
+        assert clusterer.assign(compute_fingerprint(unrelated), unrelated) == compute_fingerprint(unrelated)
+        assert clusterer.matched == 1
+        
+        other_repo = SimilarityClusterer(store, repo="other/repo", threshold=0.7)
+        assert other_repo.assign(compute_fingerprint(variant), variant) == compute_fingerprint(variant)
+        
+        fresh = SimilarityClusterer(store, repo="test/repo", threshold=0.7)
+        assert fresh.assign(compute_fingerprint(variant), variant) == first
+
+
+def test_fingerprint_cache_counts_hits_and_persists(tmp_path):
+    from rqg.fingerprint import compute_fingerprint, detect_infra_hints
+    from rqg.fingerprint.cache import FingerprintCache
+    
+    texts = [f"AssertionError: case {i % 3} failed after ECONNRESET" for i in range(10)]
+    
+    with SQLiteStore(db_path=str(tmp_path / "rqg.db")) as store:
+        cache = FingerprintCache(maxsize=2, store=store)
+        assert [cache.fingerprint(t) for t in texts] == [compute_fingerprint(t) for t in texts]
+        assert cache.infra_hints(texts[0]) == detect_infra_hints(texts[0])
+        assert (cache.misses, cache.hits) == (4, 7)
+        cache.flush()
+        
+        warm = FingerprintCache(maxsize=16, store=store)
+        assert [warm.fingerprint(t) for t in texts] == [compute_fingerprint(t) for t in texts]
+        assert warm.stats()["persisted_hits"] == 3
+        assert warm.stats()["hits"] == 7
+        assert warm.stats()["misses"] == 0
+
+def test_profile_and_trace_flags_record_stage_timings(tmp_path, monkeypatch):
+    import json
+    import pstats
+    from click.testing import CliRunner
+    from rqg.cli import main
+    from benchmarks.synthetic import generate_junit_files
+    
+    generate_junit_files(tmp_path / "reports", files=3, tests_per_file=10, fail_rate=0.3)
+    monkeypatch.chdir(tmp_path)
+    runner = CliRunner()
+    
+    result = runner.invoke(main, ["collect", "--config", "missing.yml", "--output", "bundle.jsonl"])
+    assert result.exit_code == 0, result.output
+    
+    result = runner.invoke(main, [
+        "--profile", "analyze.pstats",
+        "--trace", "trace.json",
+        "analyze", "--config", "missing.yml", "--bundle", "bundle.jsonl", "--output-dir", "out",
+    ])
+    assert result.exit_code in (0, 10, 20), result.output
+    
+    timings = json.loads((tmp_path / "out" / "decision.json").read_text())["timings"]
+    assert timings["stages"]["analyze.ingest"]["calls"] == 1
+    assert timings["stages"]["fingerprint.detect_infra_hints"]["calls"] > 0
+    assert "policy.apply_policy" in timings["stages"]
+    assert timings["counters"]["analyze.test_results"] == 30
+    assert timings["counters"]["sqlite.statements"] > 0
+    
+    trace = json.loads((tmp_path / "trace.json").read_text())
+    assert {"analyze.ingest", "store.get_history"} <= {event["name"] for event in trace["traceEvents"]}
+    assert pstats.Stats(str(tmp_path / "analyze.pstats")).total_calls > 0
+
+
+def test_benchmark_suite_reports_every_stage(tmp_path, monkeypatch):
+    from benchmarks.suite import run_scale, compare_results
+    
+    monkeypatch.chdir(tmp_path)
+    result = run_scale(
+        "tiny",
+        runs=4,
+        tests_per_run=100,
+        env_cardinality=2,
+        fail_rate=0.02,
+        flaky_rate=0.1,
+        flake_fail_rate=0.5,
+        seed=3,
+    )
+    
+    assert set(result["stages"]) == {
+        "ingest", "fingerprint", "collect", "analyze_ingest", "history_load",
+        "cluster_lookup", "flake_scoring", "policy", "analyze_total",
+    }
+    assert result["stages"]["ingest"]["items"] == 400
+    assert result["stages"]["history_load"]["items"] == 500
+    
+    report = {"scales": [result]}
+    assert compare_results(report, report, threshold=1.25) == []
+
+
+def test_cli_startup_imports_stay_lazy():
+    import statistics
+    from benchmarks.bench_startup import import_times, import_samples_ms, CLI_STARTUP_BUDGET_MS
+    
+    cli_imports = import_times("rqg.cli")
+    heavy = {"numpy", "requests", "lxml", "yaml", "sqlite3", "rqg.collect", "rqg.analyze", "rqg.explain", "rqg.upload", "rqg.server"}
+    
+    assert heavy.isdisjoint(cli_imports)
+    assert {"numpy", "requests", "lxml"}.isdisjoint(import_times("rqg.analyze"))
+    assert statistics.median(import_samples_ms("rqg.cli", 5)) < CLI_STARTUP_BUDGET_MS
+
+
+def _start_upload_server():
+    import gzip
+    import hashlib
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    state = {"bundles": {}, "uploads": {}, "failures": {"PUT": 1, "POST": 0}, "lock": threading.Lock()}
+    
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+        
+        def _body(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            return gzip.decompress(body) if self.headers.get("Content-Encoding") == "gzip" else body
+        
+        def _reply(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        
+        def _inject_failure(self, method):
+            with state["lock"]:
+                if state["failures"][method] > 0:
+                    state["failures"][method] -= 1
+                    self._reply(503, {"error": "try again"})
+                    return True
+            return False
+        
+        def do_POST(self):
+            body = self._body()
+            if self._inject_failure("POST"):
+                return
+            if self.path == "/api/v1/bundles":
+                state["bundles"][self.headers["X-RQG-Run-Id"]] = body
+                return self._reply(200, {"status": "ok"})
+            
+            if self.path == "/api/v1/uploads":
+                request = json.loads(body)
+                upload = state["uploads"].setdefault(request["sha256"], {"request": request, "chunks": {}})
+                return self._reply(200, {"upload_id": request["sha256"], "received": sorted(upload["chunks"])})
+            
+            upload = state["uploads"][self.path.split("/")[4]]
+            data = b"".join(upload["chunks"][i] for i in range(upload["request"]["chunks"]))
+            state["bundles"][upload["request"]["run_id"]] = data
+            return self._reply(200, {"status": "ok", "sha256_ok": hashlib.sha256(data).hexdigest() == upload["request"]["sha256"]})
+        
+        def do_PUT(self):
+            body = self._body()
+            if self._inject_failure("PUT"):
+                return
+            
+            _, _, _, _, upload_id, _, index = self.path.split("/")
+            assert hashlib.sha256(body).hexdigest() == self.headers["X-RQG-Chunk-Sha256"]
+            state["uploads"][upload_id]["chunks"][int(index)] = body
+            return self._reply(200, {"status": "ok"})
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_upload_streams_chunks_with_retry_resume_and_directories(tmp_path):
+    import hashlib
+    from rqg.bundle import write_bundle
+    import pytest
+    import requests
+    from rqg.upload import upload_bundle, upload_bundles, file_digest
+    
+    server, state, api_url = _start_upload_server()
+    try:
+        paths = []
+        for i, run in enumerate(_synthetic_history(run_count=3, tests_per_run=200)):
+            path = tmp_path / "bundles" / f"shard-{i}" / "bundle.jsonl"
+            path.parent.mkdir(parents=True)
+            write_bundle(path, run)
+            paths.append(path)
+        
+        state["failures"]["POST"] = 1
+        with pytest.raises(requests.HTTPError):
+            upload_bundle(str(paths[0]), api_url=api_url, chunk_size=10 ** 7, backoff_factor=0)
+        assert state["failures"]["POST"] == 0 and state["bundles"] == {}
+        
+        small = upload_bundle(str(paths[0]), api_url=api_url, chunk_size=10 ** 7, backoff_factor=0)
+        assert small == {"status": "ok"}
+        assert state["bundles"]["run-0"] == paths[0].read_bytes()
+        
+        size = paths[1].stat().st_size
+        chunk_size = 4096
+        state["uploads"][file_digest(paths[1])] = {
+            "request": {"run_id": "run-1", "chunks": -(-size // chunk_size), "sha256": file_digest(paths[1])},
+            "chunks": {0: paths[1].read_bytes()[:chunk_size]},
+        }
+        chunked = upload_bundle(str(paths[1]), api_url=api_url, chunk_size=chunk_size, backoff_factor=0)
+        assert chunked["sha256_ok"]
+        assert chunked["chunks_resumed"] == 1
+        assert state["failures"]["PUT"] == 0
+        assert state["bundles"]["run-1"] == paths[1].read_bytes()
+        
+        state["bundles"].clear()
+        results = upload_bundles(str(tmp_path / "bundles"), api_url=api_url, parallel=3, chunk_size=8192, backoff_factor=0)
+        assert [error for _, _, error in results] == [None, None, None]
+        assert {run_id: hashlib.sha256(data).hexdigest() for run_id, data in state["bundles"].items()} == {
+            f"run-{i}": file_digest(path) for i, path in enumerate(paths)
+        }
+    finally:
+        server.shutdown()
+
+
+def test_backfill_orders_bundles_and_matches_sequential_ingest(tmp_path, monkeypatch):
+    from rqg.backfill import backfill_bundles
+    from rqg.bundle import write_bundle
+    from benchmarks.synthetic import generate_history, populate_history_db
+    
+    runs = list(generate_history(6, 80, fail_rate=0.05, flaky_rate=0.2, seed=5))
+    for i, run in enumerate(reversed(runs)):
+        write_bundle(tmp_path / "archive" / f"{i % 2}" / f"bundle-{i}.jsonl", run)
+    (tmp_path / "archive" / "bundle-broken.jsonl").write_text("not a bundle", encoding="utf-8")
+    
+    populate_history_db(tmp_path / "reference.db", runs)
+    reference = SQLiteStore(db_path=str(tmp_path / "reference.db"))
+    
+    monkeypatch.chdir(tmp_path)
+    reports = []
+    stats = backfill_bundles([str(tmp_path / "archive")], config_path="missing.yml", batch_size=4, jobs=2, progress=reports.append)
+    
+    assert (stats.runs, stats.results, stats.skipped) == (6, 480, 1)
+    assert reports[-1].bundles_done == 6
+    
+    backfilled = SQLiteStore()
+    query = """
+        SELECT repo, branch, fingerprint, first_seen_at, last_seen_at, occurrence_count, test_ids
+        FROM failure_clusters ORDER BY fingerprint
+    """
+    assert backfilled._conn.execute(query).fetchall() == reference._conn.execute(query).fetchall()
+    assert backfilled.get_recent_runs("bench/repo")[0].run_id == runs[-1].run_id
+    assert len(backfilled.get_history("bench/repo")) == 480
+    backfilled.close()
+    reference.close()
+
+
+def test_compiled_policy_rules_match_legacy_scan():
+    from benchmarks.bench_policy import legacy_policy_reasons, synthetic_policy_inputs
+    from rqg.policy import apply_policy
+    from rqg.policy.rules import SubstringMatcher
+    
+    matcher = SubstringMatcher(["pay", "payments", "ments", "", "pay"])
+    assert matcher.find("checkout.payments") == {0, 1, 2, 3, 4}
+    assert matcher.find("login", "auth") == {3}
+    
+    run, new_clusters, known_flaky, config = synthetic_policy_inputs(400, 40, seed=3)
+    config.gating["hard_block"]["critical_paths"] += ["Module1", "module1", "module", "TEST_CASE"]
+    run.test_results[0].fingerprint = None
+    new_clusters.append({"fingerprint": None, "count": 1})
+    
+    decision = apply_policy(run, new_clusters, known_flaky, [], config)
+    reasons = [r for r in decision.decision_reasons if r["type"] in ("critical_path_failure", "required_suite_failure")]
+    expected = legacy_policy_reasons(run, new_clusters, known_flaky, config)
+    assert {r["type"] for r in expected} == {"critical_path_failure", "required_suite_failure"}
+    assert reasons == expected
+
+
+def test_log_scanner_streams_bounded_events_into_infra_classification(tmp_path, monkeypatch):
+    from rqg.bundle import BundleReader
+    from rqg.logs import scan_logs
+    
+    (tmp_path / "reports").mkdir()
+    (tmp_path / "reports" / "junit-e2e.xml").write_text(
+        '<testsuite name="e2e"><testcase classname="e2e.Checkout" name="test_pay">'
+        '<failure message="boom">AssertionError: page not ready</failure></testcase></testsuite>',
+        encoding="utf-8",
+    )
+    lines = [f"2024-05-01T10:00:{i % 60:02d}Z step {i} Timeout waiting for runner" for i in range(40)]
+    lines.append("2024-05-01 10:01:00,250 e2e.Checkout::test_pay killed: OOMKilled")
+    lines.append("no timestamp, webdriver disconnect")
+    (tmp_path / "ci.log").write_text("\n".join(lines), encoding="utf-8")
+    (tmp_path / "rqg.yml").write_text("inputs:\n  max_log_events: 6\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    
+    for chunk_size in (64, 4096):
+        assert scan_logs(["ci.log"], max_events=6, chunk_size=chunk_size) == scan_logs(
+            ["ci.log"], max_events=6, chunk_size=chunk_size, use_mmap=True
+        )
+    
+    bundle_path = collect_artifacts(config_path="rqg.yml", output_path="bundle.jsonl")
+    summary, *events = BundleReader(Path(bundle_path)).log_events
+    assert summary == {
+        "type": "log_file", "source": "ci.log", "bytes": (tmp_path / "ci.log").stat().st_size,
+        "lines": 42, "hints": {"network": 40, "runner": 1, "session": 1}, "dropped": 38,
+    }
+    assert [(e["line"], e["hints"], e["timestamp"]) for e in events] == [
+        (1, ["network"], "2024-05-01T10:00:00Z"),
+        (2, ["network"], "2024-05-01T10:00:01Z"),
+        (41, ["runner"], "2024-05-01T10:01:00.250"),
+        (42, ["session"], None),
+    ]
+    
+    decision = analyze_run(config_path="rqg.yml", bundle_path=bundle_path, output_dir="out")
+    assert decision["inputs_present"]["logs_present"]
+    assert decision["infra_failures"] == [{
+        "test_id": "e2e.Checkout::test_pay",
+        "fingerprint": decision["infra_failures"][0]["fingerprint"],
+        "hints": ["runner"],
+        "log_events": [{"source": "ci.log", "line": 41}],
+    }]
+
+
+def test_log_hint_anchors_cover_every_pattern(tmp_path, monkeypatch):
+    import re
+    from rqg import logs
+    from rqg.fingerprint.sanitizer import INFRA_HINT_PATTERNS, detect_infra_hints
+    
+    examples = {
+        "econnreset": "Error: read ECONNRESET",
+        "timeout": "Timeout of 5000ms exceeded",
+        "dns": "DNS lookup failed for registry",
+        "connection refused": "connect: Connection refused",
+        "connection reset": "Connection reset by peer",
+        "socket hang up": "Error: socket hang up",
+        "disk full": "write failed: disk full",
+        "oomkilled": "container OOMKilled",
+        "no space left": "No space left on device",
+        "agent disconnected": "The agent disconnected from the server",
+        "out of memory": "fatal: out of memory",
+        "session not created": "SessionNotCreatedException: session not created",
+        "webdriver disconnect": "WebDriver disconnected",
+        r"browser.*crash": "Browser tab crashed",
+    }
+    assert sorted(examples) == sorted(p for patterns in INFRA_HINT_PATTERNS.values() for p in patterns)
+    for pattern, line in examples.items():
+        anchor = logs.hint_anchor(pattern)
+        assert anchor is not None and anchor.decode() in re.search(pattern, line.lower()).group()
+    
+    lines = list(examples.values()) + ["browser ECONNRESET then crash"]
+    text = "\n".join(["all green"] + lines).lower().encode()
+    anchored = logs._candidate_lines(text)
+    monkeypatch.setattr(logs, "LOG_HINT_ANCHORS", None)
+    assert logs._candidate_lines(text) == anchored
+    assert len(anchored) == len(lines)
+    
+    log_path = tmp_path / "ci.log"
+    log_path.write_text("\n".join(lines) + "\n")
+    events = [event for event in logs.scan_logs([log_path]) if event["type"] == "infra_hint"]
+    assert [event["hints"] for event in events] == [detect_infra_hints(line) for line in lines]
+    assert events[-1]["hints"] == ["network", "session"]
+
+
+def test_failures_correlate_with_log_events_in_their_time_window(tmp_path, monkeypatch):
+    from rqg.bundle import read_bundle
+    from rqg.correlate import LogEventIndex
+    from rqg.timeutil import parse_timestamp
+    
+    (tmp_path / "reports").mkdir()
+    (tmp_path / "reports" / "junit-api.xml").write_text(
+        '<testsuite name="api" timestamp="2024-05-01T12:00:00">'
+        '<testcase classname="api.Orders" name="test_create" time="30"><failure>AssertionError: 500</failure></testcase>'
+        '<testcase classname="api.Orders" name="test_list" time="20"><failure>AssertionError: 502</failure></testcase>'
+        '<testcase classname="api.Orders" name="test_cancel" time="5" timestamp="2024-05-01T11:00:00+01:00"/>'
+        '</testsuite>',
+        encoding="utf-8",
+    )
+    (tmp_path / "console.log").write_text(
+        "2024-05-01T10:00:10.5Z starting api suite\n"
+        "2024-05-01T10:00:41.250Z runner: agent disconnected\n"
+        "2024-05-01T12:00:00Z agent disconnected after job\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "rqg.yml").write_text('inputs:\n  junit_timezone: "+02:00"\n', encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    
+    naive_run = read_bundle(Path(collect_artifacts(config_path="missing.yml", output_path="naive.jsonl")))
+    assert [tr.started_at for tr in naive_run.test_results] == [
+        "2024-05-01T12:00:00", "2024-05-01T12:00:30", "2024-05-01T10:00:00Z",
+    ]
+    assert LogEventIndex(naive_run.log_events).events_for_test(naive_run.test_results[1], slack=0) == []
+    naive_event = {"type": "infra_hint", "timestamp": "2024-05-01T12:00:35", "message": "oom", "hints": ["runner"]}
+    assert LogEventIndex([naive_event]).events_for_test(naive_run.test_results[1], slack=0) == [naive_event]
+    
+    bundle_path = collect_artifacts(config_path="rqg.yml", output_path="bundle.jsonl")
+    run = read_bundle(Path(bundle_path))
+    assert [tr.started_at for tr in run.test_results] == [
+        "2024-05-01T10:00:00Z", "2024-05-01T10:00:30Z", "2024-05-01T10:00:00Z",
+    ]
+    
+    index = LogEventIndex(run.log_events)
+    assert parse_timestamp("2024-05-01 12:00:00,5+02:00") == parse_timestamp("2024-05-01T10:00:00.500Z")
+    assert [e["line"] for e in index.events_for_test(run.test_results[1], slack=0)] == [2]
+    assert index.events_for_test(run.test_results[0], slack=0) == []
+    
+    decision = analyze_run(config_path="rqg.yml", bundle_path=bundle_path, output_dir="out")
+    assert [(f["test_id"], f["hints"], f.get("log_events")) for f in decision["infra_failures"]] == [
+        ("api.Orders::test_list", ["runner"], [{"source": "console.log", "line": 2}]),
+    ]
+    assert decision["timings"]["counters"]["analyze.log_correlated_failures"] == 1
+
+
+def test_merge_combines_shard_bundles_into_one_logical_run(tmp_path, monkeypatch):
+    from datetime import datetime
+    from click.testing import CliRunner
+    from rqg.bundle import write_bundle, read_bundle
+    from rqg.cli import main
+    
+    def shard(shard_id, outcomes, build="7", minute=0):
+        metadata = RunMetadata(
+            repo="test/repo", branch="main", commit_sha="abc", workflow="ci", build_number=build, attempt=1,
+            started_at=datetime(2024, 5, 1, 10, minute), ended_at=datetime(2024, 5, 1, 10, minute + 5), shard_id=shard_id,
+        )
+        results = [
+            TestCaseResult(test_id=test_id, suite="s", outcome=outcome, duration_ms=100.0 * (i + 1),
+                           failure_text="AssertionError: x" if outcome == "fail" else None)
+            for i, (test_id, outcome) in enumerate(outcomes.items())
+        ]
+        path = tmp_path / "shards" / f"bundle-{shard_id}-{build}.jsonl"
+        write_bundle(path, Run(run_id=f"shard-{shard_id}-{build}", metadata=metadata, test_results=results))
+        return path
+    
+    shard("1", {"t.Z::c": "pass", "t.A::a": "pass", "t.M::shared": "pass"}, minute=2)
+    shard("0", {"t.M::shared": "fail", "t.B::b": "skip"})
+    monkeypatch.chdir(tmp_path)
+    runner = CliRunner()
+    
+    result = runner.invoke(main, ["merge", "shards", "-o", "merged.jsonl"])
+    assert result.exit_code == 0, result.output
+    assert "Merged 2 shards" in result.output and "1 duplicates dropped" in result.output
+    
+    merged = read_bundle(Path("merged.jsonl"))
+    assert [(tr.test_id, tr.outcome) for tr in merged.test_results] == [
+        ("t.A::a", "pass"), ("t.B::b", "skip"), ("t.M::shared", "fail"), ("t.Z::c", "pass"),
+    ]
+    assert merged.metadata.shard_id is None
+    assert (merged.metadata.started_at, merged.metadata.ended_at) == (datetime(2024, 5, 1, 10, 0), datetime(2024, 5, 1, 10, 7))
+    
+    decision = analyze_run(config_path="missing.yml", bundle_path="merged.jsonl", output_dir="out")
+    assert decision["current_run_summary"]["total_tests"] == 4
+    with SQLiteStore() as store:
+        assert store._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 1
+        assert [(s["shard_id"], s["tests"], s["failed"], s["duration_ms"], s["slowest_ms"], s["wall_ms"])
+                for s in store.get_run_shards(merged.run_id)] == [
+            ("0", 2, 1, 300.0, 200.0, 300000.0),
+            ("1", 3, 0, 600.0, 300.0, 300000.0),
+        ]
+    
+    shard("2", {"t.A::a": "pass"}, build="8")
+    result = runner.invoke(main, ["merge", "shards", "-o", "merged.jsonl"])
+    assert result.exit_code == 1
+    assert "2 different builds" in result.output
+
+
+def test_matrix_scores_env_cells_like_single_analysis(tmp_path, monkeypatch):
+    from datetime import datetime, timedelta
+    from click.testing import CliRunner
+    from rqg.bundle import write_bundle
+    from rqg.cli import main
+    
+    def bundle(path, run_id, os_name, outcomes, commit="c9", day=9):
+        metadata = RunMetadata(repo="test/repo", branch="main", commit_sha=commit, os=os_name, started_at=datetime.now() - timedelta(days=10 - day))
+        results = [
+            TestCaseResult(test_id=test_id, suite="s", outcome=outcome,
+                           failure_text=f"AssertionError: {test_id} timed out" if outcome == "fail" else None)
+            for test_id, outcome in outcomes.items()
+        ]
+        write_bundle(tmp_path / path, Run(run_id=run_id, metadata=metadata, test_results=results))
+        return str(tmp_path / path)
+    
+    monkeypatch.chdir(tmp_path)
+    for day in range(1, 7):
+        history = bundle(f"history-{day}.jsonl", f"h{day}", "linux", {"t::flaky": "fail" if day % 2 else "pass", "t::ok": "pass"}, commit=f"c{day}", day=day)
+        analyze_run(config_path="missing.yml", bundle_path=history, output_dir="history-out")
+        history = bundle(f"history-mac-{day}.jsonl", f"m{day}", "mac", {"t::flaky": "pass", "t::ok": "pass"}, commit=f"c{day}", day=day)
+        analyze_run(config_path="missing.yml", bundle_path=history, output_dir="history-out")
+    shutil.copytree(tmp_path / ".rqg", tmp_path / "single" / ".rqg")
+    
+    cells = {
+        "os=linux": bundle("matrix/linux.jsonl", "x-linux", "linux", {"t::flaky": "fail", "t::ok": "pass"}),
+        "os=mac": bundle("matrix/mac.jsonl", "x-mac", "mac", {"t::flaky": "pass", "t::ok": "fail"}),
+    }
+    result = CliRunner().invoke(main, ["matrix", "matrix", "-c", "missing.yml", "-o", "out", "-j", "2"])
+    aggregate = json.loads((tmp_path / "out" / "matrix.json").read_text())
+    assert [(cell["env_key"], cell["decision"]) for cell in aggregate["cells"]] == [("os=linux", "PASS"), ("os=mac", "HARD_BLOCK")]
+    
+    monkeypatch.chdir(tmp_path / "single")
+    severity = {"PASS": 0, "SOFT_BLOCK": 1, "HARD_BLOCK": 2}
+    compared = ("decision", "decision_reasons", "known_flaky_failures", "new_failure_clusters", "current_run_summary")
+    for cell, (env_key, path) in zip(aggregate["cells"], cells.items()):
+        single = analyze_run(config_path="missing.yml", bundle_path=path, output_dir="out")
+        matrix_cell = json.loads((tmp_path / cell["output_dir"] / "decision.json").read_text())
+        assert {key: matrix_cell[key] for key in compared} == {key: single[key] for key in compared}
+    assert aggregate["decision"] == max((cell["decision"] for cell in aggregate["cells"]), key=severity.get)
+    assert result.exit_code == {"PASS": 0, "SOFT_BLOCK": 10, "HARD_BLOCK": 20}[aggregate["decision"]]
+    
+    bundle("matrix/other.jsonl", "x-other", "windows", {"t::ok": "pass"}, commit="c10")
+    result = CliRunner().invoke(main, ["matrix", str(tmp_path / "matrix"), "-c", "missing.yml"])
+    assert result.exit_code == 1 and "2 different commits" in result.output
+
+
+def test_serve_matches_cold_analysis_and_reloads_after_external_writes(tmp_path, monkeypatch):
+    import threading
+    from datetime import datetime, timedelta
+    from click.testing import CliRunner
+    from rqg.bundle import write_bundle
+    from rqg.cli import main
+    from rqg.client import request_server
+    from rqg.server import WarmIndex, create_server
+    
+    def bundle(run_id, day, outcomes):
+        metadata = RunMetadata(repo="test/repo", branch="main", commit_sha=f"c{day}", os="linux", started_at=datetime.now() - timedelta(days=10 - day))
+        results = [
+            TestCaseResult(test_id=test_id, suite="s", outcome=outcome,
+                           failure_text=f"AssertionError: {test_id} timed out" if outcome == "fail" else None)
+            for test_id, outcome in outcomes.items()
+        ]
+        path = tmp_path / "bundles" / f"{run_id}.jsonl"
+        write_bundle(path, Run(run_id=run_id, metadata=metadata, test_results=results))
+        return str(path)
+    
+    runner = CliRunner()
+    compared = ("decision", "decision_reasons", "known_flaky_failures", "new_failure_clusters", "infra_failures")
+    for source in ("history", "stats"):
+        warm_dir, cold_dir = tmp_path / source / "warm", tmp_path / source / "cold"
+        for directory in (warm_dir, cold_dir):
+            directory.mkdir(parents=True)
+            (directory / "rqg.yml").write_text(f"flake_detection:\n  source: {source}\n")
+        
+        monkeypatch.chdir(warm_dir)
+        index = WarmIndex()
+        server = create_server(index, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        
+        decisions = []
+        for day in range(1, 9):
+            path = bundle(f"{source}-{day}", day, {
+                "t::flaky": "fail" if day % 2 else "pass",
+                "t::ok": "fail" if day == 7 else "pass",
+                f"t::new{day % 3}": "pass",
+            })
+            monkeypatch.chdir(warm_dir)
+            if day == 5:
+                analyze_run(bundle_path=path, output_dir="out")
+            else:
+                result = runner.invoke(main, ["analyze", "-b", path, "-o", "out", "--server", server.url])
+                assert result.exit_code in (0, 10, 20), result.output
+            warm = json.loads((warm_dir / "out" / "decision.json").read_text())
+            
+            monkeypatch.chdir(cold_dir)
+            cold = analyze_run(bundle_path=path, output_dir="out")
+            assert {key: warm[key] for key in compared} == {key: cold[key] for key in compared}
+            decisions.append((warm["decision"], bool(warm["known_flaky_failures"])))
+        
+        status = request_server(server.url, "GET", "/status")
+        assert (status["analyses"], status["reloads"]) == (7, 1)
+        assert {("HARD_BLOCK", False), ("PASS", True)} <= set(decisions)
+        server.shutdown()
+        server.server_close()
+        index.close()
+    
+    result = runner.invoke(main, ["analyze", "-b", path, "-o", "out", "--server", "http://127.0.0.1:1"])
+    assert "analyzing locally" in result.output and result.exit_code in (0, 10, 20)
+
+
+
+def test_serve_bounds_warm_caches_across_branches(tmp_path, monkeypatch):
+    from datetime import datetime, timedelta
+    from rqg import server
+    from rqg.bundle import write_bundle
+    from rqg.storage.failure_clusters import ClusterState
+    
+    monkeypatch.setattr(server, "MAX_WARM_WINDOWS", 2)
+    monkeypatch.setattr(server, "MAX_WARM_STATS", 2)
+    monkeypatch.setattr(server, "MAX_WARM_CLUSTERS", 3)
+    compared = ("decision", "decision_reasons", "known_flaky_failures", "new_failure_clusters")
+    
+    for source in ("history", "stats"):
+        warm_dir, cold_dir = tmp_path / source / "warm", tmp_path / source / "cold"
+        for directory in (warm_dir, cold_dir):
+            directory.mkdir(parents=True)
+            (directory / "rqg.yml").write_text(f"flake_detection:\n  source: {source}\n")
+        monkeypatch.chdir(warm_dir)
+        index = server.WarmIndex()
+        
+        for day in range(1, 7):
+            for branch in ("main", "a", "b", "c"):
+                metadata = RunMetadata(repo="test/repo", branch=branch, commit_sha=f"c{day}", started_at=datetime.now() - timedelta(days=7 - day))
+                results = [
+                    TestCaseResult(test_id=f"t::{branch}", suite="s", outcome="fail" if day % 2 else "pass",
+                                   failure_text=f"AssertionError: {branch} broke"),
+                    TestCaseResult(test_id="t::ok", suite="s", outcome="pass"),
+                ]
+                path = tmp_path / "bundles" / f"{source}-{branch}-{day}.jsonl"
+                write_bundle(path, Run(run_id=path.stem, metadata=metadata, test_results=results))
+                
+                monkeypatch.chdir(warm_dir)
+                warm = index.analyze(str(path), output_dir="out")
+                monkeypatch.chdir(cold_dir)
+                cold = analyze_run(bundle_path=str(path), output_dir="out")
+                assert {key: warm[key] for key in compared} == {key: cold[key] for key in compared}
+                
+                state = index.state
+                assert len(state.windows) <= 2 and len(state.stats) <= 2 and len(state.clusters) <= 3
+        
+        assert index.reloads == 0 and len(index.state.windows if source == "history" else index.state.stats) == 2
+        
+        run = Run(run_id="late", metadata=RunMetadata(repo="test/repo", branch="main", commit_sha="c7", started_at=datetime.now()),
+                  test_results=[TestCaseResult(test_id="t::main", suite="s", outcome="fail", fingerprint="fp")])
+        stale = ClusterState(window=[["old", (datetime.now() - timedelta(days=400)).isoformat()]])
+        index.state.clusters[("test/repo", "fp")] = {("test/repo", "feature", "fp"): stale}
+        index.state.ingested(run)
+        assert list(index.state.clusters[("test/repo", "fp")]) == [("test/repo", "main", "fp")]
+        index.close()
+
 def main():
     print("\n" + "=" * 50)
     print("RQG Test Senaryosu")
@@ -180,4 +1168,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-